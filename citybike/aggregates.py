@@ -0,0 +1,229 @@
+"""
+Incremental trip aggregates for the CityBike platform.
+
+TripAggregates holds the running counts and sums behind the analytics
+methods of BikeShareSystem.  It is fed one cleaned chunk of trips at a
+time (update) and two instances can be combined (merge), so the answers
+never require the full trips table in memory.
+
+The result methods mirror the BikeShareSystem analytics methods of the
+same name and return the same shapes.
+"""
+
+import numpy as np
+import pandas as pd
+
+from id_dictionary import IdDictionary, new_id_dictionaries
+from numerical import RunningStats, top_k_indices
+from od_matrix import ODMatrix
+from utils import DAY_NAMES
+
+LONGEST_TRIP_COLUMNS = [
+    "user_id", "bike_type", "start_time", "end_time", "duration_minutes", "distance_km",
+]
+
+
+def as_str_index(counts: pd.Series) -> pd.Series:
+    """Replace categorical index levels by plain strings.
+
+    Each chunk has its own category set, so counts are keyed by the label
+    itself to align across chunks.  Only the (small) group index is
+    converted, never the rows.
+    """
+    index = counts.index
+    if isinstance(index, pd.MultiIndex):
+        counts.index = pd.MultiIndex.from_arrays(
+            [index.get_level_values(i).astype(str) for i in range(index.nlevels)],
+            names=index.names,
+        )
+    else:
+        counts.index = index.astype(str)
+    return counts
+
+
+def _add_codes(total: np.ndarray, codes: np.ndarray, weights: np.ndarray | None, size: int) -> np.ndarray:
+    """Add per-code counts to *total*, growing it to *size* codes."""
+    counts = np.bincount(codes, weights=weights, minlength=size).astype(np.int64)
+    counts[: len(total)] += total
+    return counts
+
+
+def _add(total: pd.Series, part: pd.Series) -> pd.Series:
+    """Add two aligned count/sum Series, treating missing keys as zero."""
+    if total.empty:
+        return part
+    if part.empty:
+        return total
+    return total.add(part, fill_value=0).astype(total.dtype)
+
+
+class TripAggregates:
+    """Running aggregates over cleaned trip records.
+
+    Attributes:
+        n_trips: Number of trips seen.
+        total_distance: Sum of distance_km.
+        total_duration: Sum of duration_minutes.
+        duration_stats: Mean, std, min and max of duration_minutes.
+        hour_counts: Trip count per start hour (length 24).
+        weekday_counts: Trip count per start weekday, Monday = 0 (length 7).
+        month_counts: Trip count per start month (Period("M") ordinal index).
+        user_type_counts: Trip count per user type.
+        user_type_distance: Sum of distance_km per user type.
+        status_counts: Trip count per status.
+        user_counts: Trip count per user code of ids["user"].
+        routes: Origin–destination matrix of trip counts.
+        longest: The *n_longest* longest trips seen so far.
+        ids: Id dictionaries the user codes refer to (see id_dictionary).
+    """
+
+    def __init__(
+        self, n_longest: int = 10, ids: dict[str, IdDictionary] | None = None
+    ) -> None:
+        self.n_longest = n_longest
+        self.ids = ids if ids is not None else new_id_dictionaries()
+        self.n_trips = 0
+        self.total_distance = 0.0
+        self.total_duration = 0.0
+        self.duration_stats = RunningStats()
+        self.hour_counts = np.zeros(24, dtype=np.int64)
+        self.weekday_counts = np.zeros(7, dtype=np.int64)
+        self.month_counts = pd.Series(dtype="int64")
+        self.user_type_counts = pd.Series(dtype="int64")
+        self.user_type_distance = pd.Series(dtype="float64")
+        self.status_counts = pd.Series(dtype="int64")
+        self.user_counts = np.zeros(0, dtype=np.int64)
+        self.routes = ODMatrix(pd.Index([]), dense=np.zeros((0, 0), dtype=np.int64))
+        self.longest = pd.DataFrame(columns=LONGEST_TRIP_COLUMNS)
+
+    # ------------------------------------------------------------------
+    # Accumulation
+    # ------------------------------------------------------------------
+
+    def update(self, trips: pd.DataFrame) -> "TripAggregates":
+        """Fold a chunk of cleaned trips into the aggregates.
+
+        *trips* must carry the derived hour/weekday/month_ordinal columns
+        added by analyzer.clean_trips().
+        """
+        if trips.empty:
+            return self
+
+        self.n_trips += len(trips)
+        self.total_distance += float(trips["distance_km"].astype("float64").sum())
+        self.total_duration += float(trips["duration_minutes"].astype("float64").sum())
+        self.duration_stats.update(trips["duration_minutes"].to_numpy())
+        self.hour_counts += np.bincount(trips["hour"].to_numpy(), minlength=24)
+        self.weekday_counts += np.bincount(trips["weekday"].to_numpy(), minlength=7)
+        self.month_counts = _add(self.month_counts, trips["month_ordinal"].value_counts())
+
+        by_user_type = trips.groupby("user_type", observed=True)["distance_km"]
+        self.user_type_counts = _add(self.user_type_counts, as_str_index(by_user_type.size()))
+        self.user_type_distance = _add(
+            self.user_type_distance,
+            as_str_index(by_user_type.sum().astype("float64")),
+        )
+        self.status_counts = _add(
+            self.status_counts,
+            as_str_index(trips.groupby("status", observed=True).size()),
+        )
+        users = self.ids["user"]
+        codes = users.encode(trips["user_id"])
+        self.user_counts = _add_codes(self.user_counts, codes[codes >= 0], None, len(users))
+        self.routes = self.routes.merge(ODMatrix.from_trips(trips))
+        longest = top_k_indices(trips["duration_minutes"].to_numpy(), self.n_longest)
+        self._keep_longest(trips.iloc[longest])
+        return self
+
+    def merge(self, other: "TripAggregates") -> "TripAggregates":
+        """Fold the aggregates of *other* (e.g. another chunk or worker) in."""
+        self.n_trips += other.n_trips
+        self.total_distance += other.total_distance
+        self.total_duration += other.total_duration
+        self.duration_stats.merge(other.duration_stats)
+        self.hour_counts += other.hour_counts
+        self.weekday_counts += other.weekday_counts
+        self.month_counts = _add(self.month_counts, other.month_counts)
+        self.user_type_counts = _add(self.user_type_counts, other.user_type_counts)
+        self.user_type_distance = _add(self.user_type_distance, other.user_type_distance)
+        self.status_counts = _add(self.status_counts, other.status_counts)
+        lut = self.ids["user"].remap(other.ids["user"])
+        self.user_counts = _add_codes(
+            self.user_counts, lut[: len(other.user_counts)], other.user_counts, len(self.ids["user"])
+        )
+        self.routes = self.routes.merge(other.routes)
+        self._keep_longest(other.longest)
+        return self
+
+    def _keep_longest(self, candidates: pd.DataFrame) -> None:
+        # only the few candidate rows are projected and converted
+        candidates = candidates[LONGEST_TRIP_COLUMNS].astype(
+            {"user_id": str, "bike_type": str, "duration_minutes": "float64", "distance_km": "float64"}
+        )
+        if self.longest.empty:
+            merged = candidates
+        else:
+            merged = pd.concat([self.longest, candidates], ignore_index=True)
+        keep = top_k_indices(merged["duration_minutes"].to_numpy(), self.n_longest)
+        self.longest = merged.iloc[keep].reset_index(drop=True)
+
+    # ------------------------------------------------------------------
+    # Results (same shapes as the BikeShareSystem analytics methods)
+    # ------------------------------------------------------------------
+
+    def total_trips_summary(self) -> dict:
+        avg = self.total_duration / self.n_trips if self.n_trips else float("nan")
+        return {
+            "total_trips": self.n_trips,
+            "total_distance_km": round(self.total_distance, 2),
+            "avg_duration_min": round(avg, 2),
+        }
+
+    def peak_usage_hours(self) -> pd.Series:
+        counts = pd.Series(self.hour_counts, index=pd.RangeIndex(24, name="hour"), name="count")
+        return counts[counts > 0]
+
+    def busiest_day_of_week(self) -> pd.Series:
+        counts = pd.Series(self.weekday_counts, index=pd.Index(DAY_NAMES, name="day_name"), name="count")
+        return counts[counts > 0].sort_values(ascending=False, kind="stable")
+
+    def avg_distance_by_user_type(self) -> pd.Series:
+        avg = (self.user_type_distance / self.user_type_counts).round(2)
+        return avg.rename_axis("user_type").rename("distance_km")
+
+    def monthly_trip_trend(self) -> pd.Series:
+        trend = self.month_counts.sort_index().rename("count")
+        trend.index = pd.PeriodIndex.from_ordinals(trend.index, freq="M", name="year_month")
+        return trend
+
+    def user_trip_counts(self) -> pd.Series:
+        """Trip count per user_id (users with at least one trip)."""
+        users = np.flatnonzero(self.user_counts)
+        return pd.Series(
+            self.user_counts[users],
+            index=pd.Index(self.ids["user"].decode(users), name="user_id"),
+            name="trip_count",
+        )
+
+    def top_active_users(self, n: int = 15) -> pd.DataFrame:
+        # only the n selected codes are decoded; ties go to the lower code
+        top = top_k_indices(self.user_counts, n)
+        top = top[self.user_counts[top] > 0]
+        return pd.DataFrame({
+            "user_id": self.ids["user"].decode(top),
+            "trip_count": self.user_counts[top],
+        })
+
+    def top_routes(self, n: int = 10) -> pd.DataFrame:
+        return self.routes.top_routes(n)
+
+    def user_type_distribution(self) -> pd.Series:
+        return self.user_type_counts.sort_values(ascending=False).rename_axis("user_type").rename("count")
+
+    def status_distribution(self) -> pd.Series:
+        return self.status_counts.sort_values(ascending=False).rename_axis("status").rename("count")
+
+    def longest_trips(self, n: int = 10) -> pd.DataFrame:
+        if n > self.n_longest:
+            raise ValueError(f"only the {self.n_longest} longest trips are kept, got n={n}")
+        return self.longest.head(n).round({"duration_minutes": 2, "distance_km": 2})
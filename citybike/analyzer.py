@@ -9,13 +9,412 @@ Contains the BikeShareSystem class that orchestrates:
 Students should implement the cleaning logic and at least 10 analytics methods.
 """
 
+import csv
+import functools
+import glob
+import hashlib
+import inspect
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from pandas.api.types import union_categoricals
+
+from aggregates import TripAggregates
+from billing import Billing, FareCaps
+from cube import TripCube
+from fares import FareEngine, TripFares
+from id_dictionary import encode_id_columns, new_id_dictionaries
+from numerical import detect_outliers_grouped, haversine_km, time_codes, top_k_indices
+from od_matrix import ODMatrix
+from sketches import TripSketches
+from spatial import StationIndex
+from tariff import TariffTables
+from time_index import TimeIndex
+from utils import DATE_FORMAT, DATETIME_FORMAT
 
 
 DATA_DIR = Path(__file__).resolve().parent / "data"
 OUTPUT_DIR = Path(__file__).resolve().parent / "output"
+CACHE_DIR = DATA_DIR / "cache"
+
+SOURCE_FILES = ("trips.csv", "stations.csv", "maintenance.csv")
+# Bump whenever the schemas or the cleaning steps change, so that caches
+# written by an older version are never mistaken for current ones.
+CACHE_VERSION = "3"
+# Names of the entries _write_cache() creates: a source fingerprint, or a
+# half-written one.
+CACHE_ENTRY = re.compile(r"[0-9a-f]{64}(\.tmp)?")
+
+
+# ---------------------------------------------------------------------------
+# CSV schemas
+# ---------------------------------------------------------------------------
+# Declaring dtypes up front lets read_csv skip type inference.  Low-cardinality
+# labels and ids become categoricals (one small int code per row instead of a
+# Python string), measurements that only need ~3 decimals become float32.
+# Coordinates and money stay float64 — float32 would cost ~1 m of precision
+# on a latitude and rounding drift on large cost sums.
+
+TRIPS_DTYPES = {
+    "trip_id": "str",
+    "user_id": "category",
+    "user_type": "category",
+    "bike_id": "category",
+    "bike_type": "category",
+    "start_station_id": "category",
+    "end_station_id": "category",
+    "duration_minutes": "float32",
+    "distance_km": "float32",
+    "status": "category",
+}
+TRIPS_DATETIME_COLUMNS = ["start_time", "end_time"]
+# Added by clean_trips() from start_time; not part of the CSV exports.
+TRIPS_DERIVED_COLUMNS = ["hour", "weekday", "month_ordinal"]
+
+STATIONS_DTYPES = {
+    "station_id": "str",
+    "station_name": "str",
+    "capacity": "int16",
+    "latitude": "float64",
+    "longitude": "float64",
+}
+
+MAINTENANCE_DTYPES = {
+    "record_id": "str",
+    "bike_id": "category",
+    "bike_type": "category",
+    "maintenance_type": "category",
+    "cost": "float64",
+    "description": "str",
+}
+MAINTENANCE_DATE_COLUMNS = ["date"]
+
+
+def _read_csv(
+    path: Path,
+    dtypes: dict[str, str],
+    date_columns: list[str] | None = None,
+    date_format: str = DATETIME_FORMAT,
+    chunksize: int | None = None,
+):
+    """Read *path* with a declared schema and fixed-format date parsing.
+
+    Only the declared columns are read.  Dates that do not match
+    *date_format* are left as strings and coerced later in clean_data().
+    Whole files go through the multi-threaded pyarrow parser; with
+    *chunksize* (which pyarrow does not support) the C parser returns an
+    iterator of DataFrames, with numeric columns left for clean_trips()
+    to coerce.
+
+    If a numeric column holds non-numeric text, the file is re-read with
+    those columns as strings and they are coerced (invalid → NaN).
+    """
+    date_columns = date_columns or []
+    numeric = [c for c, t in dtypes.items() if t.startswith(("float", "int"))]
+    # pyarrow returns columns in usecols order, so list them in the file's
+    # order (read from the header line alone) rather than reordering after.
+    wanted = set(dtypes) | set(date_columns)
+    with open(path, newline="") as fh:
+        header = next(csv.reader(fh), [])
+    kwargs = dict(
+        usecols=[c for c in header if c in wanted] or list(dtypes) + date_columns,
+        parse_dates=date_columns,
+        date_format=date_format,
+    )
+    if chunksize is not None:
+        # One bad value deep into a huge file must not abort the stream.
+        lenient = {**dtypes, **{c: "str" for c in numeric}}
+        return pd.read_csv(path, dtype=lenient, engine="c", chunksize=chunksize, **kwargs)
+
+    try:
+        df = pd.read_csv(path, dtype=dtypes, engine="pyarrow", **kwargs)
+    except ValueError:
+        df = pd.read_csv(path, dtype={**dtypes, **{c: "str" for c in numeric}}, engine="pyarrow", **kwargs)
+        for col in numeric:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+            if dtypes[col].startswith("float"):
+                df[col] = df[col].astype(dtypes[col])
+
+    # pyarrow hands back the categorical codes as read-only Arrow buffers
+    # that would reject assignments (the other columns are converted into
+    # fresh, writable blocks).  Copy just those small code arrays, one
+    # column at a time, instead of the whole frame.
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].copy()
+    return df
+
+
+def _normalize_labels(col: pd.Series, fill: str | None = None) -> pd.Series:
+    """Lower-case and strip a categorical column on its category set.
+
+    The string work runs once per distinct label rather than once per row;
+    labels that collapse to the same value (e.g. "Member" / " member")
+    are merged into a single category.  Per row there is a single gather
+    of the integer codes, which also fills missing values.
+
+    Args:
+        col: A categorical Series (other dtypes are converted first).
+        fill: Optional label used for missing values.
+
+    Returns:
+        A categorical Series with normalised categories.
+    """
+    if not isinstance(col.dtype, pd.CategoricalDtype):
+        col = col.astype("category")
+
+    labels = list(col.cat.categories.str.lower().str.strip())
+    if fill is not None:
+        labels.append(fill)
+    categories, remap = np.unique(np.asarray(labels, dtype=object), return_inverse=True)
+
+    # Lookup table indexed by the old code; code -1 (missing) reads the
+    # last entry, which is the fill label's code or -1 to stay missing.
+    lut = np.append(remap[: len(col.cat.categories)], remap[-1] if fill is not None else -1)
+    new_codes = lut[col.cat.codes.to_numpy()]
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, categories=categories),
+        index=col.index,
+        name=col.name,
+    )
+
+
+def cached_result(method: Callable) -> Callable:
+    """Memoise an analytics method on its arguments and the data version.
+
+    Results live in the instance's LRU cache (see BikeShareSystem) and are
+    dropped whenever load_data(), load_cached(), clean_data() or
+    invalidate() bump the data version.  Cached DataFrames/Series are
+    returned as-is — callers must not modify them in place.  Arguments
+    are part of the key, so only methods taking immutable values (numbers,
+    strings, timestamps) should be memoised.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__, tuple(bound.arguments.items())[1:], self._data_version)
+
+        cache = self._result_cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+        result = method(self, *args, **kwargs)
+        cache[key] = result
+        if len(cache) > self.result_cache_size:
+            cache.popitem(last=False)
+        return result
+
+    return wrapper
+
+
+# Report plan: (heading, analytics method, keyword arguments), in output order.
+REPORT_SECTIONS = [
+    ("Peak Usage Hours (Trips per Hour)", "peak_usage_hours", {}),
+    ("Maintenance Cost by Bike Type", "maintenance_cost_by_bike_type", {}),
+    ("Trips per Day of Week", "busiest_day_of_week", {}),
+    ("Avg Distance by User Type (km)", "avg_distance_by_user_type", {}),
+    ("Monthly Trip Trend", "monthly_trip_trend", {}),
+    ("Top Active Users", "top_active_users", {}),
+    ("Top Routes (Start -> End)", "top_routes", {}),
+    ("Trips by User Type", "user_type_distribution", {}),
+    ("Trips by Status", "status_distribution", {}),
+    ("Longest Trips", "longest_trips", {}),
+]
+
+
+def source_fingerprint(data_dir: Path = DATA_DIR) -> str:
+    """Return a SHA-256 hex digest over the raw source CSV files.
+
+    The digest also covers CACHE_VERSION, so changing the cleaning code
+    invalidates existing caches even when the data is unchanged.
+    """
+    digest = hashlib.sha256(f"citybike-cache-v{CACHE_VERSION}".encode())
+    for filename in SOURCE_FILES:
+        digest.update(filename.encode())
+        with open(data_dir / filename, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def clean_trips(
+    trips: pd.DataFrame,
+    fill_values: dict[str, float] | None = None,
+    keep: np.ndarray | None = None,
+) -> pd.DataFrame:
+    """Apply cleaning steps 2–6 of BikeShareSystem.clean_data() to *trips*.
+
+    Works on a whole frame or on a single chunk of one.  Columns are
+    converted in place on *trips*, and every row filter (duplicates from
+    step 1, invalid times from step 5) is fused into one mask that is
+    applied once at the end — or not at all when every row is kept.
+
+    Args:
+        trips: Raw trip records.
+        fill_values: Values used to impute missing duration_minutes and
+            distance_km.  Defaults to the means over the kept rows.
+        keep: Optional boolean mask of rows that survived deduplication.
+
+    Returns:
+        The cleaned DataFrame.
+    """
+    # --- Step 2: Parse dates ---
+    # Already parsed by load_data() with the fixed format in the common
+    # case; only re-parse columns that are still strings.
+    for col in ("start_time", "end_time"):
+        if not pd.api.types.is_datetime64_any_dtype(trips[col]):
+            trips[col] = pd.to_datetime(trips[col], format=DATETIME_FORMAT, errors="coerce")
+            #coerce : any invalid dates to NaT (Not a Time).
+
+    # --- Step 3: Convert numeric columns ---
+    for col in ("duration_minutes", "distance_km"):
+        if trips[col].dtype != TRIPS_DTYPES[col]:
+            trips[col] = pd.to_numeric(trips[col], errors="coerce").astype(TRIPS_DTYPES[col])
+
+    # --- Step 5 (mask only): Remove invalid entries ---
+    # NaT compares False, so rows with unparseable times are dropped too.
+    start = trips["start_time"].to_numpy()
+    valid = trips["end_time"].to_numpy() >= start
+    if keep is not None:
+        valid &= keep
+
+    # --- Step 4: Handle missing values ---
+    # Strategy: impute the column mean over the deduplicated rows.  Chunked
+    # callers pass means computed over the whole file so every chunk is
+    # filled alike.
+    if fill_values is None:
+        rows = slice(None) if keep is None else keep
+        fill_values = {
+            col: float(np.nanmean(trips[col].to_numpy()[rows], dtype=np.float64))
+            for col in ("duration_minutes", "distance_km")
+        }
+    trips.fillna(fill_values, inplace=True)
+
+    # --- Step 6: Standardize categoricals ---
+    # Missing statuses become "unknown" (filled here, on the category set).
+    trips["status"] = _normalize_labels(trips["status"], fill="unknown")
+    trips["user_type"] = _normalize_labels(trips["user_type"])
+
+    # --- Derived time columns (shared by all analytics methods) ---
+    # hour/weekday are uint8, month_ordinal is an int16 Period("M") ordinal.
+    # Codes for rows about to be dropped (NaT) are meaningless but harmless.
+    hour, weekday, month_ordinal = time_codes(start)
+    trips["hour"] = hour
+    trips["weekday"] = weekday
+    trips["month_ordinal"] = month_ordinal
+
+    # --- Step 5 (apply): one row filter for all steps ---
+    if not valid.all():
+        trips = trips[valid]
+
+    return trips
+
+
+def concat_trips(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate trip frames, keeping categorical columns categorical.
+
+    Plain pd.concat turns categoricals with different category sets into
+    object columns; here the category sets are unioned (new labels are
+    appended, so the codes of the first frame stay valid).
+    """
+    first = frames[0]
+    columns = {}
+    for col in first.columns:
+        parts = [frame[col] for frame in frames]
+        if isinstance(first[col].dtype, pd.CategoricalDtype):
+            parts = [part.astype("category") for part in parts]
+            columns[col] = pd.Series(union_categoricals(parts, ignore_order=True), name=col)
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def _hash_ids(ids: pd.Series) -> np.ndarray:
+    """Hash ids to uint64 (the representation stored by SeenIds)."""
+    return pd.util.hash_pandas_object(ids, index=False).to_numpy()
+
+
+class SeenIds:
+    """Compact set of already-seen ids for deduplicating across chunks.
+
+    Ids are stored as 64-bit hashes (8 bytes each) in a few sorted NumPy
+    runs.  New ids form a fresh run and runs of similar size are merged,
+    so inserting N ids costs O(N log N) overall and a lookup is one binary
+    search per run.  Distinct ids collide with probability ~N²/2⁶⁵
+    (about 3e-4 at 100M ids), in which case the later trip is dropped.
+    """
+
+    def __init__(self) -> None:
+        self._runs: list[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self._runs)
+
+    def _contains(self, hashes: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            pos = np.minimum(np.searchsorted(run, hashes), len(run) - 1)
+            found |= run[pos] == hashes
+        return found
+
+    def add_new(self, ids: pd.Series) -> np.ndarray:
+        """Record *ids* and return a mask of those not seen before.
+
+        Within *ids* only the first occurrence of a value counts as new.
+        """
+        return self.add_new_hashes(_hash_ids(ids))
+
+    def add_new_hashes(self, hashes: np.ndarray) -> np.ndarray:
+        """Like add_new(), for ids already hashed with _hash_ids()."""
+        new = ~pd.Series(hashes).duplicated().to_numpy() & ~self._contains(hashes)
+
+        if new.any():
+            self._runs.append(np.sort(hashes[new]))
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            last = self._runs.pop()
+            self._runs[-1] = np.sort(np.concatenate([self._runs[-1], last]))
+        return new
+
+
+# ---------------------------------------------------------------------------
+# Partitioned trip files (process-pool workers)
+# ---------------------------------------------------------------------------
+# Module-level so they can be pickled into worker processes.
+
+def _scan_partition(path: Path) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Phase 1: trip_id hashes and the two imputable columns of *path*."""
+    columns = {c: TRIPS_DTYPES[c] for c in ("trip_id", "duration_minutes", "distance_km")}
+    df = _read_csv(path, columns)
+    return (
+        _hash_ids(df["trip_id"]),
+        pd.to_numeric(df["duration_minutes"], errors="coerce").to_numpy(np.float64),
+        pd.to_numeric(df["distance_km"], errors="coerce").to_numpy(np.float64),
+    )
+
+
+def _aggregate_partition(
+    path: Path, fill_values: dict[str, float], keep: np.ndarray
+) -> tuple[TripAggregates, TripCube]:
+    """Phase 2: clean one partition and reduce it to TripAggregates and a TripCube."""
+    trips = clean_trips(_read_csv(path, TRIPS_DTYPES, TRIPS_DATETIME_COLUMNS), fill_values, keep=keep)
+    return TripAggregates().update(trips), TripCube.from_trips(trips)
+
+
+def _partition_paths(partitions: str | Path) -> list[Path]:
+    """Expand a directory (its *.csv files) or a glob pattern, sorted."""
+    if Path(partitions).is_dir():
+        return sorted(Path(partitions).glob("*.csv"))
+    return sorted(Path(p) for p in glob.glob(str(partitions)))
 
 
 class BikeShareSystem:
@@ -25,12 +424,56 @@ class BikeShareSystem:
         trips: DataFrame of trip records.
         stations: DataFrame of station metadata.
         maintenance: DataFrame of maintenance records.
+        cache_dir: Where cleaned frames are cached as Parquet (None disables).
+        result_cache_size: Maximum number of memoised analytics results.
+        ids: Id dictionaries (station, bike, user) shared by the id columns
+            of every frame, so they carry the same int32 codes.
     """
     # loads, cleans, inspects, analyzes bike-share data and generates reports
-    def __init__(self) -> None:
+    def __init__(
+        self, cache_dir: Path | None = CACHE_DIR, result_cache_size: int = 128
+    ) -> None:
         self.trips: pd.DataFrame | None = None
         self.stations: pd.DataFrame | None = None
         self.maintenance: pd.DataFrame | None = None
+        self.cache_dir = cache_dir
+        self.result_cache_size = result_cache_size
+        self._data_version = 0
+        self._result_cache: OrderedDict = OrderedDict()
+        self._aggregates: TripAggregates | None = None
+        self._aggregates_version = -1
+        self._trip_ids: SeenIds | None = None
+        self._time_index: TimeIndex | None = None
+        self._time_index_version = -1
+        self._cube: TripCube | None = None
+        self._cube_version = -1
+        self._station_index: StationIndex | None = None
+        self._station_index_version = -1
+        self._cache_key: Path | None = None
+        # set by aggregate_partitions(): only aggregates, no trips, are loaded
+        self._partitions: list[Path] | None = None
+        self.ids = new_id_dictionaries()
+
+    def invalidate(self) -> None:
+        """Drop memoised results after the DataFrames changed.
+
+        load_data(), load_cached() and clean_data() call this themselves;
+        call it after modifying trips/stations/maintenance directly.
+        """
+        self._data_version += 1
+        self._result_cache.clear()
+        self._trip_ids = None
+
+    def _require_trips(self) -> pd.DataFrame:
+        """Return self.trips, or raise if no trip-level data is loaded."""
+        if self.trips is None:
+            if self._partitions is not None:
+                raise RuntimeError(
+                    "Only aggregates of trip partitions are loaded; "
+                    "call load_data() or load_cached() for trip-level queries"
+                )
+            raise RuntimeError("Call load_data() first")
+        return self.trips
 
     # ------------------------------------------------------------------
     # Data loading
@@ -38,14 +481,314 @@ class BikeShareSystem:
 
     def load_data(self) -> None:
         """Load raw CSV files into DataFrames."""
-        self.trips = pd.read_csv(DATA_DIR / "trips.csv")
-        self.stations = pd.read_csv(DATA_DIR / "stations.csv")
-        self.maintenance = pd.read_csv(DATA_DIR / "maintenance.csv")
+        self.trips = _read_csv(DATA_DIR / "trips.csv", TRIPS_DTYPES, TRIPS_DATETIME_COLUMNS)
+        self.stations = _read_csv(DATA_DIR / "stations.csv", STATIONS_DTYPES)
+        self.maintenance = _read_csv(
+            DATA_DIR / "maintenance.csv",
+            MAINTENANCE_DTYPES,
+            MAINTENANCE_DATE_COLUMNS,
+            date_format=DATE_FORMAT,
+        )
+        self._encode_ids()
+
+        self.invalidate()
+        self._cache_key = None
+        self._partitions = None
 
         print(f"Loaded trips: {self.trips.shape}")
         print(f"Loaded stations: {self.stations.shape}")
         print(f"Loaded maintenance: {self.maintenance.shape}")
 
+    def _encode_ids(self) -> None:
+        """Recode the id columns of all frames with the shared dictionaries.
+
+        Stations go first, so station codes follow stations.csv order.
+        """
+        for df in (self.stations, self.trips, self.maintenance):
+            encode_id_columns(df, self.ids)
+
+    # ------------------------------------------------------------------
+    # Streaming mode (trips larger than memory)
+    # ------------------------------------------------------------------
+
+    def _streaming_fill_values(self, chunksize: int) -> dict[str, float]:
+        """First pass: means of the numeric columns over distinct trips.
+
+        Reads only trip_id and the two numeric columns, so the imputed
+        values match those clean_data() would use on the whole file.
+        """
+        seen = SeenIds()
+        sums = {"duration_minutes": 0.0, "distance_km": 0.0}
+        counts = {"duration_minutes": 0, "distance_km": 0}
+        columns = {c: TRIPS_DTYPES[c] for c in ("trip_id", *sums)}
+        for chunk in _read_csv(DATA_DIR / "trips.csv", columns, chunksize=chunksize):
+            chunk = chunk[seen.add_new(chunk["trip_id"])]
+            for col in sums:
+                values = pd.to_numeric(chunk[col], errors="coerce")
+                sums[col] += float(values.astype("float64").sum())
+                counts[col] += int(values.count())
+        return {col: sums[col] / counts[col] if counts[col] else np.nan for col in sums}
+
+    def stream_trips(self, chunksize: int = 1_000_000) -> Iterator[pd.DataFrame]:
+        """Yield cleaned trip chunks without loading trips.csv into memory.
+
+        Each chunk goes through the same steps as clean_data(); duplicates
+        are dropped across chunks with a SeenIds set (8 bytes per trip).
+        Id columns are coded with the shared dictionaries (see self.ids),
+        so codes agree across chunks.
+        The file is read twice: once for the imputation means, once to
+        clean.  Nothing is exported or cached.
+
+        Args:
+            chunksize: Number of CSV rows per chunk.
+
+        Yields:
+            Cleaned trip DataFrames.
+        """
+        fill_values = self._streaming_fill_values(chunksize)
+        seen = SeenIds()
+        for chunk in _read_csv(
+            DATA_DIR / "trips.csv", TRIPS_DTYPES, TRIPS_DATETIME_COLUMNS, chunksize=chunksize
+        ):
+            encode_id_columns(chunk, self.ids)
+            yield clean_trips(chunk, fill_values, keep=seen.add_new(chunk["trip_id"]))
+
+    def stream_aggregates(self, chunksize: int = 1_000_000) -> TripAggregates:
+        """Compute the trip analytics chunk by chunk with bounded memory.
+
+        Returns:
+            A TripAggregates whose methods (peak_usage_hours, top_routes, …)
+            answer the same questions as this class on the full frame.
+        """
+        aggregates = TripAggregates(ids=self.ids)
+        for chunk in self.stream_trips(chunksize):
+            aggregates.update(chunk)
+        return aggregates
+
+    def stream_sketches(self, chunksize: int = 1_000_000, **options) -> TripSketches:
+        """Approximate top routes/users, distinct counts and duration percentiles.
+
+        Like stream_aggregates(), but every summary has a fixed size, so
+        memory does not grow with the number of distinct users or routes.
+
+        Args:
+            chunksize: Number of CSV rows per chunk.
+            **options: capacity, precision, relative_accuracy — see
+                TripSketches (and the error bounds in the sketches module).
+        """
+        sketches = TripSketches(**options)
+        for chunk in self.stream_trips(chunksize):
+            sketches.update(chunk)
+        return sketches
+
+    def aggregate_partitions(
+        self, partitions: str | Path, workers: int | None = None
+    ) -> TripAggregates:
+        """Clean and aggregate partitioned trip files in a process pool.
+
+        Each partition (e.g. one CSV per day) is cleaned and reduced to a
+        TripAggregates in a worker; the partial aggregates are merged here.
+        This runs in two parallel phases so the result matches cleaning
+        the concatenated files:
+            1. workers hash trip_ids and read the numeric columns; the
+               parent deduplicates across partitions (in sorted path order)
+               and computes the imputation means over distinct trips;
+            2. workers clean their partition with those masks and means.
+
+        The merged result is returned and, with the merged TripCube, also
+        backs the analytics methods (peak_usage_hours(), top_routes(), …)
+        until the data changes.  The trips themselves are not kept:
+        previously loaded frames are dropped, and trip-level methods
+        (trips_between(), trip_fares(), append_trips(), …) raise a
+        RuntimeError until load_data() or load_cached() is called.
+
+        Args:
+            partitions: Directory of CSV files, or a glob pattern.
+            workers: Number of worker processes (default: CPU count).
+
+        Returns:
+            The merged TripAggregates.
+        """
+        paths = _partition_paths(partitions)
+        if not paths:
+            raise ValueError(f"No trip partitions found for {partitions!r}")
+
+        seen = SeenIds()
+        keeps: list[np.ndarray] = []
+        sums = {"duration_minutes": 0.0, "distance_km": 0.0}
+        counts = {"duration_minutes": 0, "distance_km": 0}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # map() yields in path order, so each partition's arrays can be
+            # dropped as soon as its keep mask and sums are taken.
+            for hashes, duration, distance in pool.map(_scan_partition, paths):
+                keep = seen.add_new_hashes(hashes)
+                keeps.append(keep)
+                for col, values in (("duration_minutes", duration), ("distance_km", distance)):
+                    values = values[keep]
+                    sums[col] += float(np.nansum(values))
+                    counts[col] += int(np.count_nonzero(~np.isnan(values)))
+            del seen
+            fill_values = {c: sums[c] / counts[c] if counts[c] else np.nan for c in sums}
+
+            partials = pool.map(
+                _aggregate_partition, paths, [fill_values] * len(paths), keeps
+            )
+            aggregates = TripAggregates(ids=self.ids)
+            cubes = []
+            for partial, cube in partials:
+                aggregates.merge(partial)
+                cubes.append(cube)
+
+        # drop any loaded trips so no query mixes them with the partitions
+        self.trips = None
+        self._cache_key = None
+        self._partitions = paths
+        self.invalidate()
+        self._aggregates = aggregates
+        self._aggregates_version = self._data_version
+        self._cube = TripCube.concat(cubes)
+        self._cube_version = self._data_version
+        return aggregates
+
+    # ------------------------------------------------------------------
+    # Cleaned-data cache
+    # ------------------------------------------------------------------
+
+    def _cache_path(self) -> Path | None:
+        """Return the cache directory for the current source files."""
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / source_fingerprint(DATA_DIR)
+
+    def load_cached(self) -> bool:
+        """Load cleaned DataFrames from the Parquet cache if it is current.
+
+        The cache is keyed by a content hash of the source CSVs, so a hit
+        means load_data() and clean_data() would produce the same frames.
+
+        Returns:
+            True if the cache was used, False if the caller must load and
+            clean the raw CSVs.
+        """
+        path = self._cache_path()
+        if path is None or not path.is_dir():
+            return False
+
+        parts = [path / "trips.parquet", *sorted(path.glob("trips-append-*.parquet"))]
+        self.trips = concat_trips([pd.read_parquet(part) for part in parts])
+        # Parquet has no second resolution; restore the unit load_data() gives
+        for col in TRIPS_DATETIME_COLUMNS:
+            self.trips[col] = self.trips[col].astype("datetime64[s]")
+        self.stations = pd.read_parquet(path / "stations.parquet")
+        self.maintenance = pd.read_parquet(path / "maintenance.parquet")
+        self._encode_ids()
+        self.invalidate()
+        self._partitions = None
+        if (path / "cube.parquet").is_file():
+            self._cube = TripCube.read_parquet(path / "cube.parquet")
+            self._cube_version = self._data_version
+        self._cache_key = path
+        print(f"Loaded cleaned data from cache: {path.name[:12]}")
+        return True
+
+    def _write_cache(self) -> None:
+        """Persist the cleaned frames and drop caches of older sources."""
+        path = self._cache_path()
+        if path is None:
+            return
+
+        # Write to a temporary sibling and rename, so an interrupted run
+        # never leaves a half-written cache that load_cached() would accept.
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        self.trips.to_parquet(tmp / "trips.parquet", index=False)
+        self.stations.to_parquet(tmp / "stations.parquet", index=False)
+        self.maintenance.to_parquet(tmp / "maintenance.parquet", index=False)
+        self.cube().to_parquet(tmp / "cube.parquet")
+
+        # only evict entries this cache created (fingerprints and their .tmp
+        # siblings), so a shared cache_dir keeps unrelated files
+        for stale in self.cache_dir.iterdir():
+            if stale != tmp and CACHE_ENTRY.fullmatch(stale.name) and stale.is_dir():
+                shutil.rmtree(stale, ignore_errors=True)
+        tmp.rename(path)
+        self._cache_key = path
+
+    # ------------------------------------------------------------------
+    # Incremental ingestion
+    # ------------------------------------------------------------------
+
+    def append_trips(self, batch: str | Path | pd.DataFrame) -> int:
+        """Clean a new batch of trips and append it to the loaded data.
+
+        Only the batch is cleaned.  Trips whose trip_id is already loaded
+        (or repeated within the batch) are dropped via an index of trip ids
+        that is built once and then kept up to date.  Missing numbers are
+        imputed with the current dataset means.  If the trip aggregates,
+        cube or time index are current they are updated with the batch
+        instead of recomputed, and if the data came from (or was written
+        to) the Parquet cache, the batch is stored there as an extra part
+        and the cube is rewritten (or, if it was not current, removed so
+        that it is rebuilt on the next load).  The CSV exports are not
+        rewritten.
+
+        Args:
+            batch: Path to a CSV with the trips.csv columns, or a DataFrame.
+
+        Returns:
+            Number of trips appended.
+        """
+        if not set(TRIPS_DERIVED_COLUMNS) <= set(self._require_trips().columns):
+            raise RuntimeError("Call clean_data() first")
+
+        if isinstance(batch, pd.DataFrame):
+            batch = batch.copy()
+        else:
+            batch = _read_csv(Path(batch), TRIPS_DTYPES, TRIPS_DATETIME_COLUMNS)
+        encode_id_columns(batch, self.ids)
+
+        if self._trip_ids is None:
+            self._trip_ids = SeenIds()
+            self._trip_ids.add_new(self.trips["trip_id"])
+        keep = self._trip_ids.add_new(batch["trip_id"])
+
+        aggregates = self.aggregates()
+        fill_values = {
+            "duration_minutes": aggregates.total_duration / max(aggregates.n_trips, 1),
+            "distance_km": aggregates.total_distance / max(aggregates.n_trips, 1),
+        }
+        cleaned = clean_trips(batch, fill_values, keep=keep)
+        if cleaned.empty:
+            return 0
+
+        trip_ids = self._trip_ids
+        time_index = self._time_index if self._time_index_version == self._data_version else None
+        cube = self._cube if self._cube_version == self._data_version else None
+        self.trips = concat_trips([self.trips, cleaned])
+        self.invalidate()
+        self._trip_ids = trip_ids
+        self._aggregates = aggregates.update(cleaned)
+        self._aggregates_version = self._data_version
+        if time_index is not None:
+            self._time_index = time_index.extend(cleaned["start_time"].to_numpy())
+            self._time_index_version = self._data_version
+        if cube is not None:
+            self._cube = TripCube.concat([cube, TripCube.from_trips(cleaned)])
+            self._cube_version = self._data_version
+
+        if self._cache_key is not None and self._cache_key.is_dir():
+            n_parts = len(list(self._cache_key.glob("trips-append-*.parquet")))
+            cleaned.to_parquet(self._cache_key / f"trips-append-{n_parts:06d}.parquet", index=False)
+            if cube is not None:
+                self._cube.to_parquet(self._cache_key / "cube.parquet")
+            else:
+                # the stored cube misses the batch; load_cached() rebuilds it
+                (self._cache_key / "cube.parquet").unlink(missing_ok=True)
+
+        print(f"Appended {len(cleaned)} trips (total {len(self.trips)})")
+        return len(cleaned)
+
     # ------------------------------------------------------------------
     # Data inspection
     # ------------------------------------------------------------------
@@ -79,193 +822,357 @@ class BikeShareSystem:
             5. Remove invalid entries (e.g. end_time < start_time)
             6. Standardize categorical values
             7. Export cleaned data to data/trips_clean.csv etc.
+            8. Cache the cleaned frames (see load_cached())
 
             """
-        if self.trips is None:
-            raise RuntimeError("Call load_data() first")
+        self._require_trips()
 
         # --- Step 1: Remove duplicates ---
-        self.trips = self.trips.drop_duplicates(subset=["trip_id"])
-        # subset means we only consider the "trip_id" column for identifying duplicates
-        print(f"After dedup: {self.trips.shape[0]} trips")
-
-        # --- Step 2: Parse dates ---
-        # TODO: convert start_time, end_time to datetime
-        # self.trips["start_time"] = pd.to_datetime(...)
-        self.trips["start_time"] = pd.to_datetime(self.trips["start_time"], errors="coerce")
-        self.trips["end_time"] = pd.to_datetime(self.trips["end_time"], errors="coerce")
-        #coerce : any invalid dates to NaT (Not a Time).
-
-        # --- Step 3: Convert numeric columns ---
-        # TODO: ensure duration_minutes and distance_km are float
-        self.trips["duration_minutes"] = pd.to_numeric(self.trips["duration_minutes"], errors="coerce")
-        self.trips["distance_km"] = pd.to_numeric(self.trips["distance_km"], errors="coerce")
-
-
-        # --- Step 4: Handle missing values ---
-        # TODO: decide on a strategy and document it
-        # Example: self.trips["duration_minutes"].fillna(..., inplace=True)
-        self.trips["status"] = self.trips["status"].fillna("unknown")
-        self.trips["duration_minutes"] = self.trips["duration_minutes"].fillna(self.trips["duration_minutes"].mean())
-        self.trips["distance_km"] = self.trips["distance_km"].fillna(self.trips["distance_km"].mean())
+        # Only the mask is built here; clean_trips() applies it together with
+        # the invalid-time filter, so the frame is copied at most once.
+        first = ~self.trips["trip_id"].duplicated().to_numpy()
+        # we only consider the "trip_id" column for identifying duplicates
+        print(f"After dedup: {int(first.sum())} trips")
 
-
-        # --- Step 5: Remove invalid entries ---
-        # TODO: drop rows where end_time < start_time
-        self.trips = self.trips[self.trips["end_time"] >= self.trips["start_time"]]
-        # filter out invalid trips 
-
-
-        # --- Step 6: Standardize categoricals ---
-        # TODO: e.g. self.trips["status"].str.lower().str.strip()
-        self.trips["status"] = self.trips["status"].str.lower().str.strip()
-        self.trips["user_type"] = self.trips["user_type"].str.lower().str.strip()
+        # --- Steps 2–6: parse, convert, impute, filter, standardize ---
+        self.trips = clean_trips(self.trips, keep=first)
+        self.invalidate()
 
 
         # --- Step 7: Export cleaned datasets ---
-        self.trips.to_csv(DATA_DIR / "trips_clean.csv", index=False)
+        export_columns = [c for c in self.trips.columns if c not in TRIPS_DERIVED_COLUMNS]
+        self.trips.to_csv(DATA_DIR / "trips_clean.csv", index=False, columns=export_columns)
         self.stations.to_csv(DATA_DIR / "stations_clean.csv", index=False)
         self.maintenance.to_csv(DATA_DIR / "maintenance_clean.csv", index=False)
         # index=False: it means that the row numbers (0, 1, 2, ...) will not be included in the output CSV file.
 
+        # --- Step 8: Cache cleaned frames ---
+        self._write_cache()
+
         print("Cleaning complete.")
 
     # ------------------------------------------------------------------
     # Analytics — Business Questions
     # ------------------------------------------------------------------
 
+    def aggregates(self) -> TripAggregates:
+        """Return the trip aggregates behind the analytics methods.
+
+        The per-trip metrics (totals, users, routes, user types, statuses,
+        longest trips) are computed together in a single
+        TripAggregates.update() over self.trips, so the shared groupbys run
+        once.  The time-based metrics (hour, day of week, month, distance
+        per user type) come from cube() instead.  The result is memoised
+        until self.trips is replaced, so main() and generate_summary_report()
+        reuse the same numbers until the data version changes (see
+        invalidate()).
+        """
+        if self._aggregates is None or self._aggregates_version != self._data_version:
+            self._aggregates = TripAggregates(ids=self.ids).update(self._require_trips())
+            self._aggregates_version = self._data_version
+        return self._aggregates
+
+    def cube(self) -> TripCube:
+        """Return the station × date × hour × user type × bike type cube.
+
+        Built once from self.trips (one groupby) and kept until the data
+        changes; clean_data() persists it with the Parquet cache, so after
+        load_cached() the time-based analytics below never scan the trips.
+        Use cube().rollup() for other slices, e.g. trips per station and
+        hour for members only.
+        """
+        if self._cube is None or self._cube_version != self._data_version:
+            self._cube = TripCube.from_trips(self._require_trips())
+            self._cube_version = self._data_version
+        return self._cube
+
+    @cached_result
     def total_trips_summary(self):
         """Q1: Total trips, total distance, average duration.
 
         Returns:
             Dict with 'total_trips', 'total_distance_km', 'avg_duration_min'.
         """
-        df = self.trips
-        return {
-            "total_trips": len(df),
-            "total_distance_km": round(df["distance_km"].sum(), 2),
-                #rounding to 2 decimal places for better readability
-            "avg_duration_min": round(df["duration_minutes"].mean(), 2),
-        }
+        return self.aggregates().total_trips_summary()
 
 
 
+    @cached_result
     def peak_usage_hours(self):
-        """Q3: Trip count by hour of day.
-
-        TODO: extract hour from start_time and count trips per hour.
-        """
-        df = self.trips.copy()
-        df["hour"] = df["start_time"].dt.hour
-        #.hour means we are extracting the hour from the start_time
-        return df["hour"].value_counts().sort_index()
+        """Q3: Trip count by hour of day."""
+        return self.cube().peak_usage_hours()
     
 
 
+    @cached_result
     def busiest_day_of_week(self) -> pd.Series:
-        """Q4: Trip count by day of week.
-
-        TODO: extract day-of-week from start_time, count.
-        """
-        df = self.trips.copy()
-
-        df["day_name"] = df["start_time"].dt.day_name()
-
-        return df["day_name"].value_counts()
+        """Q4: Trip count by day of week (busiest first)."""
+        return self.cube().busiest_day_of_week()
     
 
+    @cached_result
     def avg_distance_by_user_type(self) -> pd.Series:
         """Q5: Average trip distance grouped by user type."""
-        return self.trips.groupby("user_type")["distance_km"].mean().round(2)
+        return self.cube().avg_distance_by_user_type()
 
 
+    @cached_result
     def monthly_trip_trend(self):
-        """Q7: Monthly trip counts over time.
-
-        TODO: extract year-month from start_time, group, count.
-        """
-        df = self.trips.copy()
-
-        df["year_month"] = df["start_time"].dt.to_period("M")
-
-        trend = df["year_month"].value_counts().sort_index()
-
-        return trend
-    #to_period means we are converting the start_time to a monthly period
+        """Q7: Monthly trip counts over time."""
+        return self.cube().monthly_trip_trend()
 
 
+    @cached_result
     def top_active_users(self, n: int = 15):
-        """Q8: Top *n* most active users by trip count.
-
-        TODO: group by user_id, count trips, sort descending.
-        """
-        df = self.trips.copy()
-
-        counts = (
-            df.groupby("user_id")
-            .size()
-            #size means we are counting trips(rows) per group (user_id)
-            .reset_index(name="trip_count")
-            #.reset_index(name="trip_count") means we are converting the Series that comes from groupby back to a DataFrame
-            .sort_values("trip_count", ascending=False)
-            .head(n)
-        )
-
-        return counts
+        """Q8: Top *n* most active users by trip count."""
+        return self.aggregates().top_active_users(n)
     
 
 
+    @cached_result
     def maintenance_cost_by_bike_type(self):
         """Q9: Total maintenance cost per bike type.
 
         TODO: group maintenance by bike_type, sum cost.
         """
-        df = self.maintenance.copy()
+        df = self.maintenance
 
         # df["cost"] = pd.to_numeric(df["cost"], errors="coerce")
         #pd.to_numeric(...) means we are converting the cost column to numeric, forcing errors to NaN
         #errors='coerce' means that any non-numeric values will be replaced with NaN
 
-        result = df.groupby("bike_type")["cost"].sum().round(2)
+        result = df.groupby("bike_type", observed=True)["cost"].sum().round(2)
 
         return result
     
 
 
+    @cached_result
     def top_routes(self, n: int = 10):
-        """Q10: Most common start→end station pairs.
+        """Q10: Most common start→end station pairs."""
+        return self.aggregates().top_routes(n)
+
+    def od_matrix(self) -> ODMatrix:
+        """Origin–destination matrix of trip counts (built with aggregates()).
 
-        TODO: group by (start_station_id, end_station_id), count, sort.
+        Use it for route queries beyond top_routes(): route_counts(),
+        inflow(), outflow() and net_flow() per station.
         """
-        df = self.trips.copy()
-
-        routes = (
-            df.groupby(["start_station_id", "end_station_id"])
-            .size()
-            .reset_index(name="trip_count")
-            .sort_values("trip_count", ascending=False)
-            .head(n)
-        )
+        return self.aggregates().routes
 
-        return routes
+    # ------------------------------------------------------------------
+    # Time-range queries
+    # ------------------------------------------------------------------
+
+    def time_index(self) -> TimeIndex:
+        """Return the sorted start_time index of self.trips.
+
+        Built once (one stable argsort, skipped when the trips are already
+        in time order) and kept until the data changes; append_trips()
+        extends it instead of re-sorting.
+        """
+        if self._time_index is None or self._time_index_version != self._data_version:
+            self._time_index = TimeIndex.from_times(self._require_trips()["start_time"].to_numpy())
+            self._time_index_version = self._data_version
+        return self._time_index
+
+    def trips_between(self, start=None, end=None) -> pd.DataFrame:
+        """Trips with start <= start_time < end, in start_time order.
+
+        Two binary searches on time_index() locate the window, so only the
+        matching rows are touched.
+
+        Args:
+            start: Inclusive lower bound, e.g. "2024-03-05 07:00"; None for
+                the earliest trip.
+            end: Exclusive upper bound; None for the latest trip.
+        """
+        return self._require_trips().iloc[self.time_index().positions(start, end)]
+
+    @cached_result
+    def analytics_for_window(self, start=None, end=None) -> TripAggregates:
+        """Trip aggregates of the window [start, end).
+
+        The returned TripAggregates answers the same questions as the
+        analytics methods (peak_usage_hours(), top_routes(), …) for the
+        trips started in the window.  Memoised like the analytics methods.
+        """
+        return TripAggregates(ids=self.ids).update(self.trips_between(start, end))
+
+    # ------------------------------------------------------------------
+    # Distance checks
+    # ------------------------------------------------------------------
+
+    @cached_result
+    def trip_straight_line_km(self) -> pd.Series:
+        """Great-circle distance (km) between each trip's start and end station.
+
+        Station coordinates are looked up by station code (see self.ids), so
+        this is one gather plus one haversine_km() pass over all trips.
+        Trips whose station is not in stations get NaN.
+        """
+        trips = self._require_trips()
+        stations = self.ids["station"]
+        start = stations.encode(trips["start_station_id"])
+        end = stations.encode(trips["end_station_id"])
+        known = stations.encode(self.stations["station_id"])
+
+        # indexed by station code; code -1 (unknown) reads the trailing NaN
+        lat = np.full(len(stations) + 1, np.nan)
+        lon = np.full(len(stations) + 1, np.nan)
+        lat[known] = self.stations["latitude"].to_numpy()
+        lon[known] = self.stations["longitude"].to_numpy()
+        km = haversine_km(lat[start], lon[start], lat[end], lon[end], dtype=np.float32)
+        return pd.Series(km, index=trips.index, name="straight_line_km")
+
+    @cached_result
+    def implausible_distances(
+        self, min_ratio: float = 0.95, max_ratio: float | None = None
+    ) -> pd.Series:
+        """Flag trips whose distance_km contradicts the station coordinates.
+
+        A trip is flagged when its distance is below *min_ratio* times the
+        straight line between its stations (shorter than the crow flies),
+        or — with *max_ratio* — above *max_ratio* times it.  Round trips
+        (same start and end point) are only checked against min_ratio.
+
+        Returns:
+            Boolean Series aligned with self.trips.
+        """
+        trips = self._require_trips()
+        straight = self.trip_straight_line_km().to_numpy(np.float64)
+        distance = trips["distance_km"].to_numpy(np.float64)
+        flagged = distance < min_ratio * straight
+        if max_ratio is not None:
+            flagged |= (straight > 0) & (distance > max_ratio * straight)
+        return pd.Series(flagged, index=trips.index, name="implausible_distance")
+
+    @cached_result
+    def duration_outliers(self, method: str = "mad", by: str | None = None) -> pd.Series:
+        """Flag trips with an anomalous duration_minutes.
+
+        Args:
+            method: "zscore", "mad" (median/MAD) or "iqr" — see
+                numerical.detect_outliers_grouped().
+            by: Optional trips column (e.g. "user_type", "start_station_id")
+                whose groups each get their own thresholds.
+
+        Returns:
+            Boolean Series aligned with self.trips.
+        """
+        trips = self._require_trips()
+        durations = trips["duration_minutes"].to_numpy(np.float64)
+        groups = trips[by] if by is not None else np.zeros(len(durations), dtype=np.intp)
+        flagged = detect_outliers_grouped(durations, groups, method)
+        return pd.Series(flagged, index=trips.index, name="duration_outlier")
+
+    # ------------------------------------------------------------------
+    # Spatial queries
+    # ------------------------------------------------------------------
+
+    def station_index(self) -> StationIndex:
+        """Return the grid index over station coordinates (kept until the data changes)."""
+        if self._station_index is None or self._station_index_version != self._data_version:
+            if self.stations is None:
+                raise RuntimeError("Call load_data() first")
+            self._station_index = StationIndex.from_stations(self.stations)
+            self._station_index_version = self._data_version
+        return self._station_index
+
+    def nearest_stations(self, latitudes, longitudes, k: int = 1) -> pd.DataFrame:
+        """Match a batch of points (e.g. GPS fixes) to their *k* nearest stations.
+
+        Returns:
+            DataFrame with point (position in the input), rank (0 =
+            nearest), station_id and distance_km.
+        """
+        index = self.station_index()
+        station, km = index.nearest(latitudes, longitudes, k)
+        point, rank = np.divmod(np.arange(station.size), k)
+        found = station.ravel() >= 0
+        return pd.DataFrame({
+            "point": point[found],
+            "rank": rank[found],
+            "station_id": index.ids[station.ravel()[found]],
+            "distance_km": km.ravel()[found],
+        })
+
+    def stations_within(self, latitudes, longitudes, radius_km: float) -> pd.DataFrame:
+        """All stations within *radius_km* of each point, nearest first.
+
+        Returns:
+            DataFrame with point (position in the input), station_id and
+            distance_km; points without a station in range do not appear.
+        """
+        index = self.station_index()
+        point, station, km = index.radius(latitudes, longitudes, radius_km)
+        return pd.DataFrame({"point": point, "station_id": index.ids[station], "distance_km": km})
+
+    # ------------------------------------------------------------------
+    # Pricing
+    # ------------------------------------------------------------------
+
+    def trip_fares(self, engine: FareEngine | TariffTables | None = None) -> TripFares:
+        """Price every trip in one pass (see fares.FareEngine).
+
+        Not memoised: engines and tariffs are mutable, so a result keyed
+        on one could go stale when its rates change.
+
+        Args:
+            engine: Fare engine or compiled tariff (tariff.Tariff.compile())
+                to use; the default charges casual trips the peak
+                surcharge at peak hours.
+
+        Returns:
+            TripFares with the per-trip fares and revenue roll-ups by
+            user type, station and month.
+        """
+        return (engine or FareEngine()).price(self._require_trips())
+
+    def billing(
+        self, caps: FareCaps, engine: FareEngine | TariffTables | None = None
+    ) -> Billing:
+        """Apply fare caps and day passes to the fares of trip_fares(engine).
+
+        Not memoised, like trip_fares(): FareCaps is mutable too.
+
+        Returns:
+            Billing with the charge per trip and per user-day / per user
+            statements (incl. day_pass_count).
+        """
+        return caps.bill(self._require_trips(), self.trip_fares(engine).fares.to_numpy())
 
     # ------------------------------------------------------------------
     # Add more analytics methods here
     # ------------------------------------------------------------------
 
     # Distribution of trips by user type.
+    @cached_result
     def user_type_distribution(self):
-        return self.trips["user_type"].value_counts()
+        return self.aggregates().user_type_distribution()
     
 
     # Distribution of trips by status.
+    @cached_result
     def status_distribution(self):
-        return self.trips["status"].value_counts()
+        return self.aggregates().status_distribution()
 
     # Longest trips by duration.
+    @cached_result
     def longest_trips(self, n: int = 10):
+        aggregates = self.aggregates()
+        if n <= aggregates.n_longest:
+            return aggregates.longest_trips(n)
+
+        # select the n row positions first, then project just those rows
         infos = ["user_id", "bike_type", "start_time", "end_time", "duration_minutes", "distance_km"]
-        return self.trips[infos].sort_values("duration_minutes", ascending=False).head(n)
+        trips = self._require_trips()
+        positions = top_k_indices(trips["duration_minutes"].to_numpy(), n)
+        longest = trips.iloc[positions][infos]
+        # float32 columns print as e.g. 192.300003 — widen and round for display
+        return longest.astype({"duration_minutes": "float64", "distance_km": "float64"}).round(
+            {"duration_minutes": 2, "distance_km": 2}
+        )
 
 
 
@@ -274,12 +1181,15 @@ class BikeShareSystem:
     # ------------------------ Reporting ------------------------------------------
     # ------------------------------------------------------------------
 
-    def generate_summary_report(self) -> None:
+    def generate_summary_report(self, sections: list[tuple] = REPORT_SECTIONS) -> None:
         """Write a summary text report to output/summary_report.txt.
 
-        TODO:
-            - Uncomment and complete each section below
-            - Add results from remaining analytics methods
+        Args:
+            sections: The report plan — (heading, method name, kwargs)
+                tuples, in output order.  The trip metrics come from two
+                structures built up front: aggregates() (one pass over the
+                trips) and cube() (the time-based sections); each section
+                then only formats a memoised result.
         """
     
 
@@ -288,6 +1198,12 @@ class BikeShareSystem:
         # parent=True means we are creating any necessary parent directories
         # exist_ok=True means we won't raise an error if the directory already exists
 
+        # Build both structures behind the planned trip metrics up front:
+        # aggregates() for totals, users, routes and statuses, cube() for
+        # the time-based sections (read from the Parquet cache if loaded).
+        self.aggregates()
+        self.cube()
+
         lines: list[str] = []
         lines.append("=" * 60)
         lines.append("  CityBike — Summary Report")
@@ -304,60 +1220,15 @@ class BikeShareSystem:
         lines.append(f"  Total trips       : {summary['total_trips']}")
         lines.append(f"  Total distance    : {summary['total_distance_km']} km")
         lines.append(f"  Avg duration      : {summary['avg_duration_min']} min")
-        
-        # --- Q3: Peak usage hours ---
-        # TODO: uncomment once peak_usage_hours() is implemented
-        hours = self.peak_usage_hours()
-        lines.append("\n--- Peak Usage Hours (Trips per Hour) ---")
-        lines.append(hours.to_string()) 
-
-        # --- Q9: Maintenance cost by bike type ---
-        # TODO: uncomment once maintenance_cost_by_bike_type() is implemented
-        maint_cost = self.maintenance_cost_by_bike_type()
-        lines.append("\n--- Maintenance Cost by Bike Type ---")
-        lines.append(maint_cost.to_string())
-
-        # --- Q4: Busiest day of week ---
-        days = self.busiest_day_of_week()
-        lines.append("\n--- Trips per Day of Week ---")
-        lines.append(days.to_string())
-
-        # --- Q5: Avg distance by user type ---
-        avg_dist = self.avg_distance_by_user_type()
-        lines.append("\n--- Avg Distance by User Type (km) ---")
-        lines.append(avg_dist.to_string())
-
-        # --- Q7: Monthly trip trend ---
-        monthly = self.monthly_trip_trend()
-        lines.append("\n--- Monthly Trip Trend ---")
-        lines.append(monthly.to_string())
-
-        # --- Q8: Top active users ---
-        top_users = self.top_active_users()
-        lines.append("\n--- Top Active Users ---")
-        lines.append(top_users.to_string(index=False))
-        # to_string(index=False) ensures no index is printed
-
-
-
-        # --- Q10: Top routes ---
-        routes = self.top_routes()
-        lines.append("\n--- Top Routes (Start -> End) ---")
-        lines.append(routes.to_string(index=False))
-
-        # TODO: add more sections for Q4–Q8, Q10–Q14 …
-
-        # --- User Type Distribution ---
-        lines.append("\n--- Trips by User Type ---")
-        lines.append(self.user_type_distribution().to_string())
-
-        # --- Status Distribution ---
-        lines.append("\n--- Trips by Status ---")
-        lines.append(self.status_distribution().to_string())
-
-        # --- Longest Trips ---
-        lines.append("\n--- Longest Trips ---")
-        lines.append(self.longest_trips().to_string(index=False))
+
+        for heading, method, kwargs in sections:
+            result = getattr(self, method)(**kwargs)
+            lines.append(f"\n--- {heading} ---")
+            if isinstance(result, pd.DataFrame):
+                lines.append(result.to_string(index=False))
+                # to_string(index=False) ensures no index is printed
+            else:
+                lines.append(result.to_string())
 
 
         report_text = "\n".join(lines) + "\n"
@@ -0,0 +1,141 @@
+"""
+Benchmark: original step-by-step trip cleaning vs. the fused clean_trips().
+
+Generates a synthetic trips CSV (default 10M rows, with duplicates,
+missing values, invalid times and untidy labels), then cleans it once
+with each pipeline in a fresh subprocess and reports wall time and the
+peak RSS growth during cleaning.
+
+Usage:
+    python bench_clean.py [n_rows]
+"""
+
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def make_trips_csv(path: Path, n_rows: int, seed: int = 42) -> None:
+    """Write a synthetic trips.csv with the same columns as data/trips.csv."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2024-01-01T00:00:00") + rng.integers(0, 366 * 86400, n_rows).astype(
+        "timedelta64[s]"
+    )
+    duration = rng.gamma(2.0, 12.0, n_rows).round(1)
+    end = start + (duration * 60).astype("timedelta64[s]")
+    # ~0.5 % of trips end before they start
+    bad = rng.random(n_rows) < 0.005
+    end[bad] = start[bad] - np.timedelta64(600, "s")
+
+    ids = np.arange(n_rows)
+    # ~1 % of rows repeat an earlier trip_id
+    dup = rng.random(n_rows) < 0.01
+    ids[dup] = rng.integers(0, n_rows, int(dup.sum()))
+
+    distance = rng.gamma(2.0, 3.5, n_rows).round(2)
+    duration[rng.random(n_rows) < 0.005] = np.nan
+    distance[rng.random(n_rows) < 0.005] = np.nan
+    status = rng.choice(np.array(["completed", "Completed ", "cancelled", ""], dtype=object), n_rows,
+                        p=[0.80, 0.05, 0.10, 0.05])
+    status[status == ""] = None
+
+    pd.DataFrame({
+        "trip_id": np.char.add("TR", ids.astype(str)),
+        "user_id": np.char.add("USR", rng.integers(1000, 201000, n_rows).astype(str)),
+        "user_type": rng.choice(np.array(["member", "casual", "Member "]), n_rows, p=[0.6, 0.35, 0.05]),
+        "bike_id": np.char.add("BK", rng.integers(200, 20200, n_rows).astype(str)),
+        "bike_type": rng.choice(np.array(["classic", "electric"]), n_rows),
+        "start_station_id": np.char.add("ST", rng.integers(100, 2100, n_rows).astype(str)),
+        "end_station_id": np.char.add("ST", rng.integers(100, 2100, n_rows).astype(str)),
+        "start_time": pd.to_datetime(start).strftime("%Y-%m-%d %H:%M:%S"),
+        "end_time": pd.to_datetime(end).strftime("%Y-%m-%d %H:%M:%S"),
+        "duration_minutes": duration,
+        "distance_km": distance,
+        "status": status,
+    }).to_csv(path, index=False)
+
+
+def legacy_clean(trips: pd.DataFrame) -> pd.DataFrame:
+    """The original clean_data() trip steps, one full-column pass each."""
+    trips = trips.drop_duplicates(subset=["trip_id"])
+    trips["start_time"] = pd.to_datetime(trips["start_time"], errors="coerce")
+    trips["end_time"] = pd.to_datetime(trips["end_time"], errors="coerce")
+    trips["duration_minutes"] = pd.to_numeric(trips["duration_minutes"], errors="coerce")
+    trips["distance_km"] = pd.to_numeric(trips["distance_km"], errors="coerce")
+    trips["status"] = trips["status"].fillna("unknown")
+    trips["duration_minutes"] = trips["duration_minutes"].fillna(trips["duration_minutes"].mean())
+    trips["distance_km"] = trips["distance_km"].fillna(trips["distance_km"].mean())
+    trips = trips[trips["end_time"] >= trips["start_time"]]
+    trips["status"] = trips["status"].str.lower().str.strip()
+    trips["user_type"] = trips["user_type"].str.lower().str.strip()
+    return trips
+
+
+def _proc_status_mb(field: str) -> float:
+    """Read a memory field (VmRSS, VmHWM) of this process in MB (Linux)."""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith(field + ":"):
+            return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _reset_peak_rss() -> None:
+    """Reset VmHWM to the current RSS so the next peak covers cleaning only."""
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def run_one(mode: str, path: Path) -> None:
+    """Load and clean *path* with one pipeline; print timings (child process)."""
+    from analyzer import TRIPS_DATETIME_COLUMNS, TRIPS_DTYPES, _read_csv, clean_trips
+
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        trips = pd.read_csv(path)
+    else:
+        trips = _read_csv(path, TRIPS_DTYPES, TRIPS_DATETIME_COLUMNS)
+    t1 = time.perf_counter()
+    rss_loaded = _proc_status_mb("VmRSS")
+    _reset_peak_rss()
+
+    if mode == "legacy":
+        trips = legacy_clean(trips)
+    else:
+        trips = clean_trips(trips, keep=~trips["trip_id"].duplicated().to_numpy())
+    t2 = time.perf_counter()
+
+    print(
+        f"{mode:7s} load {t1 - t0:7.2f} s   clean {t2 - t1:7.2f} s   "
+        f"RSS after load {rss_loaded:6.0f} MB   peak while cleaning {_proc_status_mb('VmHWM'):6.0f} MB   "
+        f"rows {len(trips)}"
+    )
+
+
+def main() -> None:
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        run_one(sys.argv[2], Path(sys.argv[3]))
+        return
+
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "trips.csv"
+        print(f"Generating {n_rows:,} synthetic trips …")
+        make_trips_csv(path, n_rows)
+        for mode in ("legacy", "fused"):
+            subprocess.run(
+                [sys.executable, __file__, "--run", mode, str(path)],
+                check=True,
+                cwd=Path(__file__).resolve().parent,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: exact trip analytics vs. the approximate sketches.
+
+Generates synthetic cleaned trips in memory (default 10M rows; skewed
+users and routes, 20k bikes, gamma-distributed durations) and answers
+top routes, top users, distinct users/bikes and duration percentiles
+once exactly and once with TripSketches (updated chunk by chunk).
+Reports wall time, the size of the state each approach keeps, and the
+observed error next to the documented bound.
+
+Usage:
+    python bench_sketches.py [n_rows]
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from sketches import TripSketches
+
+PERCENTILES = (25, 50, 75, 90)
+
+
+def make_trips(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Synthetic cleaned trips with the columns TripSketches reads."""
+    rng = np.random.default_rng(seed)
+    stations = np.char.add("ST", np.arange(2000).astype(str))
+    users = np.char.add("USR", np.arange(1_000_000).astype(str))
+    bikes = np.char.add("BK", np.arange(20_000).astype(str))
+    # Zipf-skewed popularity, as real station and user activity is
+    start = (rng.zipf(1.3, n_rows) - 1) % len(stations)
+    end = (start + rng.zipf(1.5, n_rows)) % len(stations)
+    return pd.DataFrame({
+        "user_id": pd.Categorical.from_codes((rng.zipf(1.2, n_rows) - 1) % len(users), users),
+        "bike_id": pd.Categorical.from_codes(rng.integers(0, len(bikes), n_rows), bikes),
+        "start_station_id": pd.Categorical.from_codes(start, stations),
+        "end_station_id": pd.Categorical.from_codes(end, stations),
+        "duration_minutes": rng.gamma(2.0, 12.0, n_rows).astype(np.float32),
+    })
+
+
+def exact(trips: pd.DataFrame) -> dict:
+    route_counts = trips.groupby(["start_station_id", "end_station_id"], observed=True).size()
+    user_counts = trips.groupby("user_id", observed=True).size()
+    return {
+        "routes": route_counts.nlargest(10),
+        "users": user_counts.nlargest(15),
+        "distinct_users": trips["user_id"].nunique(),
+        "distinct_bikes": trips["bike_id"].nunique(),
+        "percentiles": np.percentile(trips["duration_minutes"].to_numpy(), PERCENTILES, method="lower"),
+        "state": len(route_counts) + len(user_counts),
+    }
+
+
+def approximate(trips: pd.DataFrame, chunksize: int = 1_000_000) -> TripSketches:
+    sketches = TripSketches()
+    for start in range(0, len(trips), chunksize):
+        sketches.update(trips.iloc[start : start + chunksize])
+    return sketches
+
+
+def main() -> None:
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    print(f"Generating {n_rows:,} synthetic trips …")
+    trips = make_trips(n_rows)
+
+    t0 = time.perf_counter()
+    ref = exact(trips)
+    t1 = time.perf_counter()
+    sk = approximate(trips)
+    t2 = time.perf_counter()
+
+    print(f"exact        {t1 - t0:7.2f} s   state {ref['state']:>10,} counters")
+    print(
+        f"approximate  {t2 - t1:7.2f} s   state "
+        f"{len(sk.routes.counts) + len(sk.users.counts):>10,} counters "
+        f"+ {2 * len(sk.distinct_users.registers):,} HLL bytes + {len(sk.durations.bins)} buckets"
+    )
+
+    for name, top, exact_top, bound in (
+        ("routes", sk.top_routes(10), ref["routes"], sk.routes.error),
+        ("users", sk.top_active_users(15), ref["users"], sk.users.error),
+    ):
+        keys = [tuple(row[:-1]) if len(row) > 2 else row[0] for row in top.itertuples(index=False)]
+        recall = len(set(keys) & set(exact_top.index)) / len(exact_top)
+        print(f"top {name:6s}  recall {recall:6.1%}   count error bound {bound:,} ({bound / n_rows:.3%} of N)")
+
+    for name in ("distinct_users", "distinct_bikes"):
+        estimate = getattr(sk, f"n_{name}")()
+        print(f"{name:15s} exact {ref[name]:>9,}  estimate {estimate:>9,}  error {estimate / ref[name] - 1:+.2%}")
+
+    estimate = np.array(list(sk.duration_percentiles(PERCENTILES).values()))
+    rel = np.abs(estimate / ref["percentiles"] - 1).max()
+    print(f"duration percentiles  max relative error {rel:.2%} (bound {sk.durations.relative_accuracy:.0%} + rounding)")
+
+
+if __name__ == "__main__":
+    main()
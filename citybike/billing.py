@@ -0,0 +1,166 @@
+"""
+Fare capping and day-pass accounting for the CityBike platform.
+
+FareCaps turns per-trip fares (e.g. from fares.FareEngine or a compiled
+tariff) into what each user is actually charged:
+    - a daily cap bounds a user's spend per calendar day;
+    - a day pass is bought automatically once a user's fares for a day
+      would exceed its price, which then covers the rest of that day;
+    - a weekly cap (Monday–Sunday) bounds the capped daily spends,
+      passes included.
+
+All users are billed in one batch: the trips are sorted once by (user,
+day, start time), and every cap is applied with one cumulative sum per
+group level — the trip that crosses a cap pays the remainder, later
+trips pay nothing — so no Python loop runs over users or days.
+"""
+
+import numpy as np
+import pandas as pd
+
+from fares import label_codes
+from numerical import group_codes, radix_argsort
+
+
+def _group_starts(keys: np.ndarray) -> np.ndarray:
+    """Start position of every run of equal values in sorted *keys*."""
+    if not len(keys):
+        return np.zeros(0, dtype=np.intp)
+    return np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+
+
+def cap_cumulative(amounts: np.ndarray, starts: np.ndarray, cap: float) -> np.ndarray:
+    """Cap the running total of *amounts* within each group at *cap*.
+
+    Args:
+        amounts: 1-D non-negative amounts, grouped contiguously.
+        starts: Start position of every group (sorted, starting at 0).
+        cap: Maximum total charged per group.
+
+    Returns:
+        The part of each amount still charged: min(total so far, cap)
+        minus min(total before it, cap).
+    """
+    total = np.cumsum(amounts)
+    # running total of each group, restarted at the group start
+    before_group = np.repeat(total[starts] - amounts[starts], np.diff(np.append(starts, len(amounts))))
+    after = total - before_group
+    return np.minimum(after, cap) - np.minimum(after - amounts, cap)
+
+
+class FareCaps:
+    """Daily/weekly fare caps and day passes.
+
+    Args:
+        daily_cap: Maximum charged per user and calendar day.
+        weekly_cap: Maximum charged per user and Monday–Sunday week.
+        day_pass_price: Price of a day pass (None = no passes).
+        user_types: User types the caps apply to (None = all).
+    """
+
+    def __init__(
+        self,
+        daily_cap: float | None = None,
+        weekly_cap: float | None = None,
+        day_pass_price: float | None = None,
+        user_types=None,
+    ) -> None:
+        self.daily_cap = daily_cap
+        self.weekly_cap = weekly_cap
+        self.day_pass_price = day_pass_price
+        self.user_types = None if user_types is None else list(user_types)
+
+    def bill(self, trips: pd.DataFrame, fares) -> "Billing":
+        """Apply the caps to *fares* (one per trip of *trips*).
+
+        NaN fares (unpriced trips) stay NaN and count as 0 towards caps.
+        A user's trips with the same start_time keep their input order.
+        """
+        fares = np.asarray(fares, dtype=np.float64)
+        users, _ = group_codes(trips["user_id"])
+        start = trips["start_time"].to_numpy()
+        days = start.astype("datetime64[D]").astype(np.int64)
+        capped = users >= 0
+        if self.user_types is not None:
+            capped &= label_codes(trips["user_type"], self.user_types) >= 0
+
+        # one sort by (user, day, start time); weeks nest inside it
+        first_day = days.min() if len(days) else 0
+        user_day = users * (np.int64(days.max() - first_day + 1) if len(days) else 1) + (days - first_day)
+        # time order first (usually already given), then a stable radix
+        # sort by (user, day)
+        if (start[1:] >= start[:-1]).all():
+            by_time = np.arange(len(start))
+        else:
+            by_time = np.argsort(start, kind="stable")
+        order = by_time[radix_argsort(user_day[by_time])]
+        amounts = np.nan_to_num(fares[order])
+        day_starts = _group_starts(user_day[order])
+
+        limits = [cap for cap in (self.daily_cap, self.day_pass_price) if cap is not None]
+        charged = amounts
+        if limits:
+            charged = cap_cumulative(amounts, day_starts, min(limits))
+        if self.weekly_cap is not None:
+            # 1970-01-01 was a Thursday: shift so weeks start on Monday
+            user_week = users[order] * np.int64(1 << 32) + (days[order] + 3) // 7
+            charged = cap_cumulative(charged, _group_starts(user_week), self.weekly_cap)
+
+        keep = capped[order]
+        charged = np.where(keep, charged, amounts)
+        result = np.empty_like(fares)
+        result[order] = charged
+        result[np.isnan(fares)] = np.nan
+
+        # per user-day statement from the sorted order
+        day_fares = np.add.reduceat(amounts, day_starts) if len(amounts) else amounts
+        day_charged = np.add.reduceat(charged, day_starts) if len(amounts) else charged
+        # a pass is bought on days whose fares exceed its price, unless a
+        # lower daily cap already bounds the day or the weekly cap brought
+        # the day's charge below the price
+        day_pass = np.zeros(len(day_starts), dtype=bool)
+        price = self.day_pass_price
+        if price is not None and (self.daily_cap is None or price <= self.daily_cap):
+            day_pass = keep[day_starts] & (day_fares > price) & (day_charged >= price - 1e-9)
+        first = order[day_starts]
+        daily = pd.DataFrame({
+            "user_id": trips["user_id"].iloc[first].array,
+            "date": start[first].astype("datetime64[D]").astype("datetime64[s]"),
+            "trips": np.diff(np.append(day_starts, len(order))),
+            "fares": day_fares.round(2),
+            "charged": day_charged.round(2),
+            "day_pass": day_pass,
+        })
+        return Billing(pd.Series(result, index=trips.index, name="charged"), fares, daily)
+
+
+class Billing:
+    """Capped charges with per user-day and per user statements.
+
+    Attributes:
+        charged: Amount charged per trip (Series aligned with the trips).
+        daily: One row per user and day: user_id, date, trips, fares,
+            charged and whether a day pass was bought.
+    """
+
+    def __init__(self, charged: pd.Series, fares: np.ndarray, daily: pd.DataFrame) -> None:
+        self.charged = charged
+        self.fares = fares
+        self.daily = daily
+
+    def total(self) -> float:
+        return round(float(np.nansum(self.charged.to_numpy())), 2)
+
+    def savings(self) -> float:
+        """How much the caps and passes saved users in total."""
+        return round(float(np.nansum(self.fares) - np.nansum(self.charged.to_numpy())), 2)
+
+    def by_user(self) -> pd.DataFrame:
+        """Trips, fares, charged and day_pass_count per user (cf. CasualUser.day_pass_count)."""
+        grouped = self.daily.groupby("user_id", observed=True, sort=False)
+        return grouped.agg(
+            trips=("trips", "sum"),
+            fares=("fares", "sum"),
+            charged=("charged", "sum"),
+            day_pass_count=("day_pass", "sum"),
+        ).round(2)
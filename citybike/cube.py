@@ -0,0 +1,160 @@
+"""
+Pre-aggregated trip cube for the CityBike platform.
+
+TripCube holds trip count, total distance and total duration for every
+non-empty cell of
+
+    start station × date × hour × user type × bike type
+
+as a compact table of cells (far fewer rows than trips).  It is built
+once from the cleaned trips, persisted next to them, and then answers
+the time-based analytics and arbitrary roll-ups — by any subset of the
+dimensions plus the derived weekday and month — without touching the
+raw trips.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from utils import DAY_NAMES
+
+DIMENSIONS = ["start_station_id", "date", "hour", "user_type", "bike_type"]
+MEASURES = ["trip_count", "distance_km", "duration_minutes"]
+
+# Dimensions computed from the stored date on the (small) cell table.
+DERIVED_DIMENSIONS = {
+    "weekday": lambda cells: cells["date"].dt.weekday,
+    "month": lambda cells: cells["date"].dt.to_period("M"),
+}
+
+
+class TripCube:
+    """Trip measures per non-empty (station, date, hour, user type, bike type) cell.
+
+    Attributes:
+        cells: DataFrame with the DIMENSIONS and MEASURES columns, one row
+            per non-empty cell.
+    """
+
+    def __init__(self, cells: pd.DataFrame) -> None:
+        self.cells = cells
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_trips(cls, trips: pd.DataFrame) -> "TripCube":
+        """Build the cube from cleaned trips in one groupby.
+
+        *trips* must carry the derived hour column added by
+        analyzer.clean_trips().
+        """
+        keys = pd.DataFrame({
+            "start_station_id": trips["start_station_id"],
+            "date": trips["start_time"].dt.normalize(),
+            "hour": trips["hour"],
+            "user_type": trips["user_type"],
+            "bike_type": trips["bike_type"],
+            # float32 sums would drift; accumulate in float64
+            "distance_km": trips["distance_km"].astype("float64"),
+            "duration_minutes": trips["duration_minutes"].astype("float64"),
+        })
+        # dropna=False: trips with a missing key still count in every rollup
+        grouped = keys.groupby(DIMENSIONS, observed=True, dropna=False)
+        cells = grouped[["distance_km", "duration_minutes"]].sum()
+        cells.insert(0, "trip_count", grouped.size().astype("int64"))
+        return cls(cells.reset_index())
+
+    @classmethod
+    def concat(cls, cubes: list["TripCube"]) -> "TripCube":
+        """Combine cubes of disjoint trip sets (chunks, partitions, batches)."""
+        cubes = [cube for cube in cubes if len(cube)]
+        if not cubes:
+            return cls(pd.DataFrame(columns=DIMENSIONS + MEASURES))
+        if len(cubes) == 1:
+            return cubes[0]
+
+        first = cubes[0].cells
+        columns = {}
+        for col in first.columns:
+            parts = [cube.cells[col] for cube in cubes]
+            if isinstance(first[col].dtype, pd.CategoricalDtype):
+                parts = [part.astype("category") for part in parts]
+                columns[col] = pd.Series(union_categoricals(parts, ignore_order=True), name=col)
+            else:
+                columns[col] = pd.concat(parts, ignore_index=True)
+        grouped = pd.DataFrame(columns).groupby(DIMENSIONS, observed=True, dropna=False)
+        cells = grouped[MEASURES].sum()
+        return cls(cells.reset_index())
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def to_parquet(self, path) -> None:
+        self.cells.to_parquet(path, index=False)
+
+    @classmethod
+    def read_parquet(cls, path) -> "TripCube":
+        return cls(pd.read_parquet(path))
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def rollup(self, by: list[str] = (), **where) -> pd.DataFrame:
+        """Sum the measures over every dimension not in *by*.
+
+        Args:
+            by: Dimensions to keep — any of DIMENSIONS, or the derived
+                "weekday" (Monday = 0) and "month" (Period "M").
+            **where: Filters on dimensions, a value or a list of values,
+                e.g. user_type="member" or hour=[7, 8].
+
+        Returns:
+            DataFrame of MEASURES indexed by *by* (one row when *by* is
+            empty).
+        """
+        cells = self.cells
+        if where:
+            mask = np.ones(len(cells), dtype=bool)
+            for dim, value in where.items():
+                column = cells[dim] if dim in cells else DERIVED_DIMENSIONS[dim](cells)
+                values = value if isinstance(value, (list, tuple, set)) else [value]
+                mask &= column.isin(values).to_numpy()
+            cells = cells[mask]
+
+        if not by:
+            return cells[MEASURES].sum().to_frame().T.astype({"trip_count": "int64"})
+        keys = [
+            cells[dim] if dim in cells else DERIVED_DIMENSIONS[dim](cells).rename(dim)
+            for dim in by
+        ]
+        return cells.groupby(keys, observed=True)[MEASURES].sum()
+
+    # Results with the same shapes as the BikeShareSystem analytics methods.
+
+    def peak_usage_hours(self) -> pd.Series:
+        counts = self.rollup(["hour"])["trip_count"].rename("count")
+        counts.index = counts.index.astype("int64")
+        return counts
+
+    def busiest_day_of_week(self) -> pd.Series:
+        counts = self.rollup(["weekday"])["trip_count"].rename("count")
+        counts.index = pd.Index(np.asarray(DAY_NAMES)[counts.index], name="day_name")
+        return counts.sort_values(ascending=False, kind="stable")
+
+    def monthly_trip_trend(self) -> pd.Series:
+        trend = self.rollup(["month"])["trip_count"].rename("count")
+        return trend.rename_axis("year_month")
+
+    def avg_distance_by_user_type(self) -> pd.Series:
+        totals = self.rollup(["user_type"])
+        avg = (totals["distance_km"] / totals["trip_count"]).round(2)
+        avg.index = avg.index.astype(str)
+        return avg.rename("distance_km")
@@ -0,0 +1,169 @@
+"""
+Vectorised fare engine for the CityBike platform.
+
+FareEngine prices a whole cleaned trips frame in one pass.  Every trip
+gets a strategy code — user type × peak/off-peak of its start hour — and
+the coefficients of the strategy behind each code are gathered from
+small rate tables (numerical.calculate_fares_by_code), so no trip subset
+is filtered, priced and summed separately.  TripFares holds the per-trip
+fares and rolls revenue up by strategy, user type, station or month with
+np.bincount.
+"""
+
+import numpy as np
+import pandas as pd
+
+from numerical import calculate_fares_by_code, time_codes
+from pricing import CasualPricing, MemberPricing, PeakHourPricing, PricingStrategy
+
+USER_TYPES = ("casual", "member")
+# Start hours (0–23) priced at the peak rate: the morning and evening commutes.
+PEAK_HOURS = (7, 8, 9, 16, 17, 18)
+
+
+def label_codes(values: pd.Series, labels) -> np.ndarray:
+    """Position of each value in *labels* (-1 when absent or missing)."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # map the few categories, then gather by category code
+        lookup = np.append(pd.Index(labels).get_indexer(values.cat.categories), -1)
+        return lookup[values.cat.codes.to_numpy()]
+    return pd.Index(labels).get_indexer(values.to_numpy())
+
+
+def default_strategies() -> dict[tuple[str, bool], PricingStrategy]:
+    """Casual trips pay the peak surcharge at peak hours; members never do."""
+    return {
+        ("casual", False): CasualPricing(),
+        ("casual", True): PeakHourPricing(CasualPricing()),
+        ("member", False): MemberPricing(),
+        ("member", True): MemberPricing(),
+    }
+
+
+class FareEngine:
+    """Prices trips under one strategy per (user type, peak) pair.
+
+    Attributes:
+        strategies: PricingStrategy per (user_type, is_peak) key.
+        peak_hours: Start hours that count as peak.
+        labels: Key of each strategy code, code = position in this list.
+    """
+
+    def __init__(
+        self,
+        strategies: dict[tuple[str, bool], PricingStrategy] | None = None,
+        peak_hours=PEAK_HOURS,
+    ) -> None:
+        self.strategies = default_strategies() if strategies is None else dict(strategies)
+        self.peak_hours = tuple(peak_hours)
+        self.labels = [(user_type, peak) for user_type in USER_TYPES for peak in (False, True)]
+        missing = [key for key in self.labels if key not in self.strategies]
+        if missing:
+            raise ValueError(f"No pricing strategy for {missing}")
+
+        # rate tables indexed by strategy code; NaN rows mark strategies
+        # without linear rates, priced through calculate_costs() instead
+        rates = [self.strategies[key].rates() for key in self.labels]
+        table = np.array([r if r is not None else (np.nan,) * 3 for r in rates], dtype=np.float64)
+        self.unlock_fees, self.per_minute, self.per_km = table.T
+        self._nonlinear = [code for code, r in enumerate(rates) if r is None]
+
+    def strategy_codes(self, trips: pd.DataFrame) -> np.ndarray:
+        """Strategy code of each trip (-1 for an unknown user type).
+
+        Uses the derived hour column when present (see
+        analyzer.clean_trips()), otherwise start_time.
+        """
+        user = label_codes(trips["user_type"], USER_TYPES)
+        if "hour" in trips:
+            hour = trips["hour"].to_numpy()
+        else:
+            hour = time_codes(trips["start_time"].to_numpy())[0]
+        is_peak = np.zeros(24, dtype=np.intp)
+        is_peak[list(self.peak_hours)] = 1
+        return np.where(user >= 0, 2 * user + is_peak[hour], -1)
+
+    def fares(self, trips: pd.DataFrame, codes: np.ndarray | None = None) -> np.ndarray:
+        """Fare of every trip (float64, NaN for unknown user types)."""
+        if codes is None:
+            codes = self.strategy_codes(trips)
+        durations = trips["duration_minutes"].to_numpy(np.float64)
+        distances = trips["distance_km"].to_numpy(np.float64)
+        fares = calculate_fares_by_code(
+            codes, durations, distances, self.unlock_fees, self.per_minute, self.per_km
+        )
+        for code in self._nonlinear:
+            rows = codes == code
+            if rows.any():
+                strategy = self.strategies[self.labels[code]]
+                fares[rows] = strategy.calculate_costs(durations[rows], distances[rows])
+        return fares
+
+    def price(self, trips: pd.DataFrame) -> "TripFares":
+        """Price *trips* and keep what the revenue roll-ups need."""
+        codes = self.strategy_codes(trips)
+        labels = pd.MultiIndex.from_tuples(self.labels, names=["user_type", "peak"])
+        return TripFares(trips, self.fares(trips, codes), codes, labels)
+
+
+def _revenue(codes: np.ndarray, labels: pd.Index, fares: np.ndarray) -> pd.DataFrame:
+    """trip_count and revenue per label, for labels with at least one trip."""
+    priced = (codes >= 0) & ~np.isnan(fares)
+    codes = codes[priced]
+    counts = np.bincount(codes, minlength=len(labels))
+    revenue = np.bincount(codes, weights=fares[priced], minlength=len(labels))
+    used = counts > 0
+    return pd.DataFrame(
+        {"trip_count": counts[used], "revenue": revenue[used].round(2)},
+        index=labels[used],
+    )
+
+
+class TripFares:
+    """Per-trip fares with revenue roll-ups.
+
+    Attributes:
+        fares: Fare per trip (Series aligned with the priced trips).
+        codes: Rate code per trip, e.g. FareEngine.strategy_codes().
+        labels: Index naming each rate code, e.g. (user_type, peak).
+    """
+
+    def __init__(
+        self, trips: pd.DataFrame, fares: np.ndarray, codes: np.ndarray, labels: pd.Index
+    ) -> None:
+        self.fares = pd.Series(fares, index=trips.index, name="fare")
+        self.codes = codes
+        self.labels = labels
+        self._trips = trips
+
+    def total(self) -> float:
+        return round(float(np.nansum(self.fares.to_numpy())), 2)
+
+    def by(self, column: str) -> pd.DataFrame:
+        """Revenue per value of a trips column (categoricals keep their order)."""
+        keys = self._trips[column]
+        if isinstance(keys.dtype, pd.CategoricalDtype):
+            codes, labels = keys.cat.codes.to_numpy().astype(np.intp), keys.cat.categories
+        else:
+            codes, labels = pd.factorize(keys.to_numpy(), sort=True)
+        return _revenue(codes, pd.Index(labels, name=column), self.fares.to_numpy())
+
+    def by_strategy(self) -> pd.DataFrame:
+        """Revenue per rate code that priced at least one trip."""
+        return _revenue(self.codes, self.labels, self.fares.to_numpy())
+
+    def by_user_type(self) -> pd.DataFrame:
+        return self.by("user_type")
+
+    def by_station(self) -> pd.DataFrame:
+        return self.by("start_station_id")
+
+    def by_month(self) -> pd.DataFrame:
+        if "month_ordinal" in self._trips:
+            ordinals = self._trips["month_ordinal"].to_numpy().astype(np.int64)
+        else:
+            ordinals = time_codes(self._trips["start_time"].to_numpy())[2].astype(np.int64)
+        first = int(ordinals.min()) if len(ordinals) else 0
+        n_months = int(ordinals.max()) - first + 1 if len(ordinals) else 0
+        months = pd.PeriodIndex.from_ordinals(np.arange(first, first + n_months), freq="M")
+        return _revenue(ordinals - first, months.rename("year_month"), self.fares.to_numpy())
@@ -0,0 +1,107 @@
+"""
+Integer dictionary encoding of identifiers for the CityBike platform.
+
+Station, bike and user ids (``ST105``, ``BK243``, ``USR1100``) are mapped
+to dense int32 codes, one IdDictionary per id namespace.  Codes are
+append-only — an id keeps its code for the lifetime of the dictionary —
+so frames loaded, streamed or appended at different times share one
+coding, and counts per id are a np.bincount over codes.  Ids are decoded
+back to strings only for the few rows that reach a report or a plot.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Id namespaces and the columns (in any frame) that hold their ids.
+ID_COLUMNS = {
+    "station": ("station_id", "start_station_id", "end_station_id"),
+    "bike": ("bike_id",),
+    "user": ("user_id",),
+}
+
+
+class IdDictionary:
+    """Append-only mapping between ids and dense int32 codes.
+
+    Attributes:
+        ids: The known ids; position = code.
+    """
+
+    def __init__(self, ids=()) -> None:
+        self.ids = pd.Index([], dtype="str")
+        if len(ids):
+            self.encode(pd.Series(ids))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dtype(self) -> pd.CategoricalDtype:
+        """Categorical dtype whose codes are this dictionary's codes."""
+        return pd.CategoricalDtype(self.ids)
+
+    def _codes_of(self, labels: pd.Index) -> np.ndarray:
+        """Codes of distinct *labels*, adding the unknown ones."""
+        labels = labels.astype(str)
+        codes = self.ids.get_indexer(labels)
+        new = codes < 0
+        if new.any():
+            codes[new] = np.arange(len(self.ids), len(self.ids) + int(new.sum()))
+            self.ids = self.ids.append(labels[new])
+        return codes.astype(np.int32)
+
+    def encode(self, values: pd.Series) -> np.ndarray:
+        """Return the int32 code of every value (-1 for missing).
+
+        Ids not seen before get the next free codes.  Categorical columns
+        are looked up once per category and mapped with one gather; other
+        columns are factorized first.
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            labels, row_codes = values.cat.categories, values.cat.codes.to_numpy()
+        else:
+            row_codes, labels = pd.factorize(values)
+        # code -1 (missing) reads the appended -1
+        lut = np.append(self._codes_of(pd.Index(labels)), np.int32(-1))
+        return lut[row_codes]
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Return the ids for non-negative *codes*."""
+        return self.ids.to_numpy()[codes]
+
+    def categorical(self, values: pd.Series) -> pd.Series:
+        """Return *values* as a categorical sharing this dictionary's coding."""
+        codes = self.encode(values)
+        return pd.Series(
+            pd.Categorical.from_codes(codes, dtype=self.dtype),
+            index=values.index,
+            name=values.name,
+        )
+
+    def remap(self, other: "IdDictionary") -> np.ndarray:
+        """Lookup table from *other*'s codes to this dictionary's codes.
+
+        Ids only known to *other* are added.
+        """
+        if other is self:
+            return np.arange(len(self), dtype=np.int32)
+        return self._codes_of(other.ids)
+
+
+def new_id_dictionaries() -> dict[str, IdDictionary]:
+    """One empty IdDictionary per namespace of ID_COLUMNS."""
+    return {namespace: IdDictionary() for namespace in ID_COLUMNS}
+
+
+def encode_id_columns(df: pd.DataFrame, dictionaries: dict[str, IdDictionary]) -> pd.DataFrame:
+    """Convert the id columns of *df* in place to the shared categoricals.
+
+    Every id column of a namespace then uses the codes of that namespace's
+    dictionary, across frames, chunks and appended batches.
+    """
+    for namespace, columns in ID_COLUMNS.items():
+        for col in columns:
+            if col in df.columns:
+                df[col] = dictionaries[namespace].categorical(df[col])
+    return df
@@ -23,17 +23,18 @@ def main() -> None:
 
     system = BikeShareSystem()
 
-    # Step 1 — Load data
+    # Step 1–3 — Load, inspect and clean (skipped when the cache is current)
     print("\n>>> Loading data …")
-    system.load_data()
+    if not system.load_cached():
+        system.load_data()
 
-    # Step 2 — Inspect
-    print("\n>>> Inspecting data …")
-    system.inspect_data()
+        # Step 2 — Inspect
+        print("\n>>> Inspecting data …")
+        system.inspect_data()
 
-    # Step 3 — Clean
-    print("\n>>> Cleaning data …")
-    system.clean_data()
+        # Step 3 — Clean
+        print("\n>>> Cleaning data …")
+        system.clean_data()
 
     # Step 4 — Analytics
     print("\n>>> Running analytics …")
@@ -66,71 +67,23 @@ def main() -> None:
 
 
     # Step 4b — Pricing (Strategy Pattern + NumPy vectorized fares)
-    # The pricing strategies define the business rules (per-minute rate, etc.),
-    # and calculate_fares applies those rates to all trips at once via NumPy.
-    #
-    # from pricing import CasualPricing, MemberPricing
-    # from numerical import calculate_fares
-    # import numpy as np
-    #
-    # casual_strategy = CasualPricing()
-    # member_strategy = MemberPricing()
-    #
-    # # Example: compute a single trip cost using the strategy directly
-    # single_cost = casual_strategy.calculate_cost(duration_minutes=20, distance_km=5)
-    #
-    # # Bulk: use the strategy's rates with NumPy for all casual trips at once
-    # casual_mask = system.trips["user_type"] == "casual"
-    # casual_trips = system.trips[casual_mask]
-    # casual_fares = calculate_fares(
-    #     durations=casual_trips["duration_minutes"].to_numpy(),
-    #     distances=casual_trips["distance_km"].to_numpy(),
-    #     per_minute=casual_strategy.PER_MINUTE,
-    #     per_km=casual_strategy.PER_KM,
-    #     unlock_fee=casual_strategy.UNLOCK_FEE,
-    # )
-    # print(f"  Casual revenue   : €{np.sum(casual_fares):.2f}")
-        # Step 4b — Pricing (Strategy Pattern + NumPy vectorized fares)
+    # Each strategy prices a single trip (calculate_cost) or arrays of
+    # trips (calculate_costs); the fare engine picks the strategy per trip.
     print("\n>>> Running pricing calculations …")
 
-    from pricing import CasualPricing, MemberPricing, PeakHourPricing
-    # from numerical import calculate_fares
-    # import numpy as np
+    from pricing import CasualPricing
 
     casual_strategy = CasualPricing()
-    # member_strategy = MemberPricing()
-    # peak_strategy = PeakHourPricing()
 
     # Example single calculation
     single_cost = casual_strategy.calculate_cost(duration_minutes=20, distance_km=5)
     print(f"  Example casual trip cost: €{single_cost:.2f}")
 
-    # --- Casual revenue ---
-    # casual_trips = system.trips[system.trips["user_type"] == "casual"]
-
-    # casual_fares = calculate_fares(
-    #     durations=casual_trips["duration_minutes"].to_numpy(),
-    #     distances=casual_trips["distance_km"].to_numpy(),
-    #     per_minute=casual_strategy.PER_MINUTE,
-    #     per_km=casual_strategy.PER_KM,
-    #     unlock_fee=casual_strategy.UNLOCK_FEE,
-    # )
-
-    # print(f"  Casual revenue   : €{np.sum(casual_fares):.2f}")
-
-    # --- Member revenue ---
-    # member_mask = system.trips["user_type"] == "member"
-    # member_trips = system.trips[member_mask]
-
-    # member_fares = calculate_fares(
-    #     durations=member_trips["duration_minutes"].to_numpy(),
-    #     distances=member_trips["distance_km"].to_numpy(),
-    #     per_minute=member_strategy.PER_MINUTE,
-    #     per_km=member_strategy.PER_KM,
-    #     unlock_fee=0.0,
-    # )
-
-    # print(f"  Member revenue   : €{np.sum(member_fares):.2f}")
+    # Bulk: every trip at once, casual trips at peak hours surcharged
+    fares = system.trip_fares()
+    for user_type, row in fares.by_user_type().iterrows():
+        print(f"  {user_type.capitalize()} revenue   : €{row['revenue']:.2f}")
+    print(f"  Total revenue    : €{fares.total():.2f}")
 
 
     # Step 5 — Visualizations
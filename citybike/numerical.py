@@ -9,49 +9,229 @@ Students should implement:
 """
 
 import numpy as np
+import pandas as pd
 
 
 # ---------------------------------------------------------------------------
 # Distance calculations
 # ---------------------------------------------------------------------------
 
-def station_distance_matrix (latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+# Working-set budget of one block of pairwise values (float64 elements,
+# ~32 MB); the kernels hold about two such temporaries at a time.
+BLOCK_ELEMENTS = 1 << 22
+
+
+def _flat_earth_block(
+    lat_rows: np.ndarray, lon_rows: np.ndarray, latitudes: np.ndarray, longitudes: np.ndarray
+) -> np.ndarray:
+    """sqrt(dlat² + dlon²) between *rows* and all points, in float64."""
+    dist = np.subtract.outer(lat_rows, latitudes)
+    dist *= dist
+    dlon = np.subtract.outer(lon_rows, longitudes)
+    dlon *= dlon
+    dist += dlon
+    return np.sqrt(dist, out=dist)
+
+
+def _pairwise(
+    kernel,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    dtype=np.float64,
+    condensed: bool = False,
+    block_rows: int | None = None,
+    path=None,
+) -> np.ndarray:
+    """Fill a pairwise distance matrix block of rows by block of rows.
+
+    *kernel*(lat_rows, lon_rows, latitudes, longitudes) returns the float64
+    distances between a block of points and all points; each block is cast
+    to *dtype* as it is stored, so the working set is bounded by
+    *block_rows* whatever the number of points.  See station_distance_matrix()
+    for the other arguments.
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    n = len(latitudes)
+    shape = (n * (n - 1) // 2,) if condensed else (n, n)
+    if path is not None:
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+    else:
+        out = np.empty(shape, dtype=dtype)
+    if block_rows is None:
+        block_rows = max(1, BLOCK_ELEMENTS // max(n, 1))
+
+    offset = 0
+    for i0 in range(0, n, block_rows):
+        i1 = min(i0 + block_rows, n)
+        if not condensed:
+            out[i0:i1] = kernel(latitudes[i0:i1], longitudes[i0:i1], latitudes, longitudes)
+            continue
+        # only columns j > i are stored: compute from column i0 onwards and
+        # keep the strict upper triangle, which comes out in row-major order
+        block = kernel(latitudes[i0:i1], longitudes[i0:i1], latitudes[i0:], longitudes[i0:])
+        upper = block[np.arange(i1 - i0)[:, None] < np.arange(n - i0)[None, :]]
+        out[offset : offset + len(upper)] = upper
+        offset += len(upper)
+
+    if path is not None:
+        out.flush()
+    return out
+
+
+def condensed_index(n: int, i, j):
+    """Position of pair (i, j), i != j, in a condensed matrix of *n* points.
+
+    Works on scalars and on integer arrays.
+    """
+    i, j = np.minimum(i, j), np.maximum(i, j)
+    return n * i - i * (i + 1) // 2 + (j - i - 1)
+
+
+def station_distance_matrix (
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    dtype=np.float64,
+    condensed: bool = False,
+    block_rows: int | None = None,
+    path=None,
+) -> np.ndarray:
     """Compute pairwise Euclidean distances between stations.
 
     Uses a simplified flat-earth distance model:
         d = sqrt((lat2 - lat1)^2 + (lon2 - lon1)^2)
 
+    The matrix is filled a block of rows at a time (NumPy broadcasting
+    within a block), so temporaries stay around BLOCK_ELEMENTS values even
+    for tens of thousands of stations.  At 20k stations the full float64
+    matrix is 3.2 GB; float32 halves that and condensed storage halves it
+    again.
+
     Args:
         latitudes: 1-D array of station latitudes.
         longitudes: 1-D array of station longitudes.
+        dtype: Output dtype, e.g. np.float32 (blocks are computed in float64).
+        condensed: Return only the upper triangle (i < j) as a 1-D array
+            of n(n-1)/2 values, row by row — the layout of
+            scipy.spatial.distance.pdist; see condensed_index().
+        block_rows: Rows per block (default: about BLOCK_ELEMENTS / n).
+        path: Optional .npy file to write the result into; a memory-mapped
+            array backed by that file is returned.
 
     Returns:
-        A 2-D symmetric distance matrix of shape (n, n).
+        A 2-D symmetric distance matrix of shape (n, n), or the condensed
+        1-D array.
+
+    Example:
+        >>> station_distance_matrix(np.array([0.0, 3.0]), np.array([0.0, 4.0]))
+        array([[0., 5.],
+               [5., 0.]])
+    """
+    return _pairwise(
+        _flat_earth_block, latitudes, longitudes, dtype, condensed, block_rows, path
+    )
 
-    TODO: implement using NumPy broadcasting (no Python loops).
 
-    Hints:
-        1. Reshape latitudes to a column vector: latitudes[:, np.newaxis]  → shape (n, 1)
-        2. Subtracting the original row vector gives all pairwise differences:
-               lat_diff = latitudes[:, np.newaxis] - latitudes[np.newaxis, :]  → shape (n, n)
-        3. Do the same for longitudes.
-        4. Apply the formula: np.sqrt(lat_diff**2 + lon_diff**2)
+# Mean Earth radius (IUGG), in km.
+EARTH_RADIUS_KM = 6371.0088
+
+
+def _haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km between points given in degrees (broadcasts)."""
+    lat1, lon1, lat2, lon2 = (np.radians(x) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2
+    a += np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _haversine_block(
+    lat_rows: np.ndarray, lon_rows: np.ndarray, latitudes: np.ndarray, longitudes: np.ndarray
+) -> np.ndarray:
+    return _haversine(lat_rows[:, None], lon_rows[:, None], latitudes[None, :], longitudes[None, :])
+
+
+def haversine_km(
+    lat1: np.ndarray,
+    lon1: np.ndarray,
+    lat2: np.ndarray,
+    lon2: np.ndarray,
+    dtype=np.float64,
+    block_size: int = BLOCK_ELEMENTS,
+) -> np.ndarray:
+    """Great-circle (haversine) distance in km, element by element.
+
+    E.g. the straight-line distance of every trip from the coordinates of
+    its start and end stations, in one vectorised pass over blocks of
+    *block_size* elements (so temporaries stay bounded at any length).
+
+    Args:
+        lat1, lon1: Start coordinates in degrees (1-D arrays).
+        lat2, lon2: End coordinates in degrees (same length).
+        dtype: Output dtype (blocks are computed in float64).
+        block_size: Elements per block.
+
+    Returns:
+        1-D array of distances in km (NaN where a coordinate is NaN).
+
+    Example:
+        >>> round(float(haversine_km(np.array([0.0]), np.array([0.0]),
+        ...                          np.array([0.0]), np.array([1.0]))[0]), 2)
+        111.2
     """
-    # Step 1: compute pairwise latitude differences
-    # lat_diff = latitudes[:, np.newaxis] - latitudes[np.newaxis, :]
+    lat1, lon1, lat2, lon2 = (np.asarray(x, dtype=np.float64) for x in (lat1, lon1, lat2, lon2))
+    out = np.empty(len(lat1), dtype=dtype)
+    for i0 in range(0, len(lat1), block_size):
+        block = slice(i0, i0 + block_size)
+        out[block] = _haversine(lat1[block], lon1[block], lat2[block], lon2[block])
+    return out
+
+
+def station_haversine_matrix(
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    dtype=np.float64,
+    condensed: bool = False,
+    block_rows: int | None = None,
+    path=None,
+) -> np.ndarray:
+    """Pairwise great-circle distances between stations, in km.
 
-    # Step 2: compute pairwise longitude differences
-    # lon_diff = ...
+    Unlike station_distance_matrix() (degree differences), the values are
+    kilometres and comparable to trips' distance_km.  Same options and
+    blocked computation as station_distance_matrix().
+    """
+    return _pairwise(
+        _haversine_block, latitudes, longitudes, dtype, condensed, block_rows, path
+    )
 
-    # Step 3: combine with Euclidean formula
-    # np.sqrt(lat_diff**2 + lon_diff**2)
 
-    lat_diff = latitudes[:, np.newaxis] - latitudes[np.newaxis, :]
-    lon_diff = longitudes[:, np.newaxis] - longitudes[np.newaxis, :]
+# ---------------------------------------------------------------------------
+# Time codes
+# ---------------------------------------------------------------------------
+
+def time_codes(timestamps: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Derive compact hour, weekday and month codes from timestamps.
 
-    dist_matrix = np.sqrt(lat_diff**2 + lon_diff**2)
+    Pure integer arithmetic on the datetime64 values — no per-row Python
+    objects and no string formatting.
+
+    Args:
+        timestamps: 1-D datetime64 array (NaT is not allowed).
 
-    return dist_matrix
+    Returns:
+        Tuple (hour, weekday, month_ordinal):
+            hour — uint8 in 0..23
+            weekday — uint8 in 0..6, Monday = 0
+            month_ordinal — int16 months since 1970-01, which is the
+            ordinal of a monthly pandas Period
+    """
+    hours = timestamps.astype("datetime64[h]").astype(np.int64)
+    days = hours // 24
+    hour = (hours - days * 24).astype(np.uint8)
+    # 1970-01-01 was a Thursday (weekday 3)
+    weekday = ((days + 3) % 7).astype(np.uint8)
+    month_ordinal = timestamps.astype("datetime64[M]").astype(np.int64).astype(np.int16)
+    return hour, weekday, month_ordinal
 
 
 # ---------------------------------------------------------------------------
@@ -61,26 +241,158 @@ def station_distance_matrix (latitudes: np.ndarray, longitudes: np.ndarray) -> n
 def trip_duration_stats(durations: np.ndarray) -> dict[str, float]:
     """Compute summary statistics for trip durations.
 
+    Mean and standard deviation come from one RunningStats update, and
+    the median and the other percentiles from a single np.percentile
+    call, which partitions the array once for all of them.
+
     Args:
         durations: 1-D array of trip durations in minutes.
         for ex. durations = np.array([10, 20, 30, 40])
 
     Returns:
         Dict with keys: mean, median, std, p25, p75, p90.
-
-    TODO: use NumPy functions (np.mean, np.median, np.std, np.percentile).
     """
-    # Example (partially done):
+    stats = RunningStats().update(durations)
+    p25, median, p75, p90 = np.percentile(durations, [25, 50, 75, 90])
     return {
-        "mean": float(np.mean(durations)),
-        "median": float(np.median(durations)),
-        "std": float(np.std(durations)),
-        "p25": float(np.percentile(durations, 25)),
-        "p75": float(np.percentile(durations, 75)),
-        "p90": float(np.percentile(durations, 90)),
+        "mean": stats.mean,
+        "median": float(median),
+        "std": stats.std,
+        "p25": float(p25),
+        "p75": float(p75),
+        "p90": float(p90),
     }
 
-#(np.float64) normally is the output from numpy functions so we convert it to float
+
+class RunningStats:
+    """Mergeable count, mean, variance, min and max (Welford / Chan et al.).
+
+    Feed it chunk by chunk with update() and combine accumulators of
+    different chunks or processes with merge(); the result equals the
+    statistics of the concatenated data, without keeping the data.  The
+    variance is tracked as M2 (sum of squared deviations from the mean),
+    which stays accurate where sum-of-squares formulas cancel.
+
+    Attributes:
+        count: Number of values.
+        mean: Running mean (NaN when empty).
+        m2: Sum of squared deviations from the mean.
+        min: Smallest value (inf when empty).
+        max: Largest value (-inf when empty).
+
+    Example:
+        >>> stats = RunningStats().update(np.array([1.0, 2.0]))
+        >>> stats.merge(RunningStats().update(np.array([3.0]))).mean
+        2.0
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = float("nan")
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray) -> "RunningStats":
+        """Add one chunk of values (NaN propagates, as in np.mean)."""
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return self
+        chunk = RunningStats()
+        chunk.count = len(values)
+        chunk.mean = float(values.mean())
+        deviations = values - chunk.mean
+        chunk.m2 = float(np.dot(deviations, deviations))
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        return self.merge(chunk)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """Fold the statistics of *other* (disjoint data) into this one."""
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        """Population variance (ddof=0, like np.var)."""
+        return self.m2 / self.count if self.count else float("nan")
+
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.variance))
+
+
+# ---------------------------------------------------------------------------
+# Top-k selection
+# ---------------------------------------------------------------------------
+
+def top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+    """Return the positions of the *k* largest values, largest first.
+
+    Uses partial selection (np.argpartition) instead of a full sort:
+    O(N + k log k) rather than O(N log N).  Ties are broken by position,
+    so among equal values the earliest ones are selected and listed first
+    (the same rule as pandas' nlargest(keep="first")).
+
+    Args:
+        values: 1-D numeric array without NaN.
+        k: Number of positions to return.
+
+    Returns:
+        1-D integer array of at most *k* positions.
+
+    Example:
+        >>> top_k_indices(np.array([3, 9, 1, 9, 5]), 3)
+        array([1, 3, 4])
+    """
+    values = np.asarray(values)
+    n = len(values)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    kth = values[np.argpartition(values, n - k)[n - k]]
+    above = np.flatnonzero(values > kth)
+    ties = np.flatnonzero(values == kth)[: k - len(above)]
+    selected = np.concatenate([above, ties])
+
+    # order the k winners: value descending, then position ascending
+    order = np.lexsort((selected, -values[selected].astype(np.float64)))
+    return selected[order]
+
+
+def radix_argsort(keys: np.ndarray) -> np.ndarray:
+    """Stable argsort of integer keys in 16-bit passes.
+
+    NumPy's stable sort is a radix sort for 16-bit keys, so sorting by
+    one 16-bit digit at a time, lowest first, beats a stable argsort of
+    wide keys (two passes cover keys spanning up to 2**32 values).
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    order = np.arange(len(keys))
+    if not len(keys):
+        return order
+    keys = keys - keys.min()
+    span = int(keys.max())
+    shift = 0
+    while True:
+        digit = ((keys[order] >> shift) & 0xFFFF).astype(np.uint16)
+        order = order[np.argsort(digit, kind="stable")]
+        shift += 16
+        if span >> shift == 0:
+            return order
 
 
 # ---------------------------------------------------------------------------
@@ -124,6 +436,246 @@ def detect_outliers_zscore(
     #result will be True for outliers, False for inliers
 
 
+# Scales the MAD to the standard deviation of a normal distribution.
+MAD_TO_STD = 0.6745
+
+
+def detect_outliers_mad(values: np.ndarray, threshold: float = 3.5) -> np.ndarray:
+    """Identify outliers with the median/MAD (modified z-score) method.
+
+    Unlike the mean and standard deviation, the median and the median
+    absolute deviation are not pulled by the outliers themselves.  An
+    observation is an outlier if 0.6745 * |x - median| / MAD > threshold.
+
+    Returns:
+        Boolean array — True where the value is an outlier (all False
+        when MAD == 0).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    median = np.median(values)
+    deviation = np.abs(values - median)
+    mad = np.median(deviation)
+    if mad == 0:
+        return np.zeros(values.shape, dtype=bool)
+    return MAD_TO_STD * deviation / mad > threshold
+
+
+def detect_outliers_iqr(values: np.ndarray, k: float = 1.5) -> np.ndarray:
+    """Identify outliers outside [Q1 - k·IQR, Q3 + k·IQR] (Tukey's fences).
+
+    Returns:
+        Boolean array — True where the value is an outlier.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    q1, q3 = np.percentile(values, [25, 75])
+    return (values < q1 - k * (q3 - q1)) | (values > q3 + k * (q3 - q1))
+
+
+def group_codes(groups) -> tuple[np.ndarray, int]:
+    """Dense integer codes (-1 = missing) and the number of groups.
+
+    Categorical Series reuse their codes; other labels are factorized.
+    """
+    if isinstance(getattr(groups, "dtype", None), pd.CategoricalDtype):
+        return groups.cat.codes.to_numpy().astype(np.intp), len(groups.cat.categories)
+    codes, uniques = pd.factorize(np.asarray(groups))
+    return codes.astype(np.intp), len(uniques)
+
+
+def group_quantiles(
+    values: np.ndarray, codes: np.ndarray, qs, n_groups: int | None = None
+) -> np.ndarray:
+    """Quantiles of *values* within each group, for all groups at once.
+
+    One lexsort orders the values by (group, value); each group's
+    quantiles are then read at its offsets with linear interpolation
+    (np.percentile's default method).
+
+    Args:
+        values: 1-D array without NaN.
+        codes: Group code per value, 0 .. n_groups - 1.
+        qs: Probabilities in [0, 1].
+        n_groups: Number of groups (default: max code + 1).
+
+    Returns:
+        Array of shape (n_groups, len(qs)); NaN for empty groups.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes = np.asarray(codes, dtype=np.intp)
+    qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+    if n_groups is None:
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+
+    sorted_values = values[np.lexsort((values, codes))]
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.cumsum(counts) - counts
+    position = np.maximum(counts[:, None] - 1, 0) * qs[None, :]
+    lo = np.floor(position).astype(np.intp)
+    hi = np.minimum(lo + 1, np.maximum(counts[:, None] - 1, 0))
+    if not len(sorted_values):
+        return np.full((n_groups, len(qs)), np.nan)
+    # empty groups read a valid (meaningless) slot and are masked below
+    below = sorted_values[np.minimum(starts[:, None] + lo, len(sorted_values) - 1)]
+    above = sorted_values[np.minimum(starts[:, None] + hi, len(sorted_values) - 1)]
+    result = below + (above - below) * (position - lo)
+    result[counts == 0] = np.nan
+    return result
+
+
+def mad_outliers(
+    values: np.ndarray, codes: np.ndarray, median: np.ndarray, mad: np.ndarray,
+    threshold: float = 3.5,
+) -> np.ndarray:
+    """Flag values whose modified z-score within their group exceeds *threshold*.
+
+    *median* and *mad* are indexed by group code (e.g. from group_quantiles()
+    or a GroupedQuantileSketch); groups with MAD == 0 flag nothing.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes = np.asarray(codes, dtype=np.intp)
+    median, mad = np.asarray(median)[codes], np.asarray(mad)[codes]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = MAD_TO_STD * np.abs(values - median) / mad
+    return (mad > 0) & (score > threshold)
+
+
+def iqr_outliers(
+    values: np.ndarray, codes: np.ndarray, q1: np.ndarray, q3: np.ndarray, k: float = 1.5
+) -> np.ndarray:
+    """Flag values outside their group's Tukey fences [Q1 - k·IQR, Q3 + k·IQR].
+
+    *q1* and *q3* are indexed by group code.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes = np.asarray(codes, dtype=np.intp)
+    q1, q3 = np.asarray(q1)[codes], np.asarray(q3)[codes]
+    iqr = q3 - q1
+    return (values < q1 - k * iqr) | (values > q3 + k * iqr)
+
+
+def detect_outliers_grouped(
+    values: np.ndarray, groups, method: str = "mad", threshold: float | None = None
+) -> np.ndarray:
+    """Outlier detection with thresholds computed per group.
+
+    E.g. trip durations judged against their own station or user type
+    rather than against all trips.  All groups are handled together with
+    group codes (np.bincount for z-scores, one lexsort for the median/MAD
+    and IQR quantiles) — no loop over groups.
+
+    Args:
+        values: 1-D numeric array without NaN.
+        groups: Group label per value (array or Series; categorical codes
+            are used directly).  Values with a missing group are never
+            flagged.
+        method: "zscore", "mad" or "iqr".
+        threshold: |z| cutoff for "zscore" (default 3.0), modified-z cutoff
+            for "mad" (default 3.5), fence factor k for "iqr" (default 1.5).
+
+    Returns:
+        Boolean array — True where the value is an outlier in its group.
+
+    For data that does not fit in memory, GroupedRunningStats streams the
+    z-scores exactly; sketches.GroupedQuantileSketch streams approximate
+    per-group medians/quartiles for mad_outliers() and iqr_outliers().
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes, n_groups = group_codes(groups)
+    valid = codes >= 0
+    flagged = np.zeros(values.shape, dtype=bool)
+    v, c = values[valid], codes[valid]
+
+    if method == "zscore":
+        stats = GroupedRunningStats().update(v, c, n_groups)
+        flagged[valid] = stats.outliers(v, c, 3.0 if threshold is None else threshold)
+    elif method == "mad":
+        median = group_quantiles(v, c, [0.5], n_groups)[:, 0]
+        mad = group_quantiles(np.abs(v - median[c]), c, [0.5], n_groups)[:, 0]
+        flagged[valid] = mad_outliers(v, c, median, mad, 3.5 if threshold is None else threshold)
+    elif method == "iqr":
+        q1, q3 = group_quantiles(v, c, [0.25, 0.75], n_groups).T
+        flagged[valid] = iqr_outliers(v, c, q1, q3, 1.5 if threshold is None else threshold)
+    else:
+        raise ValueError(f"Unknown method {method!r}; use 'zscore', 'mad' or 'iqr'")
+    return flagged
+
+
+class GroupedRunningStats:
+    """Per-group RunningStats held in arrays (one slot per group code).
+
+    The streaming counterpart of detect_outliers_grouped(method="zscore"):
+    a first pass feeds chunks with update() (accumulators of other chunks
+    or workers combine with merge()), a second pass flags each chunk with
+    outliers().  Use code 0 for every value to get global statistics.
+    The median/MAD and IQR methods have no exact streaming form; see
+    sketches.GroupedQuantileSketch for their approximate counterpart.
+
+    Attributes:
+        count, mean, m2: Arrays indexed by group code.
+    """
+
+    def __init__(self) -> None:
+        self.count = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+
+    def _grow(self, n_groups: int) -> None:
+        if n_groups > len(self.count):
+            pad = n_groups - len(self.count)
+            self.count = np.append(self.count, np.zeros(pad, dtype=np.int64))
+            self.mean = np.append(self.mean, np.zeros(pad))
+            self.m2 = np.append(self.m2, np.zeros(pad))
+
+    def update(
+        self, values: np.ndarray, codes: np.ndarray, n_groups: int | None = None
+    ) -> "GroupedRunningStats":
+        """Add one chunk of values with their group codes (all >= 0)."""
+        values = np.asarray(values, dtype=np.float64)
+        codes = np.asarray(codes, dtype=np.intp)
+        if n_groups is None:
+            n_groups = int(codes.max()) + 1 if len(codes) else 0
+        chunk = GroupedRunningStats()
+        chunk.count = np.bincount(codes, minlength=n_groups)
+        with np.errstate(invalid="ignore"):
+            chunk.mean = np.bincount(codes, weights=values, minlength=n_groups) / chunk.count
+        deviation = values - chunk.mean[codes]
+        chunk.m2 = np.bincount(codes, weights=deviation * deviation, minlength=n_groups)
+        chunk.mean[chunk.count == 0] = 0.0
+        return self.merge(chunk)
+
+    def merge(self, other: "GroupedRunningStats") -> "GroupedRunningStats":
+        """Fold in the statistics of *other* (disjoint data), group by group."""
+        self._grow(len(other.count))
+        n = len(other.count)
+        count_a, count_b = self.count[:n], other.count
+        total = count_a + count_b
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = other.mean - self.mean[:n]
+            self.mean[:n] = np.where(total > 0, self.mean[:n] + delta * count_b / total, 0.0)
+            self.m2[:n] += other.m2 + np.where(total > 0, delta * delta * count_a * count_b / total, 0.0)
+        self.count[:n] = total
+        return self
+
+    @property
+    def std(self) -> np.ndarray:
+        """Population standard deviation per group (NaN for empty groups)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.sqrt(self.m2 / self.count)
+
+    def outliers(self, values: np.ndarray, codes: np.ndarray, threshold: float = 3.0) -> np.ndarray:
+        """Flag values whose |z| within their group exceeds *threshold*.
+
+        Groups with zero standard deviation (or never seen) flag nothing.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        codes = np.asarray(codes, dtype=np.intp)
+        self._grow(int(codes.max()) + 1 if len(codes) else 0)
+        std = self.std[codes]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z = np.abs(values - self.mean[codes]) / std
+        return (std > 0) & (z > threshold)
+
+
 # ---------------------------------------------------------------------------
 # Vectorized fare calculation
 # ---------------------------------------------------------------------------
@@ -170,3 +722,59 @@ def calculate_fares(
 
     fares = unlock_fee + per_minute * durations + per_km * distances
     return fares
+
+
+def calculate_fares_by_code(
+    codes: np.ndarray,
+    durations: np.ndarray,
+    distances: np.ndarray,
+    unlock_fees: np.ndarray,
+    per_minute: np.ndarray,
+    per_km: np.ndarray,
+    min_fares: np.ndarray | None = None,
+    max_fares: np.ndarray | None = None,
+) -> np.ndarray:
+    """Calculate fares for trips priced under different rate sets.
+
+    Each rate table holds one entry per rate set; every trip gathers the
+    coefficients of its code, so mixing any number of rate sets costs the
+    same single pass as calculate_fares().
+
+    Args:
+        codes: 1-D integer array, the rate set of each trip (-1 = none).
+        durations: 1-D array of trip durations (minutes).
+        distances: 1-D array of trip distances (km).
+        unlock_fees, per_minute, per_km: 1-D rate tables indexed by code.
+        min_fares, max_fares: Optional per-trip floor and cap tables
+            indexed by code (use 0 / inf for none).
+
+    Returns:
+        1-D float64 array of trip fares (NaN where the code is -1).
+
+    Example:
+        >>> calculate_fares_by_code(
+        ...     np.array([0, 1, -1]), np.array([10, 10, 10]), np.array([2.0, 2.0, 2.0]),
+        ...     unlock_fees=np.array([1.0, 0.0]), per_minute=np.array([0.15, 0.08]),
+        ...     per_km=np.array([0.10, 0.05]),
+        ... )
+        array([2.7, 0.9, nan])
+    """
+    codes = np.asarray(codes, dtype=np.intp)
+    # a trailing NaN entry absorbs code -1
+    tables = [
+        np.append(np.asarray(table, dtype=np.float64), np.nan)
+        for table in (unlock_fees, per_minute, per_km)
+    ]
+    unlock_fees, per_minute, per_km = (table[codes] for table in tables)
+    fares = calculate_fares(
+        np.asarray(durations, dtype=np.float64),
+        np.asarray(distances, dtype=np.float64),
+        per_minute,
+        per_km,
+        unlock_fees,
+    )
+    if min_fares is not None:
+        np.fmax(fares, np.append(np.asarray(min_fares, dtype=np.float64), np.nan)[codes], out=fares)
+    if max_fares is not None:
+        np.fmin(fares, np.append(np.asarray(max_fares, dtype=np.float64), np.nan)[codes], out=fares)
+    return fares
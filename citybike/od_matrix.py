@@ -0,0 +1,203 @@
+"""
+Origin–destination (OD) matrix for the CityBike platform.
+
+ODMatrix counts trips per (start station, end station) pair.  Stations are
+mapped to dense integer codes once, and the counts are built with a single
+np.bincount (small networks, dense n×n array) or a sort of the flat pair
+codes (large networks, sparse list of non-zero pairs).  Route rankings and
+per-station inflow/outflow are then answered from the matrix without
+rescanning trips.
+"""
+
+import numpy as np
+import pandas as pd
+
+from numerical import top_k_indices
+
+
+# Networks with up to this many cells (2000 stations) use a dense array
+# (≤ 32 MB of int64); larger ones store only the non-zero pairs.
+DENSE_MAX_CELLS = 4_000_000
+
+
+def station_codes(
+    start: pd.Series, end: pd.Series
+) -> tuple[pd.Index, np.ndarray, np.ndarray]:
+    """Map start/end station ids onto one shared, sorted integer coding.
+
+    Categorical columns are recoded through their (small) category sets;
+    other columns are factorized.
+
+    Returns:
+        Tuple (stations, start_codes, end_codes) where stations[code] is
+        the station id; missing station ids get code -1.
+    """
+    start = start.astype("category")
+    end = end.astype("category")
+    stations = start.cat.categories.union(end.cat.categories).astype(str)
+
+    def recode(col: pd.Series) -> np.ndarray:
+        # category code -1 (missing) reads the trailing -1
+        lut = np.append(stations.get_indexer(col.cat.categories.astype(str)), -1)
+        return lut[col.cat.codes.to_numpy()]
+
+    return stations, recode(start), recode(end)
+
+
+class ODMatrix:
+    """Trip counts per (origin, destination) station pair.
+
+    Attributes:
+        stations: Station ids; position = integer station code.
+        dense: The n×n count array, or None in sparse mode.
+        keys: Sparse mode — sorted flat pair codes (origin * n + dest).
+        counts: Sparse mode — trip count per entry of *keys*.
+    """
+
+    def __init__(
+        self,
+        stations: pd.Index,
+        dense: np.ndarray | None = None,
+        keys: np.ndarray | None = None,
+        counts: np.ndarray | None = None,
+    ) -> None:
+        self.stations = pd.Index(stations, name="station_id")
+        self.dense = dense
+        self.keys = keys
+        self.counts = counts
+
+    @property
+    def n_stations(self) -> int:
+        return len(self.stations)
+
+    @property
+    def is_dense(self) -> bool:
+        return self.dense is not None
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_codes(
+        cls,
+        stations: pd.Index,
+        origin: np.ndarray,
+        destination: np.ndarray,
+        weights: np.ndarray | None = None,
+    ) -> "ODMatrix":
+        """Build the matrix from integer station codes (one pass).
+
+        Args:
+            stations: Station ids indexed by code.
+            origin: Start-station code per trip (or per pair).
+            destination: End-station code per trip (or per pair).
+            weights: Optional count per entry (default 1 each).
+
+        Entries with a negative (missing) code are not counted.
+        """
+        n = len(stations)
+        known = (origin >= 0) & (destination >= 0)
+        if not known.all():
+            origin, destination = origin[known], destination[known]
+            weights = None if weights is None else weights[known]
+        flat = origin.astype(np.int64) * n + destination
+        if n * n <= DENSE_MAX_CELLS:
+            dense = np.bincount(flat, weights=weights, minlength=n * n)
+            return cls(stations, dense=dense.astype(np.int64).reshape(n, n))
+
+        keys, inverse = np.unique(flat, return_inverse=True)
+        counts = np.bincount(inverse, weights=weights, minlength=len(keys)).astype(np.int64)
+        return cls(stations, keys=keys, counts=counts)
+
+    @classmethod
+    def from_trips(cls, trips: pd.DataFrame) -> "ODMatrix":
+        """Build the matrix from the start/end station columns of *trips*."""
+        stations, origin, destination = station_codes(
+            trips["start_station_id"], trips["end_station_id"]
+        )
+        return cls.from_codes(stations, origin, destination)
+
+    def pairs(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (origin codes, destination codes, counts) of non-zero pairs.
+
+        Pairs come in (origin, destination) code order.
+        """
+        if self.is_dense:
+            origin, destination = np.nonzero(self.dense)
+            return origin, destination, self.dense[origin, destination]
+        n = self.n_stations
+        return self.keys // n, self.keys % n, self.counts
+
+    def merge(self, other: "ODMatrix") -> "ODMatrix":
+        """Return the element-wise sum of two matrices (stations unioned)."""
+        if other.n_stations == 0:
+            return self
+        if self.n_stations == 0:
+            return other
+        if self.stations.equals(other.stations) and self.is_dense and other.is_dense:
+            return ODMatrix(self.stations, dense=self.dense + other.dense)
+
+        stations = self.stations.union(other.stations)
+        origins, destinations, weights = [], [], []
+        for part in (self, other):
+            lut = stations.get_indexer(part.stations)
+            origin, destination, counts = part.pairs()
+            origins.append(lut[origin])
+            destinations.append(lut[destination])
+            weights.append(counts)
+        return ODMatrix.from_codes(
+            stations,
+            np.concatenate(origins),
+            np.concatenate(destinations),
+            np.concatenate(weights).astype(np.float64),
+        )
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def top_routes(self, n: int = 10) -> pd.DataFrame:
+        """The *n* most frequent routes, ties in station-id order.
+
+        Returns:
+            DataFrame with start_station_id, end_station_id, trip_count.
+        """
+        origin, destination, counts = self.pairs()
+        top = top_k_indices(counts, n)
+        return pd.DataFrame({
+            "start_station_id": np.asarray(self.stations)[origin[top]],
+            "end_station_id": np.asarray(self.stations)[destination[top]],
+            "trip_count": counts[top],
+        })
+
+    def route_counts(self) -> pd.Series:
+        """Trip count per non-zero (start_station_id, end_station_id) pair."""
+        origin, destination, counts = self.pairs()
+        index = pd.MultiIndex.from_arrays(
+            [self.stations[origin], self.stations[destination]],
+            names=["start_station_id", "end_station_id"],
+        )
+        return pd.Series(counts, index=index, name="trip_count")
+
+    def outflow(self) -> pd.Series:
+        """Trips starting at each station."""
+        origin, _, counts = self.pairs()
+        return pd.Series(
+            np.bincount(origin, weights=counts, minlength=self.n_stations).astype(np.int64),
+            index=self.stations,
+            name="outflow",
+        )
+
+    def inflow(self) -> pd.Series:
+        """Trips ending at each station."""
+        _, destination, counts = self.pairs()
+        return pd.Series(
+            np.bincount(destination, weights=counts, minlength=self.n_stations).astype(np.int64),
+            index=self.stations,
+            name="inflow",
+        )
+
+    def net_flow(self) -> pd.Series:
+        """Inflow minus outflow per station (> 0: bikes accumulate there)."""
+        return (self.inflow() - self.outflow()).rename("net_flow")
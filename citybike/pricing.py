@@ -11,6 +11,10 @@ Students should:
 
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+from numerical import calculate_fares
+
 
 # ---------------------------------------------------------------------------
 # Strategy interface (strategy pattern)
@@ -35,6 +39,34 @@ class PricingStrategy(ABC):
         """
         ...
 
+    def calculate_costs(
+        self, durations: np.ndarray, distances: np.ndarray
+    ) -> np.ndarray:
+        """Return the cost of many trips at once.
+
+        The default calls calculate_cost() per trip; the strategies below
+        override it with a single array expression.
+
+        Args:
+            durations: Array of trip durations (minutes).
+            distances: Array of trip distances (km), same shape.
+
+        Returns:
+            Float64 array of trip costs in euros.
+        """
+        return np.vectorize(self.calculate_cost, otypes=[np.float64])(
+            durations, distances
+        )
+
+    def rates(self) -> tuple[float, float, float] | None:
+        """Return (unlock_fee, per_minute, per_km) if the cost is linear.
+
+        Strategies of the form unlock_fee + per_minute * duration +
+        per_km * distance report their coefficients so fare tables can be
+        built from them (see fares.FareEngine); others return None.
+        """
+        return None
+
 
 # ---------------------------------------------------------------------------
 # Concrete strategies
@@ -60,6 +92,18 @@ class CasualPricing(PricingStrategy):
             + self.PER_KM * distance_km
         )
 
+    def calculate_costs(self, durations: np.ndarray, distances: np.ndarray):
+        return calculate_fares(
+            np.asarray(durations, dtype=np.float64),
+            np.asarray(distances, dtype=np.float64),
+            per_minute=self.PER_MINUTE,
+            per_km=self.PER_KM,
+            unlock_fee=self.UNLOCK_FEE,
+        )
+
+    def rates(self):
+        return self.UNLOCK_FEE, self.PER_MINUTE, self.PER_KM
+
 
 class MemberPricing(PricingStrategy):
     """Pricing for member users — discounted rates.
@@ -78,20 +122,45 @@ class MemberPricing(PricingStrategy):
         # TODO: implement the member pricing formula
         return (self.PER_MINUTE * duration_minutes  +  self.PER_KM * distance_km)
 
+    def calculate_costs(self, durations: np.ndarray, distances: np.ndarray):
+        return calculate_fares(
+            np.asarray(durations, dtype=np.float64),
+            np.asarray(distances, dtype=np.float64),
+            per_minute=self.PER_MINUTE,
+            per_km=self.PER_KM,
+        )
+
+    def rates(self):
+        return 0.0, self.PER_MINUTE, self.PER_KM
+
 
 class PeakHourPricing(PricingStrategy):
-    """Pricing during peak hours (surcharge on top of casual rates).
+    """Pricing during peak hours (surcharge on top of a base strategy).
 
-    TODO:
-        - Apply a 1.5x multiplier to the CasualPricing cost
-        - Implement calculate_cost
+    Rate:
+        - MULTIPLIER (1.5x) times the base strategy's cost; for a linear
+          base the unlock fee, per-minute and per-km rates all scale
+
+    Args:
+        base: Strategy whose cost is surcharged (default CasualPricing).
     """
 
     MULTIPLIER = 1.5
 
+    def __init__(self, base: PricingStrategy | None = None) -> None:
+        self.base = CasualPricing() if base is None else base
+
     def calculate_cost(
         self, duration_minutes: float, distance_km: float
     ) -> float:
-        # TODO: implement peak-hour pricing
-        base_cost = CasualPricing().calculate_cost(duration_minutes, distance_km)
+        base_cost = self.base.calculate_cost(duration_minutes, distance_km)
         return base_cost * self.MULTIPLIER
+
+    def calculate_costs(self, durations: np.ndarray, distances: np.ndarray):
+        return self.base.calculate_costs(durations, distances) * self.MULTIPLIER
+
+    def rates(self):
+        base = self.base.rates()
+        if base is None:
+            return None
+        return tuple(rate * self.MULTIPLIER for rate in base)
@@ -0,0 +1,229 @@
+"""
+What-if pricing simulator for the CityBike platform.
+
+Evaluates a grid of candidate tariffs — unlock_fee, per_minute, per_km,
+a peak-hour multiplier and an optional per-trip max_fare — against
+historical trips and returns the revenue of every scenario per segment
+(e.g. per user type or month).
+
+A linear tariff's revenue over a set of trips only depends on their
+count, total minutes and total km, so the trips are reduced once to
+those sums per (segment, peak) and every linear scenario is priced with
+a single broadcast calculate_fares() over the (scenario × segment)
+grid — the cost no longer grows with the number of trips.  Scenarios
+with a max_fare need per-trip fares: they are evaluated as blocked
+(scenario × trip) broadcasts over the trips sorted by segment, either
+in-process or spread over a process pool that memory-maps the same
+read-only trip arrays.
+"""
+
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fares import PEAK_HOURS
+from numerical import BLOCK_ELEMENTS, calculate_fares
+from pricing import CasualPricing, PricingStrategy
+
+PARAMETERS = ("unlock_fee", "per_minute", "per_km", "multiplier", "max_fare")
+# Arrays the capped evaluation reads, in trip (segment-sorted) order.
+TRIP_ARRAYS = ("durations", "distances", "multiplied")
+
+
+def scenario_grid(**values) -> pd.DataFrame:
+    """Every combination of the given parameter values, one row per scenario.
+
+    Example:
+        >>> scenario_grid(per_minute=[0.10, 0.15], multiplier=[1.0, 1.5])
+    """
+    unknown = set(values) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown tariff parameters {sorted(unknown)}")
+    index = pd.MultiIndex.from_product([np.atleast_1d(v) for v in values.values()], names=list(values))
+    return index.to_frame(index=False).rename_axis("scenario")
+
+
+def _capped_revenue(
+    arrays: dict[str, np.ndarray],
+    starts: np.ndarray,
+    lo: int,
+    hi: int,
+    params: np.ndarray,
+) -> np.ndarray:
+    """Revenue per (scenario, segment) of trips lo:hi with per-trip caps.
+
+    *params* has one row per scenario: unlock_fee, per_minute, per_km,
+    multiplier, max_fare.  Trips are sorted by segment and segment g
+    starts at starts[g].
+    """
+    unlock_fee, per_minute, per_km, multiplier, max_fare = (col[:, None] for col in params.T)
+    revenue = np.zeros((len(params), len(starts)))
+    step = max(1, BLOCK_ELEMENTS // len(params))
+    for block_lo in range(lo, hi, step):
+        block_hi = min(block_lo + step, hi)
+        durations = np.asarray(arrays["durations"][block_lo:block_hi])
+        distances = np.asarray(arrays["distances"][block_lo:block_hi])
+        multiplied = np.asarray(arrays["multiplied"][block_lo:block_hi])
+        fares = calculate_fares(durations, distances, per_minute, per_km, unlock_fee)
+        fares[:, multiplied] *= multiplier
+        np.minimum(fares, max_fare, out=fares)
+
+        # segments overlapping the block, and where each starts inside it
+        first = np.searchsorted(starts, block_lo, side="right") - 1
+        last = np.searchsorted(starts, block_hi, side="left")
+        segments = np.arange(first, last)
+        offsets = np.maximum(starts[segments], block_lo) - block_lo
+        revenue[:, segments] += np.add.reduceat(fares, offsets, axis=1)
+    return revenue
+
+
+def _capped_revenue_worker(directory: str, starts, lo, hi, params) -> np.ndarray:
+    """Process-pool entry point: memory-map the shared trip arrays."""
+    arrays = {
+        name: np.load(Path(directory) / f"{name}.npy", mmap_mode="r") for name in TRIP_ARRAYS
+    }
+    return _capped_revenue(arrays, starts, lo, hi, params)
+
+
+class PricingSimulator:
+    """Revenue of candidate tariffs over a fixed set of trips.
+
+    Args:
+        trips: Cleaned trips (duration_minutes, distance_km, hour or
+            start_time, and the *by* column).
+        by: Trips column defining the segments (None = one segment).
+        peak_hours: Start hours the scenario multiplier applies to.
+        base: Linear strategy whose rates fill parameters a scenario
+            does not set (default CasualPricing).
+
+    Attributes:
+        segments: Index of segment labels (segments without trips dropped).
+        stats: DataFrame of trip_count, duration_minutes and distance_km
+            per (segment, peak), the sums linear scenarios are priced from.
+    """
+
+    def __init__(
+        self,
+        trips: pd.DataFrame,
+        by: str | None = "user_type",
+        peak_hours=PEAK_HOURS,
+        base: PricingStrategy | None = None,
+    ) -> None:
+        rates = (base or CasualPricing()).rates()
+        if rates is None:
+            raise ValueError("The base strategy has no linear rates")
+        self.defaults = dict(zip(PARAMETERS, (*rates, 1.0, np.inf)))
+
+        if by is None:
+            codes, labels = np.zeros(len(trips), dtype=np.intp), pd.Index(["all"])
+        elif isinstance(trips[by].dtype, pd.CategoricalDtype):
+            codes, labels = trips[by].cat.codes.to_numpy().astype(np.intp), trips[by].cat.categories
+        else:
+            codes, labels = pd.factorize(trips[by].to_numpy(), sort=True)
+        hour = trips["hour"].to_numpy() if "hour" in trips else trips["start_time"].dt.hour.to_numpy()
+        is_peak = np.zeros(24, dtype=bool)
+        is_peak[list(peak_hours)] = True
+        multiplied = is_peak[hour]
+        durations = trips["duration_minutes"].to_numpy(np.float64)
+        distances = trips["distance_km"].to_numpy(np.float64)
+
+        # drop trips without a segment and renumber the used segments densely
+        counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        used = np.flatnonzero(counts)
+        remap = np.full(len(labels) + 1, -1)
+        remap[used] = np.arange(len(used))
+        codes = remap[codes]
+        keep = codes >= 0
+        self.segments = pd.Index(labels[used], name=by or "segment")
+        n = len(used)
+
+        # sufficient statistics per (segment, peak) for linear scenarios
+        cell = (2 * codes + multiplied)[keep]
+        sums = [
+            np.bincount(cell, weights=weights, minlength=2 * n)
+            for weights in (None, durations[keep], distances[keep])
+        ]
+        self.stats = pd.DataFrame(
+            dict(zip(("trip_count", "duration_minutes", "distance_km"), sums)),
+            index=pd.MultiIndex.from_product([self.segments, [False, True]], names=[self.segments.name, "peak"]),
+        ).astype({"trip_count": "int64"})
+
+        # trips grouped by segment for the per-trip (capped) evaluation
+        # (a stable sort of 16-bit codes is a radix sort)
+        order = np.argsort(codes[keep].astype(np.int16 if n < 1 << 15 else np.int64), kind="stable")
+        self.arrays = {
+            "durations": durations[keep][order],
+            "distances": distances[keep][order],
+            "multiplied": multiplied[keep][order],
+        }
+        self.starts = np.cumsum(counts[used]) - counts[used]
+
+    def __len__(self) -> int:
+        return len(self.arrays["durations"])
+
+    def _params(self, scenarios: pd.DataFrame) -> np.ndarray:
+        unknown = set(scenarios.columns) - set(PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown tariff parameters {sorted(unknown)}")
+        return np.column_stack([
+            scenarios[name].to_numpy(np.float64) if name in scenarios else np.full(len(scenarios), value)
+            for name, value in self.defaults.items()
+        ])
+
+    def run(self, scenarios: pd.DataFrame, workers: int | None = 0) -> pd.DataFrame:
+        """Revenue of every scenario in every segment.
+
+        Args:
+            scenarios: One row per scenario with any of PARAMETERS as
+                columns (e.g. from scenario_grid()); missing parameters
+                take the base strategy's rates, multiplier 1 and no cap.
+            workers: Processes for the scenarios with a max_fare (0 =
+                evaluate in this process, None = CPU count).
+
+        Returns:
+            DataFrame indexed like *scenarios*, one revenue column per
+            segment plus "total".
+        """
+        params = self._params(scenarios)
+        revenue = np.zeros((len(params), len(self.segments)))
+
+        linear = ~np.isfinite(params[:, 4])
+        if linear.any():
+            unlock_fee, per_minute, per_km, multiplier, _ = (col[:, None, None] for col in params[linear].T)
+            stats = self.stats.to_numpy(np.float64).reshape(len(self.segments), 2, 3)
+            count, minutes, km = stats[..., 0], stats[..., 1], stats[..., 2]
+            # (scenario, segment, peak): a sum of fares is the fare of the sums
+            cells = calculate_fares(minutes, km, per_minute, per_km, unlock_fee * count)
+            revenue[linear] = cells[..., 0] + multiplier[..., 0] * cells[..., 1]
+
+        capped = ~linear
+        if capped.any():
+            revenue[capped] = self._capped(params[capped], workers)
+
+        result = pd.DataFrame(revenue.round(2), index=scenarios.index, columns=self.segments)
+        result["total"] = revenue.sum(axis=1).round(2)
+        return result
+
+    def _capped(self, params: np.ndarray, workers: int | None) -> np.ndarray:
+        if workers == 0 or len(self) == 0:
+            return _capped_revenue(self.arrays, self.starts, 0, len(self), params)
+
+        n_parts = workers or os.cpu_count() or 1
+        with tempfile.TemporaryDirectory() as directory, ProcessPoolExecutor(n_parts) as pool:
+            # workers memory-map these files instead of receiving copies
+            for name, values in self.arrays.items():
+                np.save(Path(directory) / f"{name}.npy", values)
+            bounds = np.linspace(0, len(self), n_parts + 1).astype(np.int64)
+            partials = pool.map(
+                _capped_revenue_worker,
+                [directory] * n_parts,
+                [self.starts] * n_parts,
+                bounds[:-1],
+                bounds[1:],
+                [params] * n_parts,
+            )
+            return sum(partials)
@@ -0,0 +1,399 @@
+"""
+Approximate, mergeable streaming sketches for the CityBike platform.
+
+Exact heavy-hitter, distinct-count and percentile answers need every
+distinct key (or every value) in memory.  The sketches below keep a
+small, fixed-size summary instead.  Each is updated one chunk at a time
+with vectorised NumPy/pandas operations, and two sketches of the same
+configuration merge into the sketch of the combined data, so chunks and
+worker processes can be summarised independently.
+
+Error bounds (N = number of items summarised):
+    HeavyHitters (Misra–Gries, *capacity* counters):
+        estimate <= true count <= estimate + error, where error (tracked
+        exactly in .error) is at most N / (capacity + 1).  Every key with
+        true count > N / (capacity + 1) is kept.
+    HyperLogLog (2**precision registers of one byte):
+        relative standard error about 1.04 / sqrt(2**precision) — 0.81 %
+        at the default precision 14 (16 KB).
+    QuantileSketch (log-spaced buckets, DDSketch-style):
+        every quantile of positive values is within *relative_accuracy*
+        (default 1 %) of the exact sample quantile; GroupedQuantileSketch
+        keeps one such sketch per group code.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from aggregates import as_str_index
+from numerical import top_k_indices
+
+
+class HeavyHitters:
+    """Misra–Gries frequent-items summary with *capacity* counters.
+
+    Attributes:
+        counts: Estimated count per kept key (lower bounds).
+        n: Number of items summarised.
+        error: Upper bound on how much any count is underestimated.
+    """
+
+    def __init__(self, capacity: int = 1000) -> None:
+        self.capacity = capacity
+        self.counts = pd.Series(dtype="int64")
+        self.n = 0
+        self.error = 0
+
+    def update(self, keys: pd.Series | pd.DataFrame) -> "HeavyHitters":
+        """Count one chunk of keys (a DataFrame gives composite keys)."""
+        counts = keys.value_counts(sort=False)
+        self.n += int(counts.sum())
+        self._fold(as_str_index(counts[counts > 0]))
+        return self
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        self.n += other.n
+        self.error += other.error
+        self._fold(other.counts)
+        return self
+
+    def _fold(self, counts: pd.Series) -> None:
+        total = counts if self.counts.empty else self.counts.add(counts, fill_value=0)
+        if len(total) > self.capacity:
+            # subtract the (capacity + 1)-th largest count from every
+            # counter and drop those that reach zero
+            values = total.to_numpy()
+            threshold = int(np.partition(values, len(values) - self.capacity - 1)[
+                len(values) - self.capacity - 1
+            ])
+            total = total - threshold
+            total = total[total > 0]
+            self.error += threshold
+        self.counts = total.astype("int64")
+
+    def top(self, n: int) -> pd.Series:
+        """The *n* keys with the largest estimated counts."""
+        return self.counts.iloc[top_k_indices(self.counts.to_numpy(), n)]
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Number of significant bits of uint32 values (0 for 0)."""
+    # exact: every uint32 is representable as a float64
+    return np.frexp(values.astype(np.float64))[1]
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter over 64-bit value hashes.
+
+    Attributes:
+        registers: One uint8 register per bucket (2**precision of them).
+    """
+
+    def __init__(self, precision: int = 14) -> None:
+        if not 4 <= precision <= 18:
+            raise ValueError(f"precision must be in 4..18, got {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values: pd.Series) -> "HyperLogLog":
+        """Add one chunk of values (missing values are ignored)."""
+        # registers only depend on the set of values: hash each distinct
+        # value of the chunk once (for categoricals, each used category)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = values.cat.codes.to_numpy()
+            used = np.flatnonzero(np.bincount(codes[codes >= 0], minlength=len(values.cat.categories)))
+            distinct = pd.Series(values.cat.categories[used])
+        else:
+            distinct = pd.Series(values.dropna().unique())
+        hashes = pd.util.hash_pandas_object(distinct, index=False).to_numpy()
+        p = self.precision
+        bucket = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        rest = hashes << np.uint64(p)
+        high = (rest >> np.uint64(32)).astype(np.uint32)
+        low = (rest & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+        leading_zeros = np.where(high > 0, 32 - _bit_length(high), 64 - _bit_length(low))
+        rank = np.minimum(leading_zeros, 64 - p) + 1
+        np.maximum.at(self.registers, bucket, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        """Estimated number of distinct values."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch over log-spaced buckets (DDSketch).
+
+    A positive value x falls into bucket ceil(log_gamma(x)) with
+    gamma = (1 + a) / (1 - a), so every value in a bucket is within a
+    relative error a of the bucket's representative.  Non-positive values
+    share one zero bucket.
+
+    Attributes:
+        bins: Count per bucket, bins[i] is bucket offset + i.
+        n: Number of values summarised.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = np.zeros(0, dtype=np.int64)
+        self.offset = 0
+        self.zero_count = 0
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray) -> "QuantileSketch":
+        """Add one chunk of values (NaN is ignored)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        if len(positive):
+            keys = np.ceil(np.log(positive) / self._log_gamma).astype(np.int64)
+            lo = int(keys.min())
+            self._add_bins(lo, np.bincount(keys - lo))
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge quantile sketches of different accuracy")
+        self.n += other.n
+        self.zero_count += other.zero_count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(other.bins):
+            self._add_bins(other.offset, other.bins)
+        return self
+
+    def _add_bins(self, offset: int, counts: np.ndarray) -> None:
+        if not len(self.bins):
+            self.bins, self.offset = counts.astype(np.int64), offset
+            return
+        lo = min(self.offset, offset)
+        hi = max(self.offset + len(self.bins), offset + len(counts))
+        bins = np.zeros(hi - lo, dtype=np.int64)
+        bins[self.offset - lo : self.offset - lo + len(self.bins)] += self.bins
+        bins[offset - lo : offset - lo + len(counts)] += counts
+        self.bins, self.offset = bins, lo
+
+    def quantiles(self, qs) -> np.ndarray:
+        """Estimated quantiles for probabilities *qs* (NaN when empty)."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if not self.n:
+            return np.full(qs.shape, np.nan)
+        # rank of the lower sample quantile, 0-based
+        ranks = np.floor(qs * (self.n - 1))
+        cumulative = np.cumsum(np.concatenate([[self.zero_count], self.bins]))
+        bucket = np.searchsorted(cumulative, ranks, side="right")
+        keys = self.offset + bucket - 1
+        estimate = np.where(bucket == 0, 0.0, 2 * self.gamma ** keys / (self.gamma + 1))
+        return np.clip(estimate, self.min, self.max)
+
+
+class GroupedQuantileSketch:
+    """One QuantileSketch per group code, held in a 2-D bucket array.
+
+    The streaming counterpart of detect_outliers_grouped(method="mad" or
+    "iqr"): all groups of a chunk are bucketed with one np.bincount, and
+    sketches of other chunks or workers combine with merge().  Quantiles
+    carry the QuantileSketch relative error, so values right at a fence
+    may be judged differently than by the exact batch method.
+
+    Per-group Tukey fences take two passes over the data:
+
+        sketch = GroupedQuantileSketch()
+        for values, codes in chunks: sketch.update(values, codes)
+        q1, q3 = sketch.quantiles([0.25, 0.75]).T
+        for values, codes in chunks: iqr_outliers(values, codes, q1, q3)
+
+    The median/MAD method takes three: sketch the values for the medians,
+    sketch |values - median[codes]| for the MADs, then flag each chunk
+    with numerical.mad_outliers().
+
+    Attributes:
+        bins: Count per (group, bucket); bins[g, i] is bucket offset + i.
+        n: Number of values summarised per group.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = np.zeros((0, 0), dtype=np.int64)
+        self.offset = 0
+        self.zero_count = np.zeros(0, dtype=np.int64)
+        self.n = np.zeros(0, dtype=np.int64)
+        self.min = np.zeros(0)
+        self.max = np.zeros(0)
+
+    def _grow(self, n_groups: int) -> None:
+        if n_groups > len(self.n):
+            pad = n_groups - len(self.n)
+            self.bins = np.vstack([self.bins, np.zeros((pad, self.bins.shape[1]), dtype=np.int64)])
+            self.zero_count = np.append(self.zero_count, np.zeros(pad, dtype=np.int64))
+            self.n = np.append(self.n, np.zeros(pad, dtype=np.int64))
+            self.min = np.append(self.min, np.full(pad, math.inf))
+            self.max = np.append(self.max, np.full(pad, -math.inf))
+
+    def update(
+        self, values: np.ndarray, codes: np.ndarray, n_groups: int | None = None
+    ) -> "GroupedQuantileSketch":
+        """Add one chunk of values with their group codes (all >= 0; NaN is ignored)."""
+        values = np.asarray(values, dtype=np.float64)
+        codes = np.asarray(codes, dtype=np.intp)
+        keep = ~np.isnan(values)
+        values, codes = values[keep], codes[keep]
+        n_groups = max(n_groups or 0, int(codes.max()) + 1 if len(codes) else 0)
+        self._grow(n_groups)
+        if not len(values):
+            return self
+        self.n[:n_groups] += np.bincount(codes, minlength=n_groups)
+        np.minimum.at(self.min, codes, values)
+        np.maximum.at(self.max, codes, values)
+
+        positive = values > 0
+        self.zero_count[:n_groups] += np.bincount(codes[~positive], minlength=n_groups)
+        if positive.any():
+            keys = np.ceil(np.log(values[positive]) / self._log_gamma).astype(np.int64)
+            lo = int(keys.min())
+            width = int(keys.max()) - lo + 1
+            flat = codes[positive] * width + (keys - lo)
+            counts = np.bincount(flat, minlength=n_groups * width).reshape(n_groups, width)
+            self._add_bins(lo, counts)
+        return self
+
+    def merge(self, other: "GroupedQuantileSketch") -> "GroupedQuantileSketch":
+        """Fold in the sketch of *other* (disjoint data), group by group."""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge quantile sketches of different accuracy")
+        self._grow(len(other.n))
+        g = len(other.n)
+        self.n[:g] += other.n
+        self.zero_count[:g] += other.zero_count
+        self.min[:g] = np.minimum(self.min[:g], other.min)
+        self.max[:g] = np.maximum(self.max[:g], other.max)
+        if other.bins.shape[1]:
+            self._add_bins(other.offset, other.bins)
+        return self
+
+    def _add_bins(self, offset: int, counts: np.ndarray) -> None:
+        g, width = counts.shape
+        if not self.bins.shape[1]:
+            self.bins = np.zeros((len(self.n), width), dtype=np.int64)
+            self.bins[:g] = counts
+            self.offset = offset
+            return
+        lo = min(self.offset, offset)
+        hi = max(self.offset + self.bins.shape[1], offset + width)
+        bins = np.zeros((len(self.n), hi - lo), dtype=np.int64)
+        bins[:, self.offset - lo : self.offset - lo + self.bins.shape[1]] += self.bins
+        bins[:g, offset - lo : offset - lo + width] += counts
+        self.bins, self.offset = bins, lo
+
+    def quantiles(self, qs) -> np.ndarray:
+        """Estimated quantiles per group, shape (n_groups, len(qs)); NaN for empty groups."""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        n_groups = len(self.n)
+        if not n_groups:
+            return np.zeros((0, len(qs)))
+        # rank of the lower sample quantile, 0-based
+        ranks = np.floor(qs[None, :] * (self.n[:, None] - 1)).astype(np.int64)
+        cumulative = np.cumsum(np.column_stack([self.zero_count, self.bins]), axis=1)
+        # shift each row above the previous one so a single searchsorted
+        # over the flattened counts finds every group's bucket
+        shift = np.arange(n_groups, dtype=np.int64)[:, None] * (int(self.n.max()) + 1)
+        position = np.searchsorted((cumulative + shift).ravel(), (ranks + shift).ravel(), side="right")
+        bucket = position.reshape(ranks.shape) - np.arange(n_groups)[:, None] * cumulative.shape[1]
+        keys = self.offset + bucket - 1
+        estimate = np.where(bucket == 0, 0.0, 2 * self.gamma ** keys.astype(np.float64) / (self.gamma + 1))
+        estimate = np.clip(estimate, self.min[:, None], self.max[:, None])
+        estimate[self.n == 0] = np.nan
+        return estimate
+
+
+class TripSketches:
+    """Approximate trip analytics from mergeable sketches.
+
+    Attributes:
+        routes: Heavy hitters over (start_station_id, end_station_id).
+        users: Heavy hitters over user_id.
+        distinct_users: HyperLogLog over user_id.
+        distinct_bikes: HyperLogLog over bike_id.
+        durations: Quantile sketch over duration_minutes.
+    """
+
+    def __init__(
+        self, capacity: int = 1000, precision: int = 14, relative_accuracy: float = 0.01
+    ) -> None:
+        self.routes = HeavyHitters(capacity)
+        self.users = HeavyHitters(capacity)
+        self.distinct_users = HyperLogLog(precision)
+        self.distinct_bikes = HyperLogLog(precision)
+        self.durations = QuantileSketch(relative_accuracy)
+
+    def update(self, trips: pd.DataFrame) -> "TripSketches":
+        """Fold a chunk of cleaned trips into the sketches."""
+        if trips.empty:
+            return self
+        self.routes.update(trips[["start_station_id", "end_station_id"]])
+        self.users.update(trips["user_id"])
+        self.distinct_users.update(trips["user_id"])
+        self.distinct_bikes.update(trips["bike_id"])
+        self.durations.update(trips["duration_minutes"].to_numpy())
+        return self
+
+    def merge(self, other: "TripSketches") -> "TripSketches":
+        self.routes.merge(other.routes)
+        self.users.merge(other.users)
+        self.distinct_users.merge(other.distinct_users)
+        self.distinct_bikes.merge(other.distinct_bikes)
+        self.durations.merge(other.durations)
+        return self
+
+    def top_routes(self, n: int = 10) -> pd.DataFrame:
+        """Approximate top routes; trip_count is a lower bound (see routes.error)."""
+        return self.routes.top(n).rename_axis(
+            ["start_station_id", "end_station_id"]
+        ).reset_index(name="trip_count")
+
+    def top_active_users(self, n: int = 15) -> pd.DataFrame:
+        """Approximate top users; trip_count is a lower bound (see users.error)."""
+        return self.users.top(n).rename_axis("user_id").reset_index(name="trip_count")
+
+    def n_distinct_users(self) -> int:
+        return self.distinct_users.count()
+
+    def n_distinct_bikes(self) -> int:
+        return self.distinct_bikes.count()
+
+    def duration_percentiles(self, percentiles=(25, 50, 75, 90)) -> dict[str, float]:
+        """Approximate duration percentiles, keyed like trip_duration_stats()."""
+        values = self.durations.quantiles(np.asarray(percentiles) / 100)
+        return {
+            ("median" if p == 50 else f"p{p}"): round(float(v), 2)
+            for p, v in zip(percentiles, values)
+        }
@@ -0,0 +1,245 @@
+"""
+Spatial index over station coordinates for the CityBike platform.
+
+StationIndex hashes stations into a uniform grid of square cells (a local
+equirectangular projection in km) and keeps them sorted by cell.  A batch
+of query points is answered cell offset by cell offset — each step a
+vectorised lookup for all points at once — and candidates are confirmed
+with exact haversine distances, so neither the full station distance
+matrix nor a Python loop over points is needed.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from numerical import BLOCK_ELEMENTS, EARTH_RADIUS_KM, haversine_km
+
+# Grid searches wider than this many cells per side fall back to checking
+# every station (used for points far away from the network or near a pole),
+# for blocks of points with about BLOCK_ELEMENTS (point, station) pairs each.
+MAX_REACH = 16
+# Upper bound on grid cells (the per-cell start table holds one int64 each).
+MAX_CELLS = 1 << 24
+
+
+class StationIndex:
+    """Grid index for nearest-station and radius queries.
+
+    Attributes:
+        latitudes, longitudes: Station coordinates (degrees), in input order.
+        ids: Station ids (or positions when none were given).
+        cell_km: Side of a grid cell in km.
+    """
+
+    def __init__(
+        self,
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        ids=None,
+        cell_km: float | None = None,
+    ) -> None:
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.ids = np.arange(len(self.latitudes)) if ids is None else np.asarray(ids)
+        n = len(self.latitudes)
+        if not n:
+            raise ValueError("StationIndex needs at least one station")
+
+        self._lat0 = float(np.radians(self.latitudes.mean()))
+        x, y = self._project(self.latitudes, self.longitudes)
+        self._x0, self._y0 = x.min(), y.min()
+        if cell_km is None:
+            # about four stations per cell on average
+            area = max((x.max() - self._x0) * (y.max() - self._y0), 1e-6)
+            cell_km = max(2 * math.sqrt(area / n), 0.05)
+        self.cell_km = cell_km
+
+        cx, cy = self._cells(x, y)
+        self._nx, self._ny = int(cx.max()) + 1, int(cy.max()) + 1
+        if self._nx * self._ny > MAX_CELLS:
+            raise ValueError(f"cell_km={cell_km} gives more than {MAX_CELLS} grid cells")
+        keys = cx * self._ny + cy
+        self._order = np.argsort(keys, kind="stable")
+        # stations of cell c are self._order[self._starts[c]:self._starts[c + 1]]
+        self._starts = np.searchsorted(keys[self._order], np.arange(self._nx * self._ny + 1))
+
+    @classmethod
+    def from_stations(cls, stations: pd.DataFrame, cell_km: float | None = None) -> "StationIndex":
+        """Index a stations frame (station_id, latitude, longitude)."""
+        return cls(
+            stations["latitude"].to_numpy(),
+            stations["longitude"].to_numpy(),
+            stations["station_id"].astype(str).to_numpy(),
+            cell_km,
+        )
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    def _project(self, lat: np.ndarray, lon: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Equirectangular projection (km) around the network's mean latitude."""
+        x = EARTH_RADIUS_KM * np.radians(lon) * math.cos(self._lat0)
+        y = EARTH_RADIUS_KM * np.radians(lat)
+        return x, y
+
+    def _cells(self, x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        cx = np.floor((x - self._x0) / self.cell_km).astype(np.int64)
+        cy = np.floor((y - self._y0) / self.cell_km).astype(np.int64)
+        return cx, cy
+
+    def _reach(self, lat: np.ndarray, radius_km: float) -> int:
+        """Cells to search on each side so no station within *radius_km* is missed.
+
+        East-west distances are projected with cos(mean latitude); closer
+        to the pole than that they are overstated by up to the factor below.
+        """
+        widest = np.radians(np.abs(np.concatenate([lat, self.latitudes])).max())
+        stretch = math.cos(self._lat0) / max(math.cos(widest), 1e-9)
+        return math.ceil(radius_km * max(stretch, 1.0) * 1.01 / self.cell_km)
+
+    def _blocks(self, n_points: int) -> list[tuple[int, int]]:
+        """Ranges of points whose pairs with every station fit in a block."""
+        step = max(1, BLOCK_ELEMENTS // len(self))
+        return [(lo, min(lo + step, n_points)) for lo in range(0, n_points, step)]
+
+    def _all_pairs(
+        self, lat: np.ndarray, lon: np.ndarray, lo: int, hi: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(query, station, km) for points lo:hi against every station."""
+        query = np.repeat(np.arange(lo, hi), len(self))
+        station = np.tile(np.arange(len(self)), hi - lo)
+        km = haversine_km(lat[query], lon[query], self.latitudes[station], self.longitudes[station])
+        return query, station, km
+
+    def _within(
+        self, lat: np.ndarray, lon: np.ndarray, radius_km: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(query, station, km) for every station within *radius_km* of each point.
+
+        The points must be finite.
+        """
+        reach = self._reach(lat, radius_km)
+        if reach > MAX_REACH:
+            empty = np.empty(0, dtype=np.int64)
+            parts = [(empty, empty, np.empty(0))]
+            for lo, hi in self._blocks(len(lat)):
+                query, station, km = self._all_pairs(lat, lon, lo, hi)
+                keep = km <= radius_km
+                parts.append((query[keep], station[keep], km[keep]))
+            query, station, km = (np.concatenate(part) for part in zip(*parts))
+            return query, station, km
+        qx, qy = self._cells(*self._project(lat, lon))
+        queries, stations = [], []
+        for dx in range(-reach, reach + 1):
+            cx = qx + dx
+            for dy in range(-reach, reach + 1):
+                cy = qy + dy
+                inside = (cx >= 0) & (cx < self._nx) & (cy >= 0) & (cy < self._ny)
+                key = np.where(inside, cx * self._ny + cy, 0)
+                lo = self._starts[key]
+                counts = np.where(inside, self._starts[key + 1] - lo, 0)
+                if not counts.any():
+                    continue
+                # expand each point's [lo, hi) run of sorted stations
+                q = np.repeat(np.arange(len(lat)), counts)
+                start = np.repeat(lo - np.cumsum(counts) + counts, counts)
+                queries.append(q)
+                stations.append(self._order[start + np.arange(len(q))])
+        if not queries:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+        query, station = np.concatenate(queries), np.concatenate(stations)
+
+        km = haversine_km(lat[query], lon[query], self.latitudes[station], self.longitudes[station])
+        keep = km <= radius_km
+        return query[keep], station[keep], km[keep]
+
+    def _nearest_all(
+        self, lat: np.ndarray, lon: np.ndarray, k: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The k <= len(self) nearest stations of each point, checking every station."""
+        station_out = np.empty((len(lat), k), dtype=np.int64)
+        km_out = np.empty((len(lat), k))
+        for lo, hi in self._blocks(len(lat)):
+            _, _, km = self._all_pairs(lat, lon, lo, hi)
+            km = km.reshape(hi - lo, len(self))
+            nearest = np.argpartition(km, k - 1, axis=1)[:, :k]
+            nearest_km = np.take_along_axis(km, nearest, axis=1)
+            order = np.argsort(nearest_km, axis=1, kind="stable")
+            station_out[lo:hi] = np.take_along_axis(nearest, order, axis=1)
+            km_out[lo:hi] = np.take_along_axis(nearest_km, order, axis=1)
+        return station_out, km_out
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def radius(
+        self, latitudes: np.ndarray, longitudes: np.ndarray, radius_km: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """All stations within *radius_km* of each query point.
+
+        Returns:
+            Tuple (point, station, km) of equal-length arrays — one entry
+            per (point, station) match, sorted by point then distance;
+            station is a position into self.ids.  Points with a NaN or
+            infinite coordinate have no matches.
+        """
+        lat = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        lon = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        points = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        query, station, km = self._within(lat[points], lon[points], radius_km)
+        query = points[query]
+        order = np.lexsort((km, query))
+        return query[order], station[order], km[order]
+
+    def nearest(
+        self, latitudes: np.ndarray, longitudes: np.ndarray, k: int = 1
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """The *k* nearest stations of each query point.
+
+        The search radius starts at one cell and doubles only for points
+        that still have fewer than *k* stations within it; once the grid
+        search would span more than MAX_REACH cells, the remaining points
+        are checked against every station instead.
+
+        Returns:
+            Tuple (station, km) of shape (n_points, k), nearest first;
+            station is a position into self.ids (-1 / inf when the index
+            has fewer than k stations, and for points with a NaN or
+            infinite coordinate).
+        """
+        lat = np.atleast_1d(np.asarray(latitudes, dtype=np.float64))
+        lon = np.atleast_1d(np.asarray(longitudes, dtype=np.float64))
+        station_out = np.full((len(lat), k), -1, dtype=np.int64)
+        km_out = np.full((len(lat), k), np.inf)
+        wanted = min(k, len(self))
+
+        pending = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        radius_km = self.cell_km
+        while len(pending):
+            if self._reach(lat[pending], radius_km) > MAX_REACH:
+                station_out[pending, :wanted], km_out[pending, :wanted] = self._nearest_all(
+                    lat[pending], lon[pending], wanted
+                )
+                break
+            query, station, km = self._within(lat[pending], lon[pending], radius_km)
+            found = np.bincount(query, minlength=len(pending))
+            done = found >= wanted
+            # every station missing from a done point's result is farther
+            # than radius_km, so its k nearest are among the candidates
+            keep = done[query]
+            query, station, km = query[keep], station[keep], km[keep]
+            order = np.lexsort((km, query))
+            query, station, km = query[order], station[order], km[order]
+            rank = np.arange(len(query)) - np.repeat(np.cumsum(found[done]) - found[done], found[done])
+            first = rank < wanted
+            rows = pending[query[first]]
+            station_out[rows, rank[first]] = station[first]
+            km_out[rows, rank[first]] = km[first]
+
+            pending = pending[~done]
+            radius_km *= 2
+        return station_out, km_out
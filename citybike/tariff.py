@@ -0,0 +1,244 @@
+"""
+Time-of-day and calendar tariffs for the CityBike platform.
+
+A Tariff starts from the linear rates of one pricing strategy per user
+type and layers rules on top — e.g. a weekday-rush surcharge for casual
+users, a per-minute rate for electric bikes, or a weekend fare cap.
+compile() evaluates the rules once into dense NumPy tables of shape
+
+    user type × bike type × hour-of-week slot
+
+(a slot is weekday * 24 + hour; public holidays get their own day,
+HOLIDAY, after Sunday).  Pricing a trip is then one table gather per
+coefficient on top of the flat CasualPricing formula, whatever the
+number of rules.
+"""
+
+import numpy as np
+import pandas as pd
+
+from fares import TripFares, label_codes
+from numerical import calculate_fares_by_code, time_codes
+from pricing import CasualPricing, MemberPricing, PricingStrategy
+from utils import DAY_NAMES, VALID_BIKE_TYPES
+
+HOLIDAY = 7
+SLOTS = (HOLIDAY + 1) * 24
+FIELDS = ("unlock_fee", "per_minute", "per_km", "min_fare", "max_fare")
+
+# Named day selectors; weekend fares also apply on public holidays.
+DAY_GROUPS = {
+    "weekday": [0, 1, 2, 3, 4],
+    "weekend": [5, 6, HOLIDAY],
+    "holiday": [HOLIDAY],
+}
+
+
+def _days(days) -> list[int]:
+    """Day numbers (Monday = 0, HOLIDAY) for a rule's days selector."""
+    if days is None:
+        return list(range(HOLIDAY + 1))
+    if isinstance(days, (str, int)):
+        days = [days]
+    numbers = []
+    for day in days:
+        if isinstance(day, str):
+            if day.lower() in DAY_GROUPS:
+                numbers += DAY_GROUPS[day.lower()]
+                continue
+            names = [name.lower() for name in DAY_NAMES]
+            if day.lower() not in names:
+                raise ValueError(f"Unknown day {day!r}")
+            day = names.index(day.lower())
+        if not 0 <= day <= HOLIDAY:
+            raise ValueError(f"Day must be in 0..{HOLIDAY}, got {day}")
+        numbers.append(day)
+    return numbers
+
+
+def hour_of_week_codes(trips: pd.DataFrame, holidays=()) -> np.ndarray:
+    """Slot (weekday * 24 + hour) of each trip's start; holidays use day HOLIDAY.
+
+    Uses the derived hour and weekday columns when present (see
+    analyzer.clean_trips()), otherwise start_time.
+    """
+    if "hour" in trips and "weekday" in trips:
+        hour, weekday = trips["hour"].to_numpy(), trips["weekday"].to_numpy()
+    else:
+        hour, weekday, _ = time_codes(trips["start_time"].to_numpy())
+    slot = weekday.astype(np.int32) * 24 + hour
+    if len(holidays):
+        # flag table over the days from the first to the last holiday
+        holidays = np.asarray(holidays, dtype="datetime64[D]").astype(np.int64)
+        first = holidays.min()
+        is_holiday = np.zeros(holidays.max() - first + 2, dtype=bool)
+        is_holiday[holidays - first] = True
+        days = trips["start_time"].to_numpy().astype("datetime64[D]").astype(np.int64) - first
+        # days outside the table read its trailing False entry (index -1)
+        np.clip(days, -1, len(is_holiday) - 1, out=days)
+        holiday = is_holiday[days]
+        slot[holiday] = HOLIDAY * 24 + hour[holiday]
+    return slot
+
+
+class Tariff:
+    """Fare rules per user type, bike type, day and hour.
+
+    Args:
+        strategies: Linear pricing strategy per user type giving the base
+            rates (default casual → CasualPricing, member → MemberPricing).
+        bike_types: Bike types the tariff distinguishes.
+        holidays: Dates priced as day HOLIDAY instead of their weekday.
+    """
+
+    def __init__(
+        self,
+        strategies: dict[str, PricingStrategy] | None = None,
+        bike_types=None,
+        holidays=(),
+    ) -> None:
+        if strategies is None:
+            strategies = {"casual": CasualPricing(), "member": MemberPricing()}
+        self.base_rates = {}
+        for user_type, strategy in strategies.items():
+            rates = strategy.rates()
+            if rates is None:
+                raise ValueError(f"The {user_type} strategy has no linear rates")
+            self.base_rates[user_type] = rates
+        self.user_types = list(self.base_rates)
+        self.bike_types = sorted(VALID_BIKE_TYPES) if bike_types is None else list(bike_types)
+        self.holidays = np.asarray(holidays, dtype="datetime64[D]")
+        self.rules: list[dict] = []
+
+    def set(
+        self,
+        user_type=None,
+        bike_type=None,
+        days=None,
+        hours=None,
+        multiplier: float | None = None,
+        **rates: float,
+    ) -> "Tariff":
+        """Add a rule; rules apply in order.
+
+        Where rules overlap, rates set by a later rule replace the earlier
+        values, while multipliers compound: each scales the cells' rates
+        as the earlier rules left them (a 1.5x peak rule and a 2x electric
+        rule price a peak electric trip at 3x).
+
+        Args:
+            user_type, bike_type: One value or a list (None = all).
+            days: Day numbers (Monday = 0, HOLIDAY), day names, or
+                "weekday" / "weekend" (incl. holidays) / "holiday".
+            hours: Start hours 0–23 (None = all).
+            multiplier: Scales unlock_fee, per_minute and per_km of the
+                selected cells, after any rates set by this rule.
+            **rates: New values for any of FIELDS — min_fare and
+                max_fare bound the fare of a single trip.
+
+        Returns:
+            self, so rules can be chained.
+        """
+        unknown = set(rates) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown tariff fields {sorted(unknown)}")
+        users = self._select(user_type, self.user_types, "user type")
+        bikes = self._select(bike_type, self.bike_types, "bike type")
+        hours = list(range(24)) if hours is None else list(np.atleast_1d(hours))
+        if any(not 0 <= hour < 24 for hour in hours):
+            raise ValueError("Hours must be in 0..23")
+        self.rules.append({
+            "cells": (users, bikes, _days(days), hours),
+            "rates": rates,
+            "multiplier": multiplier,
+        })
+        return self
+
+    @staticmethod
+    def _select(values, labels: list, what: str) -> list[int]:
+        if values is None:
+            return list(range(len(labels)))
+        values = [values] if isinstance(values, str) else list(values)
+        missing = [value for value in values if value not in labels]
+        if missing:
+            raise ValueError(f"Unknown {what} {missing}")
+        return [labels.index(value) for value in values]
+
+    def compile(self) -> "TariffTables":
+        """Evaluate the rules into dense lookup tables."""
+        shape = (len(self.user_types), len(self.bike_types), HOLIDAY + 1, 24)
+        tables = {field: np.zeros(shape) for field in FIELDS}
+        tables["max_fare"][:] = np.inf
+        for user, (unlock_fee, per_minute, per_km) in enumerate(self.base_rates.values()):
+            tables["unlock_fee"][user] = unlock_fee
+            tables["per_minute"][user] = per_minute
+            tables["per_km"][user] = per_km
+
+        for rule in self.rules:
+            cells = np.ix_(*rule["cells"])
+            for field, value in rule["rates"].items():
+                tables[field][cells] = value
+            if rule["multiplier"] is not None:
+                for field in ("unlock_fee", "per_minute", "per_km"):
+                    tables[field][cells] *= rule["multiplier"]
+
+        return TariffTables(
+            self.user_types,
+            self.bike_types,
+            {field: table.reshape(shape[0], shape[1], SLOTS) for field, table in tables.items()},
+            self.holidays,
+        )
+
+
+class TariffTables:
+    """A compiled Tariff: one float64 table per field.
+
+    Attributes:
+        user_types, bike_types: Labels of the first two table axes.
+        tables: FIELDS → array of shape (user types, bike types, SLOTS).
+        holidays: Dates priced as day HOLIDAY.
+    """
+
+    def __init__(self, user_types, bike_types, tables: dict[str, np.ndarray], holidays) -> None:
+        self.user_types = list(user_types)
+        self.bike_types = list(bike_types)
+        self.tables = tables
+        self.holidays = holidays
+
+    def labels(self) -> pd.MultiIndex:
+        """(user_type, bike_type, hour_of_week) of every rate code."""
+        return pd.MultiIndex.from_product(
+            [self.user_types, self.bike_types, range(SLOTS)],
+            names=["user_type", "bike_type", "hour_of_week"],
+        )
+
+    def codes(self, trips: pd.DataFrame) -> np.ndarray:
+        """Flat table position of each trip (-1 for unknown user or bike types)."""
+        user = label_codes(trips["user_type"], self.user_types).astype(np.int32)
+        bike = label_codes(trips["bike_type"], self.bike_types).astype(np.int32)
+        codes = (user * len(self.bike_types) + bike) * SLOTS
+        codes += hour_of_week_codes(trips, self.holidays)
+        codes[(user < 0) | (bike < 0)] = -1
+        return codes
+
+    def fares(self, trips: pd.DataFrame, codes: np.ndarray | None = None) -> np.ndarray:
+        """Fare of every trip (float64, NaN for unknown user or bike types)."""
+        if codes is None:
+            codes = self.codes(trips)
+        flat = {field: table.ravel() for field, table in self.tables.items()}
+        # skip the floor/cap gathers when the tariff sets none
+        return calculate_fares_by_code(
+            codes,
+            trips["duration_minutes"].to_numpy(np.float64),
+            trips["distance_km"].to_numpy(np.float64),
+            flat["unlock_fee"],
+            flat["per_minute"],
+            flat["per_km"],
+            flat["min_fare"] if flat["min_fare"].any() else None,
+            flat["max_fare"] if np.isfinite(flat["max_fare"]).any() else None,
+        )
+
+    def price(self, trips: pd.DataFrame) -> TripFares:
+        """Price *trips*; TripFares.by_strategy() rolls up per tariff cell."""
+        codes = self.codes(trips)
+        return TripFares(trips, self.fares(trips, codes), codes, self.labels())
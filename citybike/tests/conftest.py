@@ -0,0 +1,35 @@
+"""
+Shared fixtures for the unit tests.
+"""
+
+import pandas as pd
+import pytest
+
+from numerical import time_codes
+
+
+@pytest.fixture
+def trips() -> pd.DataFrame:
+    """Five cleaned trips (with the derived time columns) over three stations."""
+    trips = pd.DataFrame({
+        "user_id": pd.Categorical(["U1", "U2", "U1", "U3", "U1"]),
+        "user_type": pd.Categorical(["member", "casual", "member", "casual", "member"]),
+        "bike_type": pd.Categorical(["classic", "electric", "classic", "classic", "electric"]),
+        "start_station_id": pd.Categorical(["S1", "S1", "S2", "S1", "S1"]),
+        "end_station_id": pd.Categorical(["S2", "S2", "S1", "S2", "S3"]),
+        "start_time": pd.to_datetime([
+            "2024-01-01 08:00:00", "2024-01-01 08:30:00", "2024-01-02 17:00:00",
+            "2024-02-03 08:15:00", "2024-02-04 12:00:00",
+        ]),
+        "end_time": pd.to_datetime([
+            "2024-01-01 08:10:00", "2024-01-01 09:00:00", "2024-01-02 17:20:00",
+            "2024-02-03 08:20:00", "2024-02-04 13:00:00",
+        ]),
+        "duration_minutes": [10.0, 30.0, 20.0, 5.0, 60.0],
+        "distance_km": [2.0, 4.0, 3.0, 1.0, 6.0],
+        "status": pd.Categorical(["completed"] * 4 + ["cancelled"]),
+    })
+    trips["hour"], trips["weekday"], trips["month_ordinal"] = time_codes(
+        trips["start_time"].to_numpy()
+    )
+    return trips
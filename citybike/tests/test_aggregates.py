@@ -0,0 +1,63 @@
+"""
+Unit tests for the aggregates module.
+
+Covers:
+    - TripAggregates.update (chunk-wise accumulation)
+    - TripAggregates.merge (combining partial aggregates)
+"""
+
+import pandas as pd
+import pytest
+
+from aggregates import TripAggregates
+
+
+class TestTripAggregates:
+
+    def test_summary(self, trips: pd.DataFrame) -> None:
+        agg = TripAggregates().update(trips)
+        assert agg.total_trips_summary() == {
+            "total_trips": 5,
+            "total_distance_km": 16.0,
+            "avg_duration_min": 25.0,
+        }
+
+    def test_hour_and_month_counts(self, trips: pd.DataFrame) -> None:
+        agg = TripAggregates().update(trips)
+        assert agg.peak_usage_hours().to_dict() == {8: 3, 12: 1, 17: 1}
+        assert list(agg.monthly_trip_trend()) == [3, 2]
+
+    def test_top_users_and_routes(self, trips: pd.DataFrame) -> None:
+        agg = TripAggregates().update(trips)
+        users = agg.top_active_users(1)
+        assert users.iloc[0]["user_id"] == "U1"
+        assert users.iloc[0]["trip_count"] == 3
+        routes = agg.top_routes(1)
+        assert tuple(routes.iloc[0]) == ("S1", "S2", 3)
+
+    def test_avg_distance_by_user_type(self, trips: pd.DataFrame) -> None:
+        agg = TripAggregates().update(trips)
+        avg = agg.avg_distance_by_user_type()
+        assert avg["member"] == pytest.approx(11.0 / 3, abs=0.01)
+        assert avg["casual"] == pytest.approx(2.5)
+
+    def test_chunks_match_single_update(self, trips: pd.DataFrame) -> None:
+        whole = TripAggregates().update(trips)
+        chunked = TripAggregates().update(trips.iloc[:2]).update(trips.iloc[2:])
+        assert chunked.total_trips_summary() == whole.total_trips_summary()
+        assert chunked.user_trip_counts().to_dict() == whole.user_trip_counts().to_dict()
+        assert chunked.routes.route_counts().to_dict() == whole.routes.route_counts().to_dict()
+
+    def test_merge_matches_single_update(self, trips: pd.DataFrame) -> None:
+        whole = TripAggregates().update(trips)
+        left = TripAggregates().update(trips.iloc[:3])
+        right = TripAggregates().update(trips.iloc[3:])
+        merged = left.merge(right)
+        assert merged.busiest_day_of_week().to_dict() == whole.busiest_day_of_week().to_dict()
+        assert merged.status_distribution().to_dict() == whole.status_distribution().to_dict()
+        assert list(merged.longest_trips(2)["duration_minutes"]) == [60.0, 30.0]
+
+    def test_longest_trips_limit(self, trips: pd.DataFrame) -> None:
+        agg = TripAggregates(n_longest=3).update(trips)
+        with pytest.raises(ValueError):
+            agg.longest_trips(5)
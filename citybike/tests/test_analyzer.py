@@ -0,0 +1,499 @@
+"""
+Unit tests for the analyzer module.
+
+Covers:
+    - CSV loading (dirty numerics, writable frames) and clean_trips
+    - Streaming mode (matches clean_data(), duplicates across chunks)
+    - Parquet cache of the cleaned frames (hits, misses, eviction, dtypes)
+    - Time windows (inclusive start, exclusive end, empty windows)
+    - Distance checks (straight-line km, implausible distances)
+    - Duration outliers per group
+    - aggregate_partitions (matches clean_data(), no trip-level state)
+    - Memoised analytics (hits, invalidation, LRU bound)
+    - append_trips (dedup, imputation, incremental structures, cache parts)
+    - Pricing through mutable engines and caps
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analyzer
+from aggregates import TripAggregates
+from analyzer import TRIPS_DATETIME_COLUMNS, TRIPS_DTYPES, BikeShareSystem, _read_csv, clean_trips
+from bench_clean import legacy_clean
+from billing import FareCaps
+from cube import TripCube
+from fares import FareEngine
+from numerical import haversine_km
+from time_index import TimeIndex
+
+
+# Dirty on purpose: a repeated trip_id (TR2), missing numbers (TR3, TR4),
+# an end before its start (TR5), a missing status (TR6), untidy labels
+# and a station missing from stations.csv (ST999).
+TRIPS_CSV = """\
+trip_id,user_id,user_type,bike_id,bike_type,start_station_id,end_station_id,start_time,end_time,duration_minutes,distance_km,status
+TR1,U1,member,B1,classic,ST100,ST101,2024-03-04 07:30:00,2024-03-04 07:50:00,20.0,3.5,completed
+TR2,U2,casual,B2,electric,ST101,ST102,2024-03-04 08:00:00,2024-03-04 08:25:00,25.0,4.0,Completed
+TR3,U1,Member ,B1,classic,ST102,ST100,2024-03-05 17:00:00,2024-03-05 17:10:00,,2.0,completed
+TR4,U3,casual,B3,classic,ST100,ST100,2024-03-05 12:00:00,2024-03-05 12:40:00,40.0,,cancelled
+TR2,U2,casual,B2,electric,ST101,ST102,2024-03-04 08:00:00,2024-03-04 08:25:00,25.0,4.0,completed
+TR5,U2,casual,B2,electric,ST101,ST102,2024-03-06 09:00:00,2024-03-06 08:00:00,60.0,5.0,completed
+TR6,U4,member,B4,electric,ST101,ST999,2024-03-09 10:00:00,2024-03-09 10:15:00,15.0,3.0,
+TR7,U3,casual,B3,classic,ST102,ST101,2024-04-01 08:00:00,2024-04-01 08:30:00,30.0,2.5,completed
+"""
+CLEAN_TRIP_IDS = ["TR1", "TR2", "TR3", "TR4", "TR6", "TR7"]
+
+# A new batch: TR1 is already loaded and TR8 is repeated within the batch.
+BATCH_CSV = """\
+trip_id,user_id,user_type,bike_id,bike_type,start_station_id,end_station_id,start_time,end_time,duration_minutes,distance_km,status
+TR1,U1,member,B1,classic,ST100,ST101,2024-03-04 07:30:00,2024-03-04 07:50:00,20.0,3.5,completed
+TR8,U5,casual,B5,electric,ST100,ST102,2024-03-02 18:00:00,2024-03-02 18:45:00,45.0,,completed
+TR8,U5,casual,B5,electric,ST100,ST102,2024-03-02 18:00:00,2024-03-02 18:45:00,45.0,,completed
+TR9,U1,Member,B1,classic,ST101,ST100,2024-04-02 07:00:00,2024-04-02 07:20:00,,3.0,completed
+"""
+
+STATIONS_CSV = """\
+station_id,station_name,capacity,latitude,longitude
+ST100,Central Station,25,48.892607,9.259799
+ST101,University Campus,30,48.839528,9.216875
+ST102,Market Square,20,48.780000,9.180000
+"""
+
+MAINTENANCE_CSV = """\
+record_id,bike_id,bike_type,date,maintenance_type,cost,description
+MR1,B1,classic,2024-03-01,chain_lubrication,12.5,Chain Lubrication for bike B1
+MR2,B2,electric,2024-03-02,battery_replacement,143.62,Battery Replacement for bike B2
+"""
+
+
+def _write_data(directory: Path, trips_csv: str = TRIPS_CSV) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "trips.csv").write_text(trips_csv)
+    (directory / "stations.csv").write_text(STATIONS_CSV)
+    (directory / "maintenance.csv").write_text(MAINTENANCE_CSV)
+
+
+@pytest.fixture
+def data_dir(tmp_path: Path, monkeypatch) -> Path:
+    """A small raw dataset that load_data() reads instead of data/."""
+    directory = tmp_path / "data"
+    _write_data(directory)
+    monkeypatch.setattr(analyzer, "DATA_DIR", directory)
+    return directory
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path) -> Path:
+    return tmp_path / "cache"
+
+
+@pytest.fixture
+def system(data_dir: Path, cache_dir: Path) -> BikeShareSystem:
+    """A loaded and cleaned system (which also writes the Parquet cache)."""
+    system = BikeShareSystem(cache_dir=cache_dir)
+    system.load_data()
+    system.clean_data()
+    return system
+
+
+class TestLoadAndClean:
+
+    def test_matches_legacy_pipeline(self, data_dir: Path) -> None:
+        path = data_dir / "trips.csv"
+        trips = _read_csv(path, TRIPS_DTYPES, TRIPS_DATETIME_COLUMNS)
+        # as in clean_data(): step 1 only builds the dedup mask
+        cleaned = clean_trips(trips, keep=~trips["trip_id"].duplicated().to_numpy())
+        legacy = legacy_clean(pd.read_csv(path))
+
+        assert list(cleaned["trip_id"]) == list(legacy["trip_id"]) == CLEAN_TRIP_IDS
+        for col in ("user_id", "user_type", "bike_type", "start_station_id", "status"):
+            assert list(cleaned[col].astype(str)) == list(legacy[col].astype(str)), col
+        for col in TRIPS_DATETIME_COLUMNS:
+            np.testing.assert_array_equal(cleaned[col].to_numpy(), legacy[col].to_numpy())
+        for col in ("duration_minutes", "distance_km"):
+            np.testing.assert_allclose(cleaned[col], legacy[col], rtol=1e-6)
+
+    def test_dirty_numerics_coerced(self, data_dir: Path) -> None:
+        path = data_dir / "trips.csv"
+        path.write_text(TRIPS_CSV.replace("20.0,3.5", "twenty,3.5"))
+        trips = _read_csv(path, TRIPS_DTYPES, TRIPS_DATETIME_COLUMNS)
+        assert trips["duration_minutes"].dtype == "float32"
+        assert np.isnan(trips["duration_minutes"].iloc[0])
+        assert trips["distance_km"].iloc[0] == pytest.approx(3.5)
+        assert list(trips.columns) == TRIPS_CSV.splitlines()[0].split(",")
+
+        cleaned = clean_trips(trips)
+        assert not cleaned["duration_minutes"].isna().any()
+
+    def test_loaded_frames_writable(self, data_dir: Path) -> None:
+        system = BikeShareSystem(cache_dir=None)
+        system.load_data()
+        maintenance = system.maintenance
+        maintenance.loc[maintenance["cost"] > 100, "bike_type"] = "classic"
+        assert list(maintenance["bike_type"]) == ["classic", "classic"]
+        system.trips.loc[0, "status"] = "cancelled"
+        system.trips.loc[0, "duration_minutes"] = 1.0
+
+
+class TestCache:
+
+    def test_hit(self, system: BikeShareSystem, cache_dir: Path) -> None:
+        cached = BikeShareSystem(cache_dir=cache_dir)
+        assert cached.load_cached()
+        assert list(cached.trips["trip_id"]) == CLEAN_TRIP_IDS
+        assert cached.peak_usage_hours().to_dict() == system.peak_usage_hours().to_dict()
+
+    def test_round_trip_keeps_dtypes(self, system: BikeShareSystem, cache_dir: Path) -> None:
+        cached = BikeShareSystem(cache_dir=cache_dir)
+        assert cached.load_cached()
+        for name in ("trips", "stations", "maintenance"):
+            original, loaded = getattr(system, name), getattr(cached, name)
+            assert loaded.dtypes.to_dict() == original.dtypes.to_dict(), name
+            assert loaded.to_dict("list") == original.to_dict("list"), name
+
+    def test_miss_without_cache(self, data_dir: Path, cache_dir: Path) -> None:
+        assert not BikeShareSystem(cache_dir=cache_dir).load_cached()
+        assert not BikeShareSystem(cache_dir=None).load_cached()
+
+    def test_miss_after_source_change(
+        self, system: BikeShareSystem, data_dir: Path, cache_dir: Path
+    ) -> None:
+        _write_data(data_dir, TRIPS_CSV.replace("TR7,", "TR8,"))
+        assert not BikeShareSystem(cache_dir=cache_dir).load_cached()
+
+    def test_stale_entries_evicted(
+        self, system: BikeShareSystem, data_dir: Path, cache_dir: Path
+    ) -> None:
+        old = [path.name for path in cache_dir.iterdir()]
+        _write_data(data_dir, TRIPS_CSV.replace("TR7,", "TR8,"))
+        system.load_data()
+        system.clean_data()
+
+        entries = [path.name for path in cache_dir.iterdir()]
+        assert len(old) == len(entries) == 1
+        assert entries != old
+        assert entries == [analyzer.source_fingerprint(data_dir)]
+
+    def test_unrelated_files_kept(
+        self, system: BikeShareSystem, data_dir: Path, cache_dir: Path
+    ) -> None:
+        (cache_dir / "notes.txt").write_text("keep me")
+        (cache_dir / "other-tool").mkdir()
+        (cache_dir / ("0" * 64 + ".tmp")).mkdir()  # an interrupted write
+        _write_data(data_dir, TRIPS_CSV.replace("TR7,", "TR8,"))
+        system.load_data()
+        system.clean_data()
+
+        assert sorted(path.name for path in cache_dir.iterdir()) == sorted(
+            ["notes.txt", "other-tool", analyzer.source_fingerprint(data_dir)]
+        )
+
+
+class TestStreaming:
+
+    def test_trips_match_clean_data(self, system: BikeShareSystem) -> None:
+        # chunks of three rows: TR2 repeats in the second chunk
+        streamed = pd.concat(list(system.stream_trips(chunksize=3)), ignore_index=True)
+        assert list(streamed["trip_id"]) == CLEAN_TRIP_IDS
+        for col in ("duration_minutes", "distance_km"):
+            np.testing.assert_allclose(streamed[col], system.trips[col], rtol=1e-6)
+        for col in ("user_type", "status", "start_station_id"):
+            assert list(streamed[col].astype(str)) == list(system.trips[col].astype(str)), col
+
+    def test_aggregates_match_clean_data(self, system: BikeShareSystem) -> None:
+        streamed = system.stream_aggregates(chunksize=3)
+        assert streamed.total_trips_summary() == pytest.approx(system.total_trips_summary())
+        for method in ("peak_usage_hours", "busiest_day_of_week", "monthly_trip_trend",
+                       "user_type_distribution", "status_distribution"):
+            assert getattr(streamed, method)().to_dict() == getattr(system, method)().to_dict(), method
+        assert streamed.top_routes(3).to_dict("list") == system.top_routes(3).to_dict("list")
+
+    def test_sketches_match_clean_data(self, system: BikeShareSystem) -> None:
+        sketches = system.stream_sketches(chunksize=3)
+        assert sketches.n_distinct_users() == system.trips["user_id"].nunique()
+        expected = system.top_active_users(2)
+        result = sketches.top_active_users(2)
+        assert list(result["user_id"].astype(str)) == list(expected["user_id"].astype(str))
+        assert list(result["trip_count"]) == list(expected["trip_count"])
+
+
+class TestTimeWindows:
+
+    def test_bounds(self, system: BikeShareSystem) -> None:
+        window = system.trips_between("2024-03-04 08:00", "2024-03-05 17:00")
+        # TR2 starts exactly at the start (kept), TR3 exactly at the end (not)
+        assert list(window["trip_id"]) == ["TR2", "TR4"]
+
+    def test_open_bounds_in_time_order(self, system: BikeShareSystem) -> None:
+        assert list(system.trips_between()["trip_id"]) == ["TR1", "TR2", "TR4", "TR3", "TR6", "TR7"]
+        assert list(system.trips_between(end="2024-03-05")["trip_id"]) == ["TR1", "TR2"]
+        assert list(system.trips_between(start="2024-04-01 08:00")["trip_id"]) == ["TR7"]
+
+    @pytest.mark.parametrize("start, end", [
+        ("2024-03-20", "2024-03-25"),
+        ("2024-03-05", "2024-03-04"),
+        ("2024-03-04 08:00", "2024-03-04 08:00"),
+    ])
+    def test_empty(self, system: BikeShareSystem, start: str, end: str) -> None:
+        assert system.trips_between(start, end).empty
+        assert system.analytics_for_window(start, end).n_trips == 0
+
+    def test_analytics_for_window(self, system: BikeShareSystem) -> None:
+        march = system.analytics_for_window("2024-03-01", "2024-04-01")
+        assert march.n_trips == 5
+        assert march.monthly_trip_trend().to_dict() == {pd.Period("2024-03", "M"): 5}
+        assert system.analytics_for_window("2024-03-01", "2024-04-01") is march
+
+
+class TestDistanceChecks:
+
+    def test_straight_line_km(self, system: BikeShareSystem) -> None:
+        coords = system.stations.set_index("station_id")
+        start = coords.reindex(system.trips["start_station_id"].astype(str))
+        end = coords.reindex(system.trips["end_station_id"].astype(str))
+        expected = haversine_km(start["latitude"], start["longitude"], end["latitude"], end["longitude"])
+        straight = system.trip_straight_line_km()
+        assert straight.index.equals(system.trips.index)
+        np.testing.assert_allclose(straight, expected, rtol=1e-6)
+        # TR6 ends at ST999, which is not in stations.csv
+        assert straight.isna().tolist() == [False, False, False, False, True, False]
+        assert straight.iloc[3] == 0.0  # TR4 is a round trip
+
+    def test_implausible_distances(self, system: BikeShareSystem) -> None:
+        # straight lines (km): 6.69, 7.15, 13.82, 0 (round trip), unknown, 7.15
+        too_short = system.implausible_distances(min_ratio=0.5)
+        assert too_short.tolist() == [False, False, True, False, False, True]
+        too_long = system.implausible_distances(min_ratio=0.0, max_ratio=0.5)
+        assert too_long.tolist() == [True, True, False, False, False, False]
+        assert too_long.index.equals(system.trips.index)
+
+
+class TestDurationOutliers:
+
+    @pytest.fixture
+    def grouped_system(self, data_dir: Path) -> BikeShareSystem:
+        """40 casual trips of ~60 min and 40 member trips of ~10 min, plus
+        one seeded outlier per user type (CX: 150 min, MX: 40 min)."""
+        rng = np.random.default_rng(5)
+        durations = np.concatenate([rng.normal(60, 5, 40), [150.0], rng.normal(10, 1, 40), [40.0]])
+        user_types = ["casual"] * 41 + ["member"] * 41
+        ids = [f"C{i}" for i in range(40)] + ["CX"] + [f"M{i}" for i in range(40)] + ["MX"]
+        start = pd.Timestamp("2024-03-04 08:00") + pd.to_timedelta(np.arange(82), unit="h")
+        pd.DataFrame({
+            "trip_id": ids,
+            "user_id": [f"U{i % 7}" for i in range(82)],
+            "user_type": user_types,
+            "bike_id": "B1",
+            "bike_type": "classic",
+            "start_station_id": "ST100",
+            "end_station_id": "ST101",
+            "start_time": start.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_time": (start + pd.to_timedelta(durations, unit="min")).strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_minutes": durations.round(1),
+            "distance_km": 7.0,
+            "status": "completed",
+        }).to_csv(data_dir / "trips.csv", index=False)
+        system = BikeShareSystem(cache_dir=None)
+        system.load_data()
+        system.clean_data()
+        return system
+
+    @pytest.mark.parametrize("method", ["mad", "iqr", "zscore"])
+    def test_seeded_outlier_per_group(self, grouped_system: BikeShareSystem, method: str) -> None:
+        flagged = grouped_system.duration_outliers(method, by="user_type")
+        assert flagged.index.equals(grouped_system.trips.index)
+        assert set(grouped_system.trips["trip_id"][flagged]) == {"CX", "MX"}
+
+    def test_groups_change_the_thresholds(self, grouped_system: BikeShareSystem) -> None:
+        # 40 min is typical overall (between the two groups), not for a member
+        flagged = grouped_system.duration_outliers("mad")
+        assert "MX" not in set(grouped_system.trips["trip_id"][flagged])
+
+
+class TestPartitions:
+
+    METHODS = [
+        "total_trips_summary", "peak_usage_hours", "busiest_day_of_week", "monthly_trip_trend",
+        "avg_distance_by_user_type", "top_active_users", "top_routes", "user_type_distribution",
+        "status_distribution", "longest_trips",
+    ]
+
+    @pytest.fixture
+    def partitions(self, tmp_path: Path) -> Path:
+        """The rows of TRIPS_CSV over three files that repeat some rows."""
+        header, *rows = TRIPS_CSV.splitlines()
+        directory = tmp_path / "partitions"
+        directory.mkdir()
+        for i, part in enumerate([rows[0:3], rows[2:6], rows[5:8] + rows[:1]]):
+            (directory / f"day-{i}.csv").write_text("\n".join([header, *part]) + "\n")
+        return directory
+
+    def test_matches_clean_data(self, system: BikeShareSystem, partitions: Path) -> None:
+        expected = {method: getattr(system, method)() for method in self.METHODS}
+        aggregates = system.aggregate_partitions(partitions, workers=2)
+        assert aggregates.n_trips == len(CLEAN_TRIP_IDS)
+        for method, value in expected.items():
+            result = getattr(system, method)()
+            if isinstance(value, dict):
+                assert result == pytest.approx(value), method
+            else:
+                assert pd.DataFrame(result).to_dict() == pd.DataFrame(value).to_dict(), method
+
+    def test_trip_level_queries_need_trips(
+        self, system: BikeShareSystem, partitions: Path, tmp_path: Path
+    ) -> None:
+        system.aggregate_partitions(partitions, workers=2)
+        assert system.trips is None
+        batch = tmp_path / "batch.csv"
+        batch.write_text(BATCH_CSV)
+        for query in (
+            lambda: system.longest_trips(50),
+            lambda: system.trips_between("2024-03-01", "2024-04-01"),
+            lambda: system.trip_fares(),
+            lambda: system.duration_outliers(),
+            lambda: system.append_trips(batch),
+        ):
+            with pytest.raises(RuntimeError, match="partitions"):
+                query()
+
+        assert system.load_cached()
+        assert len(system.trips_between("2024-03-01", "2024-04-01")) == 5
+
+
+class TestResultCache:
+
+    def test_hit(self, system: BikeShareSystem) -> None:
+        assert system.top_routes(2) is system.top_routes(2)
+        assert system.top_routes(2) is system.top_routes(n=2)
+        assert system.top_routes(2) is not system.top_routes(3)
+
+    @pytest.mark.parametrize("reload", ["load_data", "clean_data", "invalidate"])
+    def test_invalidated(self, system: BikeShareSystem, reload: str) -> None:
+        costs = system.maintenance_cost_by_bike_type()
+        getattr(system, reload)()
+        assert not system._result_cache
+        assert system.maintenance_cost_by_bike_type() is not costs
+
+    def test_invalidated_by_append(self, system: BikeShareSystem, tmp_path: Path) -> None:
+        assert system.total_trips_summary()["total_trips"] == 6
+        batch = tmp_path / "batch.csv"
+        batch.write_text(BATCH_CSV)
+        system.append_trips(batch)
+        assert system.total_trips_summary()["total_trips"] == 8
+
+    def test_lru_bound(self, system: BikeShareSystem, cache_dir: Path) -> None:
+        small = BikeShareSystem(cache_dir=cache_dir, result_cache_size=2)
+        assert small.load_cached()
+        first, second = small.top_routes(1), small.top_routes(2)
+        assert small.top_routes(1) is first  # now the most recently used
+        small.top_routes(3)  # evicts top_routes(2)
+        assert len(small._result_cache) == 2
+        assert small.top_routes(1) is first
+        assert small.top_routes(2) is not second
+
+
+class TestAppendTrips:
+
+    @pytest.fixture
+    def batch(self, tmp_path: Path) -> Path:
+        path = tmp_path / "batch.csv"
+        path.write_text(BATCH_CSV)
+        return path
+
+    def test_stale_cube_not_reloaded(
+        self, system: BikeShareSystem, cache_dir: Path, batch: Path
+    ) -> None:
+        system.invalidate()  # the in-memory cube is no longer current
+        assert system.append_trips(batch) == 2
+
+        cached = BikeShareSystem(cache_dir=cache_dir)
+        assert cached.load_cached()
+        assert len(cached.trips) == 8
+        assert cached.peak_usage_hours().sum() == 8
+        assert cached.cube().cells.equals(TripCube.from_trips(cached.trips).cells)
+
+    def test_dedup_against_loaded_ids(self, system: BikeShareSystem, batch: Path) -> None:
+        assert system.append_trips(batch) == 2
+        assert list(system.trips["trip_id"]) == CLEAN_TRIP_IDS + ["TR8", "TR9"]
+        # the same batch again adds nothing
+        assert system.append_trips(batch) == 0
+        assert len(system.trips) == 8
+
+    def test_imputes_with_current_means(self, system: BikeShareSystem, batch: Path) -> None:
+        duration = system.trips["duration_minutes"].astype("float64").mean()
+        distance = system.trips["distance_km"].astype("float64").mean()
+        system.append_trips(batch)
+        appended = system.trips.set_index("trip_id")
+        assert appended.loc["TR8", "distance_km"] == pytest.approx(distance, rel=1e-6)
+        assert appended.loc["TR9", "duration_minutes"] == pytest.approx(duration, rel=1e-6)
+        assert appended.loc["TR9", "user_type"] == "member"
+
+    def test_incremental_matches_recompute(self, system: BikeShareSystem, batch: Path) -> None:
+        system.aggregates(), system.time_index(), system.cube()
+        system.append_trips(batch)
+        trips = system.trips
+
+        aggregates = system.aggregates()
+        expected = TripAggregates(ids=system.ids).update(trips)
+        assert aggregates.total_trips_summary() == expected.total_trips_summary()
+        for method in ("peak_usage_hours", "monthly_trip_trend", "top_routes", "top_active_users"):
+            pd.testing.assert_frame_equal(
+                pd.DataFrame(getattr(aggregates, method)()),
+                pd.DataFrame(getattr(expected, method)()),
+                check_categorical=False,
+            )
+
+        rows = np.arange(len(trips))
+        time_index = system.time_index()
+        fresh = TimeIndex.from_times(trips["start_time"].to_numpy())
+        np.testing.assert_array_equal(time_index.times, fresh.times)
+        np.testing.assert_array_equal(rows[time_index.positions()], rows[fresh.positions()])
+
+        pd.testing.assert_frame_equal(
+            system.cube().cells, TripCube.from_trips(trips).cells, check_categorical=False
+        )
+
+    def test_cache_parts(self, system: BikeShareSystem, cache_dir: Path, batch: Path) -> None:
+        system.append_trips(batch)
+        (entry,) = cache_dir.iterdir()
+        assert sorted(path.name for path in entry.glob("trips-append-*.parquet")) == [
+            "trips-append-000000.parquet"
+        ]
+
+        cached = BikeShareSystem(cache_dir=cache_dir)
+        assert cached.load_cached()
+        assert list(cached.trips["trip_id"]) == list(system.trips["trip_id"])
+        assert cached.peak_usage_hours().to_dict() == system.peak_usage_hours().to_dict()
+
+    def test_requires_cleaned_data(self, data_dir: Path, batch: Path) -> None:
+        system = BikeShareSystem(cache_dir=None)
+        with pytest.raises(RuntimeError, match="load_data"):
+            system.append_trips(batch)
+        system.load_data()
+        with pytest.raises(RuntimeError, match="clean_data"):
+            system.append_trips(batch)
+
+
+class TestPricing:
+
+    def test_trip_fares_follow_engine_changes(self, system: BikeShareSystem) -> None:
+        engine = FareEngine()
+        peak = system.trip_fares(engine).total()
+        engine.peak_hours = ()  # casual trips at 08:00 lose the peak surcharge
+        off_peak = system.trip_fares(engine).total()
+        assert off_peak < peak
+        assert off_peak == FareEngine(peak_hours=()).price(system.trips).total()
+
+    def test_billing_follows_cap_changes(self, system: BikeShareSystem) -> None:
+        caps = FareCaps()
+        uncapped = system.billing(caps).total()
+        caps.daily_cap = 1.0
+        capped = system.billing(caps)
+        assert capped.total() < uncapped
+        assert capped.total() == FareCaps(daily_cap=1.0).bill(
+            system.trips, system.trip_fares().fares.to_numpy()
+        ).total()
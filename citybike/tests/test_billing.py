@@ -0,0 +1,129 @@
+"""
+Unit tests for the billing module.
+
+Covers:
+    - cap_cumulative (running totals capped per group)
+    - FareCaps daily/weekly caps and day passes
+    - Billing statements (per user-day, per user)
+"""
+
+import numpy as np
+import pandas as pd
+
+from billing import FareCaps, cap_cumulative
+
+
+def _trips() -> pd.DataFrame:
+    """A: three trips on Mon 2024-01-01 and one on Tuesday; B: two on Monday (shuffled)."""
+    return pd.DataFrame({
+        "user_id": pd.Categorical(["A", "B", "A", "A", "B", "A"]),
+        "user_type": pd.Categorical(["casual", "member", "casual", "casual", "member", "casual"]),
+        "start_time": pd.to_datetime([
+            "2024-01-01 10:00", "2024-01-01 09:00", "2024-01-01 08:00",
+            "2024-01-02 08:00", "2024-01-01 12:00", "2024-01-01 09:00",
+        ]),
+    })
+
+
+# per trip above: A Mon 10:00, B, A Mon 08:00, A Tue, B, A Mon 09:00
+FARES = np.array([3.0, 1.0, 4.0, 2.0, 1.0, 5.0])
+
+
+class TestCapCumulative:
+
+    def test_caps_each_group(self) -> None:
+        charged = cap_cumulative(np.array([4.0, 5.0, 3.0, 2.0, 9.0]), np.array([0, 3]), 10.0)
+        np.testing.assert_allclose(charged, [4.0, 5.0, 1.0, 2.0, 8.0])
+
+    def test_no_cap_reached(self) -> None:
+        amounts = np.array([1.0, 2.0, 3.0])
+        np.testing.assert_allclose(cap_cumulative(amounts, np.array([0]), 100.0), amounts)
+
+
+class TestFareCaps:
+
+    def test_no_caps(self) -> None:
+        billing = FareCaps().bill(_trips(), FARES)
+        np.testing.assert_allclose(billing.charged, FARES)
+        assert billing.savings() == 0
+
+    def test_daily_cap(self) -> None:
+        billing = FareCaps(daily_cap=10.0).bill(_trips(), FARES)
+        # A on Monday: 4 + 5 reach 9, the 10:00 trip pays the last 1
+        np.testing.assert_allclose(billing.charged, [1.0, 1.0, 4.0, 2.0, 1.0, 5.0])
+        assert billing.total() == 14.0
+        assert billing.savings() == 2.0
+
+    def test_weekly_cap(self) -> None:
+        billing = FareCaps(daily_cap=10.0, weekly_cap=11.0).bill(_trips(), FARES)
+        np.testing.assert_allclose(billing.charged, [1.0, 1.0, 4.0, 1.0, 1.0, 5.0])
+
+    def test_day_pass(self) -> None:
+        billing = FareCaps(day_pass_price=6.0).bill(_trips(), FARES)
+        np.testing.assert_allclose(billing.charged, [0.0, 1.0, 4.0, 2.0, 1.0, 2.0])
+        per_user = billing.by_user()
+        assert per_user.loc["A", "day_pass_count"] == 1
+        assert per_user.loc["B", "day_pass_count"] == 0
+
+    def test_day_pass_with_weekly_cap(self) -> None:
+        # A's Monday is capped at the pass price (6), which fits a weekly cap of 7
+        billing = FareCaps(weekly_cap=7.0, day_pass_price=6.0).bill(_trips(), FARES)
+        np.testing.assert_allclose(billing.charged, [0.0, 1.0, 4.0, 1.0, 1.0, 2.0])
+        assert billing.by_user().loc["A", "day_pass_count"] == 1
+
+        # a weekly cap of 4 leaves Monday below the pass price: no pass bought
+        billing = FareCaps(weekly_cap=4.0, day_pass_price=6.0).bill(_trips(), FARES)
+        np.testing.assert_allclose(billing.charged, [0.0, 1.0, 4.0, 0.0, 1.0, 0.0])
+        assert billing.by_user().loc["A", "day_pass_count"] == 0
+        assert not billing.daily["day_pass"].any()
+
+    def test_lower_daily_cap_beats_day_pass(self) -> None:
+        billing = FareCaps(daily_cap=5.0, day_pass_price=6.0).bill(_trips(), FARES)
+        np.testing.assert_allclose(billing.charged, [0.0, 1.0, 4.0, 2.0, 1.0, 1.0])
+        assert not billing.daily["day_pass"].any()
+
+    def test_user_types(self) -> None:
+        billing = FareCaps(daily_cap=1.0, user_types=["casual"]).bill(_trips(), FARES)
+        # members (B) keep their full fares
+        np.testing.assert_allclose(billing.charged, [0.0, 1.0, 1.0, 1.0, 1.0, 0.0])
+
+    def test_nan_fares(self) -> None:
+        fares = FARES.copy()
+        fares[2] = np.nan
+        billing = FareCaps(daily_cap=6.0).bill(_trips(), fares)
+        assert np.isnan(billing.charged.iloc[2])
+        # A on Monday without the unpriced trip: 5 at 09:00, then 1 of the 3
+        np.testing.assert_allclose(billing.charged.iloc[[0, 5]], [1.0, 5.0])
+
+    def test_daily_statement(self) -> None:
+        daily = FareCaps(daily_cap=10.0).bill(_trips(), FARES).daily
+        assert list(daily.columns) == ["user_id", "date", "trips", "fares", "charged", "day_pass"]
+        assert daily[["trips", "fares", "charged"]].to_numpy().tolist() == [
+            [3, 12.0, 10.0], [1, 2.0, 2.0], [2, 2.0, 2.0],
+        ]
+        assert list(daily["user_id"]) == ["A", "A", "B"]
+
+    def test_matches_loop_reference(self) -> None:
+        rng = np.random.default_rng(7)
+        n = 3000
+        trips = pd.DataFrame({
+            "user_id": pd.Categorical.from_codes(rng.integers(0, 50, n), [f"U{i}" for i in range(50)]),
+            "user_type": "casual",
+            "start_time": pd.Timestamp("2024-03-01") + pd.to_timedelta(rng.integers(0, 30 * 86400, n), unit="s"),
+        })
+        fares = rng.gamma(2.0, 2.0, n)
+        charged = FareCaps(daily_cap=12.0, weekly_cap=40.0).bill(trips, fares).charged
+
+        expected = pd.Series(0.0, index=trips.index)
+        for _, group in trips.assign(fare=fares).sort_values("start_time").groupby("user_id", observed=True):
+            week_total = {}
+            for _, day in group.groupby(group["start_time"].dt.normalize()):
+                day_total = 0.0
+                week = day["start_time"].iloc[0].to_period("W-SUN")
+                for i, fare in day["fare"].items():
+                    pay = min(fare, max(12.0 - day_total, 0.0))
+                    day_total += pay
+                    pay = min(pay, max(40.0 - week_total.get(week, 0.0), 0.0))
+                    week_total[week] = week_total.get(week, 0.0) + pay
+                    expected[i] = pay
+        np.testing.assert_allclose(charged, expected, atol=1e-9)
@@ -0,0 +1,58 @@
+"""
+Unit tests for the cube module.
+
+Covers:
+    - TripCube.from_trips / concat (cells and measures)
+    - TripCube.rollup (dimensions, derived dimensions, filters)
+    - Analytics results matching TripAggregates
+"""
+
+import pandas as pd
+import pytest
+
+from aggregates import TripAggregates
+from cube import TripCube
+
+
+class TestTripCube:
+
+    def test_cells(self, trips: pd.DataFrame) -> None:
+        cube = TripCube.from_trips(trips)
+        assert len(cube) == 5
+        assert cube.cells["trip_count"].sum() == 5
+        assert cube.cells["distance_km"].sum() == pytest.approx(16.0)
+
+    def test_concat_matches_whole(self, trips: pd.DataFrame) -> None:
+        whole = TripCube.from_trips(trips)
+        parts = TripCube.concat([TripCube.from_trips(trips.iloc[:2]), TripCube.from_trips(trips.iloc[2:])])
+        pd.testing.assert_frame_equal(parts.cells, whole.cells, check_categorical=False)
+
+    def test_missing_keys_counted(self, trips: pd.DataFrame) -> None:
+        trips.loc[0, "start_station_id"] = None
+        trips.loc[1, "user_type"] = None
+        trips.loc[2, "bike_type"] = None
+        cube = TripCube.from_trips(trips)
+        for by in (["hour"], ["weekday"], ["month"], []):
+            assert cube.rollup(by)["trip_count"].sum() == len(trips)
+        parts = TripCube.concat([TripCube.from_trips(trips.iloc[:3]), TripCube.from_trips(trips.iloc[3:])])
+        assert parts.peak_usage_hours().sum() == len(trips)
+        assert parts.cells["distance_km"].sum() == pytest.approx(16.0)
+
+    def test_rollup(self, trips: pd.DataFrame) -> None:
+        cube = TripCube.from_trips(trips)
+        by_station = cube.rollup(["start_station_id"])["trip_count"]
+        assert by_station.to_dict() == {"S1": 4, "S2": 1}
+        members = cube.rollup(["month"], user_type="member")["trip_count"]
+        assert list(members) == [2, 1]
+        total = cube.rollup(hour=[8, 17])
+        assert total["trip_count"].iloc[0] == 4
+        assert total["duration_minutes"].iloc[0] == pytest.approx(65.0)
+
+    @pytest.mark.parametrize(
+        "method",
+        ["peak_usage_hours", "busiest_day_of_week", "monthly_trip_trend", "avg_distance_by_user_type"],
+    )
+    def test_matches_aggregates(self, method: str, trips: pd.DataFrame) -> None:
+        expected = getattr(TripAggregates().update(trips), method)()
+        result = getattr(TripCube.from_trips(trips), method)()
+        assert result.to_dict() == expected.to_dict()
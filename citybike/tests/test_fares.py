@@ -0,0 +1,112 @@
+"""
+Unit tests for the fares module.
+
+Covers:
+    - FareEngine strategy codes and per-trip fares
+    - Non-linear strategies and unknown user types
+    - TripFares revenue roll-ups
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fares import FareEngine, TripFares, default_strategies
+from numerical import calculate_fares_by_code
+from pricing import PricingStrategy
+
+# member 08:00, casual 08:30 (peak), member 17:00, casual 08:15 (peak), member 12:00
+EXPECTED_FARES = [0.90, 8.85, 1.75, 2.775, 5.10]
+
+
+class TestFareEngine:
+
+    def test_strategy_codes(self, trips: pd.DataFrame) -> None:
+        engine = FareEngine()
+        assert engine.labels[1] == ("casual", True)
+        np.testing.assert_array_equal(engine.strategy_codes(trips), [3, 1, 3, 1, 2])
+
+    def test_codes_from_start_time(self, trips: pd.DataFrame) -> None:
+        trips = trips.drop(columns=["hour"])
+        np.testing.assert_array_equal(FareEngine().strategy_codes(trips), [3, 1, 3, 1, 2])
+
+    def test_fares(self, trips: pd.DataFrame) -> None:
+        np.testing.assert_allclose(FareEngine().fares(trips), EXPECTED_FARES)
+
+    def test_matches_strategies(self, trips: pd.DataFrame) -> None:
+        engine = FareEngine(peak_hours=[8])
+        codes = engine.strategy_codes(trips)
+        fares = engine.fares(trips)
+        for code, key in enumerate(engine.labels):
+            rows = codes == code
+            expected = engine.strategies[key].calculate_costs(
+                trips["duration_minutes"].to_numpy()[rows], trips["distance_km"].to_numpy()[rows]
+            )
+            np.testing.assert_allclose(fares[rows], expected)
+
+    def test_nonlinear_strategy(self, trips: pd.DataFrame) -> None:
+        class FlatPricing(PricingStrategy):
+            def calculate_cost(self, duration_minutes, distance_km):
+                return 3.0
+
+        strategies = default_strategies()
+        strategies[("member", False)] = FlatPricing()
+        fares = FareEngine(strategies).fares(trips)
+        np.testing.assert_allclose(fares, [0.90, 8.85, 1.75, 2.775, 3.0])
+
+    def test_unknown_user_type(self, trips: pd.DataFrame) -> None:
+        trips["user_type"] = ["member", "staff", "member", "casual", "member"]
+        fares = FareEngine().fares(trips)
+        assert np.isnan(fares[1])
+        assert not np.isnan(np.delete(fares, 1)).any()
+
+    def test_missing_strategy(self) -> None:
+        strategies = default_strategies()
+        del strategies[("member", True)]
+        with pytest.raises(ValueError):
+            FareEngine(strategies)
+
+
+class TestCalculateFaresByCode:
+
+    def test_gathers_rates(self) -> None:
+        fares = calculate_fares_by_code(
+            np.array([1, 0, -1]), np.array([10.0, 10.0, 10.0]), np.array([2.0, 2.0, 2.0]),
+            unlock_fees=np.array([1.0, 0.0]), per_minute=np.array([0.15, 0.08]),
+            per_km=np.array([0.10, 0.05]),
+        )
+        np.testing.assert_allclose(fares, [0.9, 2.7, np.nan])
+
+
+class TestTripFares:
+
+    @pytest.fixture
+    def fares(self, trips: pd.DataFrame) -> TripFares:
+        return FareEngine().price(trips)
+
+    def test_fares_series(self, fares: TripFares) -> None:
+        assert fares.fares.name == "fare"
+        np.testing.assert_allclose(fares.fares.to_numpy(), EXPECTED_FARES)
+        assert fares.total() == pytest.approx(19.38, abs=0.01)
+
+    def test_by_user_type(self, fares: TripFares) -> None:
+        revenue = fares.by_user_type()
+        assert list(revenue.index) == ["casual", "member"]
+        assert list(revenue["trip_count"]) == [2, 3]
+        np.testing.assert_allclose(revenue["revenue"], [11.62, 7.75], atol=0.01)
+
+    def test_by_station(self, fares: TripFares) -> None:
+        revenue = fares.by_station()
+        assert revenue.index.name == "start_station_id"
+        assert revenue["revenue"].to_dict() == pytest.approx({"S1": 17.62, "S2": 1.75}, abs=0.01)
+
+    def test_by_month(self, fares: TripFares) -> None:
+        revenue = fares.by_month()
+        assert list(revenue.index) == [pd.Period("2024-01", "M"), pd.Period("2024-02", "M")]
+        np.testing.assert_allclose(revenue["revenue"], [11.5, 7.88], atol=0.01)
+
+    def test_by_strategy(self, fares: TripFares) -> None:
+        revenue = fares.by_strategy()
+        assert revenue["trip_count"].to_dict() == {
+            ("casual", True): 2, ("member", False): 1, ("member", True): 2,
+        }
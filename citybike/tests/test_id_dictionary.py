@@ -0,0 +1,52 @@
+"""
+Unit tests for the id_dictionary module.
+
+Covers:
+    - IdDictionary (append-only int32 codes, decode, remap)
+    - encode_id_columns (shared coding across frames)
+"""
+
+import numpy as np
+import pandas as pd
+
+from id_dictionary import IdDictionary, encode_id_columns, new_id_dictionaries
+
+
+class TestIdDictionary:
+
+    def test_codes_are_stable(self) -> None:
+        ids = IdDictionary()
+        first = ids.encode(pd.Series(["ST2", "ST1", "ST2"]))
+        second = ids.encode(pd.Series(["ST3", "ST1"]))
+        assert first.dtype == np.int32
+        assert list(first) == [0, 1, 0]
+        assert list(second) == [2, 1]
+        assert list(ids.decode(np.array([2, 0]))) == ["ST3", "ST2"]
+
+    def test_categorical_and_missing(self) -> None:
+        ids = IdDictionary(["U1"])
+        codes = ids.encode(pd.Series(pd.Categorical(["U2", None, "U1"])))
+        assert list(codes) == [1, -1, 0]
+        assert len(ids) == 2
+
+    def test_remap(self) -> None:
+        ours = IdDictionary(["A", "B"])
+        theirs = IdDictionary(["C", "A"])
+        assert list(ours.remap(theirs)) == [2, 0]
+        assert list(ours.remap(ours)) == [0, 1, 2]
+
+
+class TestEncodeIdColumns:
+
+    def test_shared_station_codes(self) -> None:
+        dictionaries = new_id_dictionaries()
+        stations = encode_id_columns(pd.DataFrame({"station_id": ["S1", "S2"]}), dictionaries)
+        trips = encode_id_columns(pd.DataFrame({
+            "start_station_id": pd.Categorical(["S2", "S3"]),
+            "end_station_id": ["S1", "S2"],
+            "user_id": ["U9", "U9"],
+        }), dictionaries)
+        assert list(stations["station_id"].cat.codes) == [0, 1]
+        assert list(trips["start_station_id"].cat.codes) == [1, 2]
+        assert list(trips["end_station_id"].cat.codes) == [0, 1]
+        assert list(trips["user_id"].astype(str)) == ["U9", "U9"]
@@ -3,12 +3,36 @@ Unit tests for the numerical module.
 
 Covers:
     - trip_duration_stats (partially implemented — mean, median, std)
+    - RunningStats (chunked and merged statistics)
+    - station_distance_matrix (blocked, float32, condensed, memory-mapped)
+    - haversine_km / station_haversine_matrix
+    - robust, grouped and streaming outlier detection
+    - time_codes
+    - top_k_indices
 """
 
 import pytest
 import numpy as np
 
-from numerical import trip_duration_stats
+import pandas as pd
+
+from numerical import (
+    GroupedRunningStats,
+    RunningStats,
+    condensed_index,
+    detect_outliers_grouped,
+    detect_outliers_iqr,
+    detect_outliers_mad,
+    detect_outliers_zscore,
+    group_quantiles,
+    haversine_km,
+    radix_argsort,
+    station_distance_matrix,
+    station_haversine_matrix,
+    time_codes,
+    top_k_indices,
+    trip_duration_stats,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -47,3 +71,225 @@ class TestTripDurationStats:
         stats = trip_duration_stats(durations)
         for val in stats.values():
             assert isinstance(val, float)
+
+
+    def test_percentiles(self) -> None:
+        durations = np.array([40.0, 10.0, 30.0, 20.0, 50.0])
+        stats = trip_duration_stats(durations)
+        assert stats["p25"] == pytest.approx(20.0)
+        assert stats["p75"] == pytest.approx(40.0)
+        assert stats["p90"] == pytest.approx(46.0)
+
+
+class TestRunningStats:
+
+    def test_chunks_match_numpy(self) -> None:
+        values = np.random.default_rng(0).gamma(2.0, 12.0, 1000)
+        stats = RunningStats()
+        for chunk in np.array_split(values, 7):
+            stats.update(chunk)
+        assert stats.count == 1000
+        assert stats.mean == pytest.approx(np.mean(values))
+        assert stats.std == pytest.approx(np.std(values))
+        assert (stats.min, stats.max) == (values.min(), values.max())
+
+    def test_merge(self) -> None:
+        values = np.array([1.0, 2.0, 3.0, 4.0, 100.0])
+        merged = RunningStats().update(values[:2]).merge(RunningStats().update(values[2:]))
+        assert merged.mean == pytest.approx(np.mean(values))
+        assert merged.variance == pytest.approx(np.var(values))
+
+    def test_empty(self) -> None:
+        stats = RunningStats().update(np.array([]))
+        assert stats.count == 0
+        assert np.isnan(stats.mean)
+        assert RunningStats().merge(stats).count == 0
+
+
+# ---------------------------------------------------------------------------
+# station_distance_matrix
+# ---------------------------------------------------------------------------
+
+class TestStationDistanceMatrix:
+
+    def setup_method(self) -> None:
+        rng = np.random.default_rng(0)
+        self.lat = rng.uniform(40.0, 41.0, 50)
+        self.lon = rng.uniform(-74.0, -73.0, 50)
+        self.expected = np.sqrt(
+            (self.lat[:, None] - self.lat[None, :]) ** 2
+            + (self.lon[:, None] - self.lon[None, :]) ** 2
+        )
+
+    def test_blocks_match_broadcasting(self) -> None:
+        result = station_distance_matrix(self.lat, self.lon, block_rows=7)
+        np.testing.assert_array_equal(result, self.expected)
+
+    def test_float32_condensed(self) -> None:
+        result = station_distance_matrix(
+            self.lat, self.lon, dtype=np.float32, condensed=True, block_rows=9
+        )
+        i, j = np.triu_indices(50, k=1)
+        assert result.dtype == np.float32
+        assert result.shape == (50 * 49 // 2,)
+        np.testing.assert_allclose(result, self.expected[i, j], rtol=1e-6)
+        np.testing.assert_array_equal(condensed_index(50, j, i), np.arange(len(i)))
+
+    def test_memory_mapped_output(self, tmp_path) -> None:
+        path = tmp_path / "distances.npy"
+        result = station_distance_matrix(self.lat, self.lon, path=path)
+        assert isinstance(result, np.memmap)
+        np.testing.assert_array_equal(np.load(path), self.expected)
+
+
+class TestHaversine:
+
+    def test_known_distances(self) -> None:
+        # one degree of longitude on the equator; New York → London
+        km = haversine_km(
+            np.array([0.0, 40.7128]), np.array([0.0, -74.0060]),
+            np.array([0.0, 51.5074]), np.array([1.0, -0.1278]),
+        )
+        np.testing.assert_allclose(km, [111.195, 5570.2], rtol=1e-4)
+
+    def test_blocks_and_dtype(self) -> None:
+        rng = np.random.default_rng(1)
+        lat1, lat2 = rng.uniform(48.0, 49.0, (2, 100))
+        lon1, lon2 = rng.uniform(9.0, 10.0, (2, 100))
+        whole = haversine_km(lat1, lon1, lat2, lon2)
+        blocked = haversine_km(lat1, lon1, lat2, lon2, dtype=np.float32, block_size=7)
+        assert blocked.dtype == np.float32
+        np.testing.assert_allclose(blocked, whole, rtol=1e-6)
+
+    def test_matrix_matches_row_wise(self) -> None:
+        rng = np.random.default_rng(2)
+        lat = rng.uniform(48.0, 49.0, 30)
+        lon = rng.uniform(9.0, 10.0, 30)
+        condensed = station_haversine_matrix(lat, lon, condensed=True, block_rows=4)
+        i, j = np.triu_indices(30, k=1)
+        np.testing.assert_allclose(condensed, haversine_km(lat[i], lon[i], lat[j], lon[j]))
+        full = station_haversine_matrix(lat, lon)
+        np.testing.assert_allclose(full, full.T)
+        assert np.all(np.diag(full) == 0)
+
+
+# ---------------------------------------------------------------------------
+# time_codes
+# ---------------------------------------------------------------------------
+
+class TestTimeCodes:
+
+    def setup_method(self) -> None:
+        self.times = pd.to_datetime([
+            "1969-12-31 23:59:00", "2024-02-29 18:00:00", "2024-11-19 16:55:00",
+        ])
+        self.hour, self.weekday, self.month = time_codes(self.times.to_numpy())
+
+    def test_matches_pandas_accessors(self) -> None:
+        assert list(self.hour) == list(self.times.hour)
+        assert list(self.weekday) == list(self.times.dayofweek)
+
+    def test_month_is_period_ordinal(self) -> None:
+        expected = [p.ordinal for p in self.times.to_period("M")]
+        assert list(self.month) == expected
+
+    def test_compact_dtypes(self) -> None:
+        assert self.hour.dtype == np.uint8
+        assert self.weekday.dtype == np.uint8
+        assert self.month.dtype == np.int16
+
+
+# ---------------------------------------------------------------------------
+# top_k_indices
+# ---------------------------------------------------------------------------
+
+class TestTopKIndices:
+
+    def test_largest_first(self) -> None:
+        values = np.array([3.0, 9.0, 1.0, 7.0, 5.0])
+        assert list(top_k_indices(values, 3)) == [1, 3, 4]
+
+    def test_ties_prefer_earliest(self) -> None:
+        values = np.array([2, 5, 5, 1, 5])
+        assert list(top_k_indices(values, 2)) == [1, 2]
+
+    def test_k_larger_than_n(self) -> None:
+        assert list(top_k_indices(np.array([1, 3, 2]), 10)) == [1, 2, 0]
+
+    def test_k_zero_and_empty(self) -> None:
+        assert len(top_k_indices(np.array([1, 2]), 0)) == 0
+        assert len(top_k_indices(np.array([]), 3)) == 0
+
+    def test_matches_pandas_nlargest(self) -> None:
+        rng = np.random.default_rng(0)
+        values = rng.integers(0, 20, 500)
+        expected = pd.Series(values).nlargest(25, keep="first").index
+        assert list(top_k_indices(values, 25)) == list(expected)
+
+
+class TestRadixArgsort:
+
+    @pytest.mark.parametrize("high", [100, 70_000, 1 << 40])
+    def test_matches_stable_argsort(self, high: int) -> None:
+        keys = np.random.default_rng(1).integers(-5, high, 2000)
+        np.testing.assert_array_equal(radix_argsort(keys), np.argsort(keys, kind="stable"))
+
+    def test_empty(self) -> None:
+        assert len(radix_argsort(np.array([], dtype=np.int64))) == 0
+
+
+# ---------------------------------------------------------------------------
+# Outlier detection
+# ---------------------------------------------------------------------------
+
+class TestOutliers:
+
+    def setup_method(self) -> None:
+        rng = np.random.default_rng(3)
+        self.groups = rng.integers(0, 5, 2000)
+        self.values = rng.normal(10.0, 1.0, 2000) + 20.0 * self.groups
+        self.values[::250] += 15.0
+
+    def test_robust_methods(self) -> None:
+        values = np.array([10.0, 11.0, 9.0, 10.5, 9.5, 10.0, 100.0])
+        assert list(np.flatnonzero(detect_outliers_mad(values))) == [6]
+        assert list(np.flatnonzero(detect_outliers_iqr(values))) == [6]
+        assert not detect_outliers_mad(np.full(5, 3.0)).any()
+
+    def test_group_quantiles(self) -> None:
+        result = group_quantiles(self.values, self.groups, [0.25, 0.5, 0.9], n_groups=6)
+        for g in range(5):
+            np.testing.assert_allclose(
+                result[g], np.percentile(self.values[self.groups == g], [25, 50, 90])
+            )
+        assert np.isnan(result[5]).all()
+
+    @pytest.mark.parametrize(
+        "method, detect",
+        [("zscore", detect_outliers_zscore), ("mad", detect_outliers_mad), ("iqr", detect_outliers_iqr)],
+    )
+    def test_grouped_matches_per_group(self, method, detect) -> None:
+        flagged = detect_outliers_grouped(self.values, self.groups, method)
+        for g in range(5):
+            mask = self.groups == g
+            np.testing.assert_array_equal(flagged[mask], detect(self.values[mask]))
+
+    def test_grouped_labels_and_missing(self) -> None:
+        labels = pd.Series(pd.Categorical(np.where(self.groups == 0, None, self.groups.astype(str))))
+        flagged = detect_outliers_grouped(self.values, labels, "mad")
+        assert not flagged[self.groups == 0].any()
+        with pytest.raises(ValueError):
+            detect_outliers_grouped(self.values, self.groups, "median")
+
+    def test_streaming_matches_batch(self) -> None:
+        left, right = GroupedRunningStats(), GroupedRunningStats()
+        for start in range(0, 900, 300):
+            left.update(self.values[start : start + 300], self.groups[start : start + 300])
+        right.update(self.values[900:], self.groups[900:])
+        stats = left.merge(right)
+        for g in range(5):
+            assert stats.std[g] == pytest.approx(np.std(self.values[self.groups == g]))
+        np.testing.assert_array_equal(
+            stats.outliers(self.values, self.groups),
+            detect_outliers_grouped(self.values, self.groups, "zscore"),
+        )
@@ -0,0 +1,91 @@
+"""
+Unit tests for the od_matrix module.
+
+Covers:
+    - station_codes (shared integer coding of start/end stations)
+    - ODMatrix in dense and sparse mode (top routes, flows, merge)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import od_matrix
+from od_matrix import ODMatrix, station_codes
+
+
+def _trips() -> pd.DataFrame:
+    return pd.DataFrame({
+        "start_station_id": pd.Categorical(["S1", "S1", "S2", "S1", "S3", "S2"]),
+        "end_station_id": pd.Categorical(["S2", "S2", "S1", "S2", "S4", "S1"]),
+    })
+
+
+@pytest.fixture(params=["dense", "sparse"])
+def mode(request, monkeypatch) -> str:
+    if request.param == "sparse":
+        monkeypatch.setattr(od_matrix, "DENSE_MAX_CELLS", 0)
+    return request.param
+
+
+class TestStationCodes:
+
+    def test_shared_sorted_coding(self) -> None:
+        trips = _trips()
+        stations, start, end = station_codes(trips["start_station_id"], trips["end_station_id"])
+        assert list(stations) == ["S1", "S2", "S3", "S4"]
+        assert list(stations[start]) == list(trips["start_station_id"])
+        assert list(stations[end]) == list(trips["end_station_id"])
+
+    def test_missing_stations(self) -> None:
+        stations, start, end = station_codes(
+            pd.Series(["S1", None, "S2"], dtype="category"),
+            pd.Series(["S2", "S1", None], dtype="category"),
+        )
+        assert list(stations) == ["S1", "S2"]
+        assert list(start) == [0, -1, 1]
+        assert list(end) == [1, 0, -1]
+
+
+class TestODMatrix:
+
+    def test_storage_mode(self, mode: str) -> None:
+        matrix = ODMatrix.from_trips(_trips())
+        assert matrix.is_dense == (mode == "dense")
+
+    def test_top_routes(self, mode: str) -> None:
+        top = ODMatrix.from_trips(_trips()).top_routes(2)
+        assert list(top.itertuples(index=False, name=None)) == [
+            ("S1", "S2", 3),
+            ("S2", "S1", 2),
+        ]
+
+    def test_flows(self, mode: str) -> None:
+        matrix = ODMatrix.from_trips(_trips())
+        assert matrix.outflow().to_dict() == {"S1": 3, "S2": 2, "S3": 1, "S4": 0}
+        assert matrix.inflow().to_dict() == {"S1": 2, "S2": 3, "S3": 0, "S4": 1}
+        assert matrix.net_flow().sum() == 0
+
+    def test_merge_matches_whole(self, mode: str) -> None:
+        trips = _trips()
+        whole = ODMatrix.from_trips(trips)
+        merged = ODMatrix.from_trips(trips.iloc[:3]).merge(ODMatrix.from_trips(trips.iloc[3:]))
+        assert merged.route_counts().to_dict() == whole.route_counts().to_dict()
+
+    def test_missing_stations_not_counted(self, mode: str) -> None:
+        trips = _trips()
+        trips.loc[0, "start_station_id"] = None
+        trips.loc[4, "end_station_id"] = None
+        matrix = ODMatrix.from_trips(trips)
+        expected = trips.groupby(["start_station_id", "end_station_id"], observed=True).size()
+        assert matrix.route_counts().to_dict() == expected.to_dict()
+        # no trip is attributed to the last station (S4)
+        assert matrix.inflow()["S4"] == 0
+        assert matrix.outflow().sum() == len(trips) - 2
+
+    def test_from_codes_with_weights(self) -> None:
+        stations = pd.Index(["A", "B"])
+        matrix = ODMatrix.from_codes(
+            stations, np.array([0, 1]), np.array([1, 1]), np.array([4.0, 2.0])
+        )
+        assert matrix.route_counts().to_dict() == {("A", "B"): 4, ("B", "B"): 2}
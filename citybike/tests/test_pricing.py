@@ -4,11 +4,13 @@ Unit tests for the pricing module.
 Covers:
     - CasualPricing (fully implemented)
     - PricingStrategy cannot be instantiated directly
+    - calculate_costs (batch pricing) on every strategy
 """
 
+import numpy as np
 import pytest
 
-from pricing import PricingStrategy, CasualPricing
+from pricing import PricingStrategy, CasualPricing, MemberPricing, PeakHourPricing
 
 
 # ---------------------------------------------------------------------------
@@ -57,3 +59,49 @@ class TestCasualPricing:
 
     def test_is_pricing_strategy(self) -> None:
         assert isinstance(self.pricing, PricingStrategy)
+
+
+# ---------------------------------------------------------------------------
+# calculate_costs (batch)
+# ---------------------------------------------------------------------------
+
+DURATIONS = np.array([0.0, 20.0, 60.0, 7.5], dtype=np.float32)
+DISTANCES = np.array([0.0, 5.0, 12.0, 1.25])
+
+
+class TestCalculateCosts:
+
+    @pytest.mark.parametrize("strategy", [
+        CasualPricing(),
+        MemberPricing(),
+        PeakHourPricing(),
+        PeakHourPricing(MemberPricing()),
+    ])
+    def test_matches_calculate_cost(self, strategy: PricingStrategy) -> None:
+        costs = strategy.calculate_costs(DURATIONS, DISTANCES)
+        expected = [strategy.calculate_cost(float(d), float(k)) for d, k in zip(DURATIONS, DISTANCES)]
+        assert costs.dtype == np.float64
+        np.testing.assert_allclose(costs, expected)
+
+    def test_known_casual_fares(self) -> None:
+        costs = CasualPricing().calculate_costs(np.array([20, 60]), np.array([5, 12]))
+        np.testing.assert_allclose(costs, [4.50, 11.20])
+
+    def test_peak_surcharges_base(self) -> None:
+        base = MemberPricing()
+        peak = PeakHourPricing(base)
+        np.testing.assert_allclose(
+            peak.calculate_costs(DURATIONS, DISTANCES),
+            1.5 * base.calculate_costs(DURATIONS, DISTANCES),
+        )
+
+    def test_default_falls_back_to_calculate_cost(self) -> None:
+        class FlatPricing(PricingStrategy):
+            def calculate_cost(self, duration_minutes, distance_km):
+                return 2.0 if duration_minutes > 10 else 1.0
+
+        costs = FlatPricing().calculate_costs(DURATIONS, DISTANCES)
+        np.testing.assert_array_equal(costs, [1.0, 2.0, 2.0, 1.0])
+
+    def test_empty(self) -> None:
+        assert len(CasualPricing().calculate_costs(np.array([]), np.array([]))) == 0
@@ -0,0 +1,112 @@
+"""
+Unit tests for the simulator module.
+
+Covers:
+    - scenario_grid
+    - Linear scenarios priced from per-segment sums
+    - Capped scenarios, in-process and in a process pool
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fares import FareEngine
+from numerical import calculate_fares
+from pricing import CasualPricing, MemberPricing, PeakHourPricing
+from simulator import PricingSimulator, scenario_grid
+
+
+def _expected(trips: pd.DataFrame, row: pd.Series, by: str, peak_hours) -> pd.Series:
+    """Reference revenue per segment from per-trip fares."""
+    fares = calculate_fares(
+        trips["duration_minutes"].to_numpy(),
+        trips["distance_km"].to_numpy(),
+        row["per_minute"],
+        row["per_km"],
+        row["unlock_fee"],
+    )
+    fares = fares * np.where(trips["hour"].isin(peak_hours), row["multiplier"], 1.0)
+    fares = np.minimum(fares, row["max_fare"])
+    return pd.Series(fares, index=trips.index).groupby(trips[by], observed=True).sum()
+
+
+def _random_trips(n: int = 5000, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "user_type": pd.Categorical.from_codes(rng.integers(0, 2, n), ["casual", "member"]),
+        "start_station_id": pd.Categorical.from_codes(rng.integers(0, 40, n), [f"S{i}" for i in range(40)]),
+        "hour": rng.integers(0, 24, n).astype(np.uint8),
+        "duration_minutes": rng.gamma(2.0, 12.0, n).astype(np.float32),
+        "distance_km": rng.gamma(2.0, 1.5, n).astype(np.float32),
+    })
+
+
+class TestScenarioGrid:
+
+    def test_product(self) -> None:
+        grid = scenario_grid(per_minute=[0.10, 0.15, 0.20], multiplier=[1.0, 1.5])
+        assert len(grid) == 6
+        assert list(grid.columns) == ["per_minute", "multiplier"]
+        assert grid.index.name == "scenario"
+
+    def test_unknown_parameter(self) -> None:
+        with pytest.raises(ValueError):
+            scenario_grid(per_second=[0.01])
+
+
+class TestPricingSimulator:
+
+    def test_defaults_match_strategy(self, trips: pd.DataFrame) -> None:
+        revenue = PricingSimulator(trips, base=MemberPricing()).run(pd.DataFrame(index=[0]))
+        expected = MemberPricing().calculate_costs(trips["duration_minutes"], trips["distance_km"])
+        assert revenue.loc[0, "total"] == pytest.approx(expected.sum(), abs=0.01)
+
+    def test_peak_multiplier_matches_fare_engine(self, trips: pd.DataFrame) -> None:
+        simulator = PricingSimulator(trips)
+        revenue = simulator.run(pd.DataFrame({"multiplier": [1.5]}))
+        engine = FareEngine({
+            (user_type, peak): PeakHourPricing() if peak else CasualPricing()
+            for user_type in ("casual", "member") for peak in (False, True)
+        })
+        assert revenue.loc[0, "total"] == pytest.approx(engine.fares(trips).sum(), abs=0.01)
+
+    def test_stats(self, trips: pd.DataFrame) -> None:
+        stats = PricingSimulator(trips).stats
+        # casual trips both start at 08:xx (peak); member trips at 08, 17 and 12
+        assert stats["trip_count"].to_dict() == {
+            ("casual", False): 0, ("casual", True): 2,
+            ("member", False): 1, ("member", True): 2,
+        }
+
+    @pytest.mark.parametrize("by", ["user_type", "start_station_id"])
+    def test_linear_grid(self, by: str) -> None:
+        trips = _random_trips()
+        grid = scenario_grid(
+            unlock_fee=[0.0, 1.0], per_minute=[0.08, 0.15], per_km=[0.05, 0.10], multiplier=[1.0, 1.5],
+        )
+        revenue = PricingSimulator(trips, by=by, peak_hours=[8, 17]).run(grid)
+        for scenario, row in grid.assign(max_fare=np.inf).iterrows():
+            expected = _expected(trips, row, by, [8, 17])
+            np.testing.assert_allclose(revenue.loc[scenario, expected.index], expected, atol=0.01)
+        np.testing.assert_allclose(revenue["total"], revenue.drop(columns="total").sum(axis=1), atol=0.1)
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_capped_grid(self, workers: int) -> None:
+        trips = _random_trips()
+        grid = scenario_grid(per_minute=[0.10, 0.20], multiplier=[1.0, 2.0], max_fare=[5.0, 8.0, np.inf])
+        simulator = PricingSimulator(trips, by="start_station_id", peak_hours=[8, 17])
+        revenue = simulator.run(grid, workers=workers)
+        for scenario, row in grid.assign(unlock_fee=1.0, per_km=0.10).iterrows():
+            expected = _expected(trips, row, "start_station_id", [8, 17])
+            np.testing.assert_allclose(revenue.loc[scenario, expected.index], expected, atol=0.01)
+
+    def test_unused_segments_dropped(self, trips: pd.DataFrame) -> None:
+        trips["user_type"] = trips["user_type"].cat.add_categories(["staff"])
+        simulator = PricingSimulator(trips)
+        assert list(simulator.segments) == ["casual", "member"]
+
+    def test_single_segment(self, trips: pd.DataFrame) -> None:
+        revenue = PricingSimulator(trips, by=None).run(scenario_grid(per_km=[0.0, 1.0]))
+        assert list(revenue.columns) == ["all", "total"]
+        assert revenue.loc[1, "total"] - revenue.loc[0, "total"] == pytest.approx(16.0)
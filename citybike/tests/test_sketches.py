@@ -0,0 +1,127 @@
+"""
+Unit tests for the sketches module.
+
+Covers:
+    - HeavyHitters (Misra–Gries bounds, merge)
+    - HyperLogLog (estimate accuracy, merge)
+    - QuantileSketch (relative accuracy, merge)
+    - GroupedQuantileSketch (per-group sketches, streaming MAD/IQR)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from numerical import detect_outliers_grouped, iqr_outliers, mad_outliers
+from sketches import GroupedQuantileSketch, HeavyHitters, HyperLogLog, QuantileSketch
+
+
+def _skewed_keys(n: int = 20_000, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    return pd.Series(rng.zipf(1.6, n) % 5000).astype(str)
+
+
+class TestHeavyHitters:
+
+    def test_bounds(self) -> None:
+        keys = _skewed_keys()
+        sketch = HeavyHitters(capacity=50)
+        for start in range(0, len(keys), 3000):
+            sketch.update(keys.iloc[start : start + 3000])
+
+        exact = keys.value_counts()
+        assert len(sketch.counts) <= 50
+        assert sketch.error <= len(keys) / 51
+        top = sketch.top(5)
+        assert list(top.index) == list(exact.index[:5])
+        under = exact[top.index] - top
+        assert ((under >= 0) & (under <= sketch.error)).all()
+
+    def test_merge_keeps_heavy_keys(self) -> None:
+        keys = _skewed_keys()
+        left = HeavyHitters(capacity=50).update(keys.iloc[:10_000])
+        right = HeavyHitters(capacity=50).update(keys.iloc[10_000:])
+        merged = left.merge(right)
+        assert merged.n == len(keys)
+        assert merged.top(1).index[0] == keys.value_counts().index[0]
+
+    def test_composite_keys(self) -> None:
+        pairs = pd.DataFrame({"a": ["x", "x", "y"], "b": ["1", "1", "2"]})
+        counts = HeavyHitters().update(pairs).top(1)
+        assert counts.index[0] == ("x", "1")
+        assert counts.iloc[0] == 2
+
+
+class TestHyperLogLog:
+
+    def test_estimate_within_bound(self) -> None:
+        ids = pd.Series(np.char.add("U", np.arange(50_000).astype(str)))
+        estimate = HyperLogLog(precision=12).update(ids).count()
+        # 3 standard errors at precision 12 (1.6 % each)
+        assert estimate == pytest.approx(50_000, rel=0.05)
+
+    def test_small_counts_and_merge(self) -> None:
+        left = HyperLogLog().update(pd.Series(["a", "b", "a", None]))
+        right = HyperLogLog().update(pd.Series(["b", "c"]).astype("category"))
+        assert left.count() == 2
+        assert left.merge(right).count() == 3
+
+    def test_precision_mismatch(self) -> None:
+        with pytest.raises(ValueError):
+            HyperLogLog(10).merge(HyperLogLog(12))
+
+
+class TestQuantileSketch:
+
+    def test_relative_accuracy_and_merge(self) -> None:
+        values = np.random.default_rng(1).gamma(2.0, 12.0, 50_000)
+        left = QuantileSketch(0.01).update(values[:20_000])
+        right = QuantileSketch(0.01).update(values[20_000:])
+        qs = [0.0, 0.25, 0.5, 0.9, 0.99, 1.0]
+        estimate = left.merge(right).quantiles(qs)
+        exact = np.percentile(values, np.array(qs) * 100, method="lower")
+        np.testing.assert_allclose(estimate, exact, rtol=0.01)
+
+    def test_zero_and_nan(self) -> None:
+        sketch = QuantileSketch().update(np.array([0.0, np.nan, 0.0, 10.0]))
+        assert sketch.n == 3
+        assert sketch.quantiles([0.5])[0] == 0.0
+        assert np.isnan(QuantileSketch().quantiles([0.5])[0])
+
+
+class TestGroupedQuantileSketch:
+
+    def setup_method(self) -> None:
+        rng = np.random.default_rng(4)
+        self.groups = rng.integers(0, 4, 4000)
+        self.values = rng.uniform(10.0, 20.0, 4000) + 20.0 * self.groups
+        self.values[[7, 1500, 3999]] = [500.0, 900.0, 0.0]
+
+    def _sketch(self, values: np.ndarray) -> GroupedQuantileSketch:
+        left, right = GroupedQuantileSketch(), GroupedQuantileSketch()
+        for start in range(0, 3000, 1000):
+            left.update(values[start : start + 1000], self.groups[start : start + 1000])
+        right.update(values[3000:], self.groups[3000:], n_groups=5)
+        return left.merge(right)
+
+    def test_matches_per_group_sketches(self) -> None:
+        qs = [0.0, 0.25, 0.5, 0.99, 1.0]
+        result = self._sketch(self.values).quantiles(qs)
+        assert result.shape == (5, 5)
+        for g in range(4):
+            expected = QuantileSketch().update(self.values[self.groups == g]).quantiles(qs)
+            np.testing.assert_allclose(result[g], expected)
+        assert np.isnan(result[4]).all()
+
+    def test_streaming_mad_and_iqr(self) -> None:
+        median = self._sketch(self.values).quantiles([0.5])[:, 0]
+        mad = self._sketch(np.abs(self.values - median[self.groups])).quantiles([0.5])[:, 0]
+        q1, q3 = self._sketch(self.values).quantiles([0.25, 0.75]).T
+        for method, flagged in [
+            ("mad", mad_outliers(self.values, self.groups, median, mad)),
+            ("iqr", iqr_outliers(self.values, self.groups, q1, q3)),
+        ]:
+            assert list(np.flatnonzero(flagged)) == [7, 1500, 3999]
+            np.testing.assert_array_equal(
+                flagged, detect_outliers_grouped(self.values, self.groups, method)
+            )
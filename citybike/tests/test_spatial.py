@@ -0,0 +1,94 @@
+"""
+Unit tests for the spatial module.
+
+Covers:
+    - StationIndex.nearest (k nearest, far-away points, small networks)
+    - StationIndex.radius (matches a brute-force scan)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import spatial
+from numerical import haversine_km
+from spatial import StationIndex
+
+
+@pytest.fixture
+def network() -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(0)
+    return rng.uniform(48.7, 48.9, 400), rng.uniform(9.1, 9.3, 400)
+
+
+def _brute_force(lat: np.ndarray, lon: np.ndarray, qlat: float, qlon: float) -> np.ndarray:
+    n = len(lat)
+    return haversine_km(np.full(n, qlat), np.full(n, qlon), lat, lon)
+
+
+class TestStationIndex:
+
+    def test_nearest_matches_brute_force(self, network) -> None:
+        lat, lon = network
+        rng = np.random.default_rng(1)
+        qlat = np.append(rng.uniform(48.65, 48.95, 50), 10.0)
+        qlon = np.append(rng.uniform(9.05, 9.35, 50), 9.2)
+        station, km = StationIndex(lat, lon).nearest(qlat, qlon, k=3)
+        for i in range(len(qlat)):
+            expected = np.sort(_brute_force(lat, lon, qlat[i], qlon[i]))[:3]
+            np.testing.assert_allclose(km[i], expected)
+            np.testing.assert_allclose(_brute_force(lat, lon, qlat[i], qlon[i])[station[i]], km[i])
+
+    def test_radius_matches_brute_force(self, network) -> None:
+        lat, lon = network
+        qlat, qlon = np.array([48.8, 48.75, 50.0]), np.array([9.2, 9.15, 9.2])
+        point, station, km = StationIndex(lat, lon, cell_km=0.3).radius(qlat, qlon, 1.0)
+        for i in range(len(qlat)):
+            expected = np.flatnonzero(_brute_force(lat, lon, qlat[i], qlon[i]) <= 1.0)
+            assert set(station[point == i]) == set(expected)
+            assert np.all(np.diff(km[point == i]) >= 0)
+
+    def test_non_finite_points(self, network) -> None:
+        lat, lon = network
+        index = StationIndex(lat, lon)
+        qlat, qlon = np.array([48.8, np.nan, 48.85, np.inf]), np.array([9.2, 9.2, np.nan, 9.2])
+        station, km = index.nearest(qlat, qlon, k=2)
+        assert (station[1:] == -1).all() and np.isinf(km[1:]).all()
+        np.testing.assert_allclose(km[0], np.sort(_brute_force(lat, lon, 48.8, 9.2))[:2])
+
+        point, station, km = index.radius(qlat, qlon, 1.5)
+        assert set(point) == {0}
+        assert set(station) == set(np.flatnonzero(_brute_force(lat, lon, 48.8, 9.2) <= 1.5))
+
+    @pytest.mark.parametrize("block_elements", [7, 1 << 22])
+    def test_far_and_polar_points(self, network, monkeypatch, block_elements: int) -> None:
+        # tiny blocks: the all-stations fallback runs over several blocks
+        monkeypatch.setattr(spatial, "BLOCK_ELEMENTS", block_elements)
+        lat, lon = network
+        index = StationIndex(lat, lon)
+        qlat, qlon = np.array([89.99, -89.5, 48.8, 10.0]), np.array([0.0, 120.0, 9.2, -70.0])
+        station, km = index.nearest(qlat, qlon, k=3)
+        for i in range(len(qlat)):
+            distances = _brute_force(lat, lon, qlat[i], qlon[i])
+            np.testing.assert_allclose(km[i], np.sort(distances)[:3])
+            np.testing.assert_allclose(distances[station[i]], km[i])
+
+        radius_km = 4600.0  # reaches the network from the north pole only
+        point, station, km = index.radius(qlat, qlon, radius_km)
+        for i in range(len(qlat)):
+            expected = np.flatnonzero(_brute_force(lat, lon, qlat[i], qlon[i]) <= radius_km)
+            assert set(station[point == i]) == set(expected)
+            assert np.all(np.diff(km[point == i]) >= 0)
+
+    def test_fewer_stations_than_k(self) -> None:
+        stations = pd.DataFrame({
+            "station_id": ["A", "B"], "latitude": [48.8, 48.9], "longitude": [9.1, 9.2],
+        })
+        index = StationIndex.from_stations(stations)
+        station, km = index.nearest([48.81], [9.1], k=3)
+        assert list(index.ids[station[0, :2]]) == ["A", "B"]
+        assert station[0, 2] == -1 and np.isinf(km[0, 2])
+
+    def test_empty_index(self) -> None:
+        with pytest.raises(ValueError):
+            StationIndex([], [])
@@ -0,0 +1,112 @@
+"""
+Unit tests for the tariff module.
+
+Covers:
+    - hour_of_week_codes (weekday/hour slots, holidays)
+    - Tariff rules (rates, multipliers, caps, overrides, validation)
+    - Compiled tables matching the pricing strategies and FareEngine
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fares import PEAK_HOURS, FareEngine
+from pricing import CasualPricing, PeakHourPricing
+from tariff import HOLIDAY, SLOTS, Tariff, hour_of_week_codes
+
+# Mon 08:00, Mon 08:30, Tue 17:00, Sat 08:15, Sun 12:00
+SLOTS_OF_TRIPS = [8, 8, 41, 128, 156]
+
+
+class TestHourOfWeekCodes:
+
+    def test_slots(self, trips: pd.DataFrame) -> None:
+        np.testing.assert_array_equal(hour_of_week_codes(trips), SLOTS_OF_TRIPS)
+
+    def test_from_start_time(self, trips: pd.DataFrame) -> None:
+        trips = trips.drop(columns=["hour", "weekday"])
+        np.testing.assert_array_equal(hour_of_week_codes(trips), SLOTS_OF_TRIPS)
+
+    def test_holidays(self, trips: pd.DataFrame) -> None:
+        codes = hour_of_week_codes(trips, holidays=["2024-01-01"])
+        np.testing.assert_array_equal(codes, [HOLIDAY * 24 + 8, HOLIDAY * 24 + 8, 41, 128, 156])
+
+
+class TestTariff:
+
+    def test_table_shape(self) -> None:
+        tables = Tariff().compile()
+        assert tables.user_types == ["casual", "member"]
+        assert tables.bike_types == ["classic", "electric"]
+        assert tables.tables["per_minute"].shape == (2, 2, SLOTS)
+
+    def test_base_rates_match_strategies(self, trips: pd.DataFrame) -> None:
+        fares = Tariff().compile().fares(trips)
+        np.testing.assert_allclose(fares, FareEngine(peak_hours=()).fares(trips))
+
+    def test_peak_rule_matches_fare_engine(self, trips: pd.DataFrame) -> None:
+        tariff = Tariff().set(user_type="casual", hours=PEAK_HOURS, multiplier=PeakHourPricing.MULTIPLIER)
+        np.testing.assert_allclose(tariff.compile().fares(trips), FareEngine().fares(trips))
+
+    def test_bike_type_rate(self, trips: pd.DataFrame) -> None:
+        tariff = Tariff().set(bike_type="electric", per_minute=0.25)
+        fares = tariff.compile().fares(trips)
+        # trip 2: casual electric 30 min 4 km, trip 5: member electric 60 min 6 km
+        np.testing.assert_allclose(fares[[1, 4]], [1.0 + 7.5 + 0.4, 15.0 + 0.3])
+
+    def test_weekend_cap_and_floor(self, trips: pd.DataFrame) -> None:
+        tariff = Tariff().set(days="weekend", max_fare=2.0).set(days="weekday", min_fare=1.0)
+        fares = tariff.compile().fares(trips)
+        # Mon member 0.90 raised to 1.00, Sun member 5.10 capped at 2.00
+        np.testing.assert_allclose(fares, [1.0, 5.9, 1.75, 1.85, 2.0])
+
+    def test_holiday_priced_as_weekend(self, trips: pd.DataFrame) -> None:
+        tariff = Tariff(holidays=["2024-01-01"]).set(days="weekend", unlock_fee=0.0)
+        fares = tariff.compile().fares(trips)
+        # Monday 2024-01-01 is a holiday: the casual trip loses its unlock fee
+        assert fares[1] == pytest.approx(4.9)
+        assert fares[2] == pytest.approx(1.75)
+
+    def test_later_rules_override(self, trips: pd.DataFrame) -> None:
+        tariff = Tariff().set(per_km=1.0).set(days="Sunday", hours=[12], per_km=0.0)
+        fares = tariff.compile().fares(trips)
+        assert fares[4] == pytest.approx(4.8)
+        assert fares[3] == pytest.approx(1.0 + 0.75 + 1.0)
+
+    def test_overlapping_multipliers_compound(self, trips: pd.DataFrame) -> None:
+        tariff = Tariff().set(hours=[8], multiplier=1.5).set(bike_type="electric", multiplier=2.0)
+        fares = tariff.compile().fares(trips)
+        # trip 2: casual electric at 08:30, 5.90 at base rates
+        assert fares[1] == pytest.approx(5.9 * 3.0)
+        # a later rate replaces the compounded value of its field only
+        fares = tariff.set(bike_type="electric", per_minute=0.2).compile().fares(trips)
+        assert fares[1] == pytest.approx(1.0 * 3.0 + 30 * 0.2 + 0.4 * 3.0)
+
+    def test_unknown_labels_are_nan(self, trips: pd.DataFrame) -> None:
+        trips["bike_type"] = ["classic", "cargo", "classic", "classic", "electric"]
+        fares = Tariff().compile().fares(trips)
+        assert np.isnan(fares[1])
+        assert not np.isnan(np.delete(fares, 1)).any()
+
+    def test_validation(self) -> None:
+        with pytest.raises(ValueError):
+            Tariff().set(user_type="staff")
+        with pytest.raises(ValueError):
+            Tariff().set(days="Funday")
+        with pytest.raises(ValueError):
+            Tariff().set(hours=[24])
+        with pytest.raises(ValueError):
+            Tariff().set(per_second=0.01)
+        with pytest.raises(ValueError):
+            Tariff({"casual": PeakHourPricing(CasualPricing()), "member": _Flat()})
+
+    def test_price_rolls_up_by_cell(self, trips: pd.DataFrame) -> None:
+        revenue = Tariff().compile().price(trips).by_strategy()
+        assert revenue.index.names == ["user_type", "bike_type", "hour_of_week"]
+        assert revenue["trip_count"].sum() == 5
+
+
+class _Flat(CasualPricing):
+    def rates(self):
+        return None
@@ -0,0 +1,49 @@
+"""
+Unit tests for the time_index module.
+
+Covers:
+    - TimeIndex.positions (binary-search windows, sorted and unsorted rows)
+    - TimeIndex.extend (appending rows without a full re-sort)
+"""
+
+import numpy as np
+import pandas as pd
+
+from time_index import TimeIndex
+
+
+def _times(values: list[str]) -> np.ndarray:
+    return pd.to_datetime(values).to_numpy()
+
+
+class TestTimeIndex:
+
+    def test_sorted_rows_give_a_slice(self) -> None:
+        index = TimeIndex.from_times(_times(["2024-01-01 07:00", "2024-01-01 08:00", "2024-01-01 09:00"]))
+        assert index.order is None
+        assert index.positions("2024-01-01 07:30", "2024-01-01 09:00") == slice(1, 2)
+
+    def test_unsorted_rows(self) -> None:
+        index = TimeIndex.from_times(_times([
+            "2024-01-01 09:00", "2024-01-01 07:00", "2024-01-01 08:00", "2024-01-01 07:00",
+        ]))
+        assert list(index.positions("2024-01-01 07:00", "2024-01-01 08:30")) == [1, 3, 2]
+        assert list(index.positions(end="2024-01-01 07:00")) == []
+        assert list(index.positions()) == [1, 3, 2, 0]
+
+    def test_empty_and_reversed_window(self) -> None:
+        index = TimeIndex.from_times(_times(["2024-01-01", "2024-01-02"]))
+        assert index.positions("2024-01-03", "2024-01-01") == slice(2, 2)
+
+    def test_extend_matches_full_sort(self) -> None:
+        first = _times(["2024-01-02", "2024-01-01", "2024-01-04"])
+        second = _times(["2024-01-03", "2024-01-01", "2024-01-05"])
+        extended = TimeIndex.from_times(first).extend(second)
+        whole = TimeIndex.from_times(np.concatenate([first, second]))
+        assert list(extended.order) == list(whole.order)
+        assert (extended.times == whole.times).all()
+
+    def test_extend_in_order_stays_a_slice(self) -> None:
+        index = TimeIndex.from_times(_times(["2024-01-01"])).extend(_times(["2024-01-02", "2024-01-03"]))
+        assert index.order is None
+        assert index.positions("2024-01-02") == slice(1, 3)
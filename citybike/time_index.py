@@ -0,0 +1,80 @@
+"""
+Sorted start-time index for time-range queries on trips.
+
+TimeIndex keeps the start times of a trips frame in sorted order together
+with the row positions that sort them.  A window [start, end) is then two
+binary searches (np.searchsorted) — O(log N) — plus gathering the rows
+inside it, however many years of trips the frame holds.  Frames that are
+already in time order need no permutation and a window is a plain slice.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class TimeIndex:
+    """Start times in sorted order, with the positions of their rows.
+
+    Attributes:
+        times: Sorted start times (datetime64).
+        order: Row position of each entry of *times*, or None when the
+            rows are already in time order (then entry i is row i).
+    """
+
+    def __init__(self, times: np.ndarray, order: np.ndarray | None = None) -> None:
+        self.times = times
+        self.order = order
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @classmethod
+    def from_times(cls, times: np.ndarray) -> "TimeIndex":
+        """Index start times given in row order (no NaT)."""
+        times = np.asarray(times)
+        if (times[1:] >= times[:-1]).all():
+            return cls(times)
+        # stable, so equal start times keep their row order
+        order = np.argsort(times, kind="stable")
+        return cls(times[order], order)
+
+    def extend(self, times: np.ndarray) -> "TimeIndex":
+        """Index rows appended after the indexed ones, without a full re-sort."""
+        times = np.asarray(times, dtype=self.times.dtype)
+        added = TimeIndex.from_times(times)
+        if self.order is None and added.order is None and (
+            not len(self) or not len(times) or times[0] >= self.times[-1]
+        ):
+            return TimeIndex(np.concatenate([self.times, times]))
+
+        n = len(self)
+        positions = np.concatenate([
+            np.arange(n) if self.order is None else self.order,
+            n + (np.arange(len(times)) if added.order is None else added.order),
+        ])
+        merged = np.concatenate([self.times, added.times])
+        # two sorted runs: the stable sort merges them in linear time
+        perm = np.argsort(merged, kind="stable")
+        return TimeIndex(merged[perm], positions[perm])
+
+    def _bound(self, value) -> np.datetime64:
+        return pd.Timestamp(value).to_datetime64().astype(self.times.dtype)
+
+    def positions(self, start=None, end=None) -> slice | np.ndarray:
+        """Row positions with start <= time < end, in time order.
+
+        Args:
+            start: Inclusive lower bound (anything pd.Timestamp accepts);
+                None for no bound.
+            end: Exclusive upper bound; None for no bound.
+
+        Returns:
+            A slice when the rows are in time order, else an array of
+            positions (usable with DataFrame.iloc either way).
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.times, self._bound(start), "left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.times, self._bound(end), "left"))
+        hi = max(lo, hi)
+        if self.order is None:
+            return slice(lo, hi)
+        return self.order[lo:hi]
@@ -17,6 +17,8 @@ from typing import Any
 DATE_FORMAT = "%Y-%m-%d"
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
 VALID_BIKE_TYPES = {"classic", "electric"}
 VALID_USER_TYPES = {"casual", "member"}
 VALID_TRIP_STATUSES = {"completed", "cancelled"}